@@ -10,9 +10,17 @@ import time
 # Adicionar src ao path para importações
 sys.path.append('src')
 
+# Event loop uvloop (opcional): asyncio.run passa a usar o loop baseado em libuv
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 from dotenv import load_dotenv
 
 from src.core.legal_models import LegalQuery, Priority, ValidationLevel
+from src.core.http_client import close_loop_http_pool
 from src.core.workflow_builder import build_graph
 from src.agents.streaming.response_synthesizer import synthesize_response_streaming
 
@@ -784,28 +792,33 @@ if prompt := st.chat_input(t["chat_placeholder"]):
                 # Função para executar processamento
                 def run_processing():
                     async def process_coroutine():
-                        progress_count = 0
-                        async for step_type, content in process_legal_query(
-                            prompt, 
-                            system["Priority"].MEDIUM,  # Prioridade padrão
-                            system["ValidationLevel"].MODERATE,  # Validação padrão
-                            True  # Usar híbrido
-                        ):
+                        # Cada consulta roda em um asyncio.run próprio: as conexões deste loop
+                        # são fechadas no fim (o cliente HTTP compartilhado continua válido)
+                        try:
+                            progress_count = 0
+                            async for step_type, content in process_legal_query(
+                                prompt, 
+                                system["Priority"].MEDIUM,  # Prioridade padrão
+                                system["ValidationLevel"].MODERATE,  # Validação padrão
+                                True  # Usar híbrido
+                            ):
                             
-                            if step_type == "progress":
-                                progress_count += 1
-                                progress = min(progress_count / 10.0, 0.9)
-                                progress_bar.progress(progress)
-                                status_text.text(content)
+                                if step_type == "progress":
+                                    progress_count += 1
+                                    progress = min(progress_count / 10.0, 0.9)
+                                    progress_bar.progress(progress)
+                                    status_text.text(content)
                             
-                            elif step_type == "final":
-                                return content
+                                elif step_type == "final":
+                                    return content
                             
-                            elif step_type == "error":
-                                st.error(f"{t['error_processing']} {content}")
-                                return None
+                                elif step_type == "error":
+                                    st.error(f"{t['error_processing']} {content}")
+                                    return None
                         
-                        return None
+                            return None
+                        finally:
+                            await close_loop_http_pool()
                     
                     return asyncio.run(process_coroutine())
                 
@@ -7,6 +7,7 @@ from .document_retriever import retrieve_documents
 from .document_grader import grade_documents
 from .query_transformer import transform_query
 from .search_coordinator import (
+    evaluate_and_search_web,
     evaluate_search_necessity,
     search_jurisprudencia,
     search_web_conditional
@@ -16,6 +17,7 @@ __all__ = [
     "retrieve_documents",
     "grade_documents", 
     "transform_query",
+    "evaluate_and_search_web",
     "evaluate_search_necessity",
     "search_jurisprudencia",
     "search_web_conditional"
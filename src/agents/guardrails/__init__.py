@@ -0,0 +1,16 @@
+"""
+Módulo Guardrails - Verificações de segurança de respostas jurídicas
+Contém o filtro rápido por expressões regulares usado antes do guardrail LLM
+e o parser da resposta em texto do verificador (compilável com mypyc)
+"""
+
+from .fast_filter import PATTERNS, count_red_flags, find_fast_guardrail_violation, find_pii
+from .guardrail_parse import parse_guardrail_text
+
+__all__ = [
+    "PATTERNS",
+    "count_red_flags",
+    "find_fast_guardrail_violation",
+    "find_pii",
+    "parse_guardrail_text"
+]
@@ -0,0 +1,125 @@
+"""
+Filtro rápido de guardrails por expressões regulares.
+Detecta afirmações categóricas e incentivo a atividades ilegais sem chamada LLM.
+Padrões compilados uma única vez no carregamento do módulo; com Hyperscan instalado,
+todos os padrões são verificados em uma única varredura do texto.
+count_red_flags é o pré-filtro que decide se o guardrail LLM precisa ser chamado;
+find_pii localiza CPFs/CNPJs para o guardrail local.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+import structlog
+
+# Hyperscan é opcional (pacote hyperscan, varredura multi-padrão com SIMD)
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+# Parte barata do guardrail: afirmações categóricas e incentivo a atividades ilegais
+PATTERN_SOURCES = [
+    r"\bgarant\w* (?:que )?(?:você |o senhor |a senhora )?(?:vai |irá )?(?:ganhar|vencer|ser absolvid\w*)",
+    r"\bcom (?:toda )?certeza (?:você |o senhor |a senhora )?(?:vai |irá )?(?:ganhar|vencer|perder)",
+    r"\bn[ãa]o (?:é necessário|precisa(?:rá)?)(?: de)? (?:consultar |contratar )?(?:um )?advogado",
+    r"\bcomo (?:sonegar|lavar dinheiro|fraudar|falsificar|subornar|ocultar bens)",
+    r"\b(?:sonegue|fraude o|falsifique|suborne|oculte (?:bens|patrimônio))\b",
+    r"\bgaranto que\b",
+]
+
+PATTERNS = [re.compile(source, re.IGNORECASE) for source in PATTERN_SOURCES]
+
+
+def _compile_hyperscan_database():
+    """Compila todos os padrões em um único banco Hyperscan (ou None se indisponível)."""
+    if not HYPERSCAN_AVAILABLE:
+        return None
+
+    try:
+        database = hyperscan.Database()
+        flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SOM_LEFTMOST
+        database.compile(
+            expressions=[source.encode("utf-8") for source in PATTERN_SOURCES],
+            ids=list(range(len(PATTERN_SOURCES))),
+            flags=[flags] * len(PATTERN_SOURCES)
+        )
+        return database
+    except Exception as e:
+        logger.warning("Falha ao compilar padrões no Hyperscan - usando re", error=str(e))
+        return None
+
+
+_HYPERSCAN_DB = _compile_hyperscan_database()
+
+
+def _scan_hyperscan(text: str) -> Optional[str]:
+    """Varredura única com Hyperscan; interrompe no primeiro match."""
+    encoded = text.encode("utf-8")
+    matches: List[Tuple[int, int]] = []
+
+    def on_match(pattern_id, start, end, flags, context):
+        matches.append((start, end))
+        return True  # Interrompe a varredura
+
+    try:
+        _HYPERSCAN_DB.scan(encoded, match_event_handler=on_match)
+    except hyperscan.ScanTerminated:
+        pass
+
+    if not matches:
+        return None
+    start, end = matches[0]
+    return encoded[start:end].decode("utf-8", errors="ignore")
+
+
+# Pré-filtro: termos de alerta que justificam a verificação LLM. Sem nenhum deles
+# (e com disclaimer), a resposta é considerada segura sem chamar o modelo.
+RED_FLAG_TERMS = [
+    "garant", "com certeza", "certamente vai", "sem dúvida vai",
+    "não precisa de advogado", "sem advogado", "dispensa advogado",
+    "sonega", "fraud", "lavagem", "lavar dinheiro", "caixa dois", "laranja",
+    "propina", "subor", "falsific", "ocultar", "oculte", "burlar", "driblar",
+    "evitar impostos", "não declarar", "esconder bens",
+]
+
+# Dados pessoais (CPF/CNPJ) no texto também escalam para o LLM
+RED_FLAG_PATTERN_SOURCES = [
+    r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b",
+    r"\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b",
+]
+
+# Uma única alternância compilada: a varredura percorre o texto uma vez
+RED_FLAG_RE = re.compile(
+    "|".join([re.escape(term) for term in RED_FLAG_TERMS] + RED_FLAG_PATTERN_SOURCES),
+    re.IGNORECASE
+)
+
+
+# Apenas os dados pessoais: violação por si só no guardrail local (sem LLM)
+PII_RE = re.compile("|".join(RED_FLAG_PATTERN_SOURCES))
+
+
+def find_pii(text: str) -> List[str]:
+    """CPFs/CNPJs presentes no texto."""
+    return PII_RE.findall(text)
+
+
+def count_red_flags(text: str) -> int:
+    """Número de termos de alerta no texto (0 = nada que exija o guardrail LLM)."""
+    return sum(1 for _ in RED_FLAG_RE.finditer(text))
+
+
+def find_fast_guardrail_violation(text: str) -> Optional[str]:
+    """Retorna o trecho que viola os padrões rápidos de guardrail, se houver."""
+    if _HYPERSCAN_DB is not None:
+        return _scan_hyperscan(text)
+
+    for pattern in PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(0)
+    return None
@@ -0,0 +1,150 @@
+"""
+Parser da resposta em texto (CHAVE: valor) do verificador de guardrails.
+Código puro e totalmente anotado, sem dependências do restante do sistema, para que possa
+ser compilado AOT com mypyc (`mypyc src/agents/guardrails/guardrail_parse.py`); sem a
+extensão compilada, o mesmo módulo é importado como Python comum.
+"""
+
+import re
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# pyahocorasick é opcional: varredura multi-padrão em C para os marcadores
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Linhas reconhecidas na resposta em texto do verificador de guardrails
+# (valores já sem espaços/asteriscos nas bordas: o parser não cria cópias com strip/upper)
+_GUARD_RE = re.compile(
+    r'^[ \t*]*(?:'
+    r'PASSOU_VERIFICACAO:[ \t*]*(?P<passed>.*?)'
+    r'|NIVEL_RISCO:[ \t*]*(?P<risk>.*?)'
+    r'|-[ \t]+(?P<violation>.+?)'
+    r')[ \t*]*\r?$',
+    re.MULTILINE | re.IGNORECASE
+)
+
+# Com pyahocorasick, os três marcadores são localizados em uma única passada do autômato;
+# o valor de cada um vai do fim do marcador até o fim da linha
+_GUARD_MARKERS: Tuple[Tuple[str, str], ...] = (
+    ("passed", "PASSOU_VERIFICACAO:"),
+    ("risk", "NIVEL_RISCO:"),
+    ("violation", "\n- "),
+)
+
+
+def _build_automaton() -> Optional[Any]:
+    """Autômato Aho-Corasick dos marcadores (ou None sem pyahocorasick)."""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for field, marker in _GUARD_MARKERS:
+        automaton.add_word(marker, field)
+    automaton.make_automaton()
+    return automaton
+
+
+_GUARD_AUTOMATON: Optional[Any] = _build_automaton()
+
+# Níveis de risco conhecidos -> constante internada (comparável por identidade).
+# Variações comuns de caixa estão no mapa para dispensar .upper()/.lower() no caso usual
+_RISK_BAIXO = sys.intern("baixo")
+_RISK_MEDIO = sys.intern("medio")
+_RISK_ALTO = sys.intern("alto")
+_RISK_MAP: Dict[str, str] = {
+    "BAIXO": _RISK_BAIXO, "Baixo": _RISK_BAIXO, "baixo": _RISK_BAIXO,
+    "MEDIO": _RISK_MEDIO, "Medio": _RISK_MEDIO, "medio": _RISK_MEDIO,
+    "MÉDIO": _RISK_MEDIO, "Médio": _RISK_MEDIO, "médio": _RISK_MEDIO,
+    "ALTO": _RISK_ALTO, "Alto": _RISK_ALTO, "alto": _RISK_ALTO,
+    "MÉDIA": _RISK_MEDIO, "MEDIA": _RISK_MEDIO, "MODERADO": _RISK_MEDIO,
+    "LOW": _RISK_BAIXO, "MEDIUM": _RISK_MEDIO, "HIGH": _RISK_ALTO,
+}
+
+# Pontuação/marcação em volta do nível ("[ALTO]", "**Médio**", "alto.", "(baixo)")
+_RISK_STRIP = ' \t\r[]()*"\'.,:;!'
+# Primeira palavra de formas compostas ("ALTO - conteúdo sensível", "medio-alto")
+_RISK_WORD_RE = re.compile(r'[\s\-/]+')
+
+
+def _risk_level(token: str) -> str:
+    """
+    Nível de risco normalizado. Formas pontuadas ou compostas são reduzidas à primeira
+    palavra; tokens desconhecidos contam como medio (nunca rebaixam o risco para baixo).
+    """
+    risk = _RISK_MAP.get(token)
+    if risk is not None:
+        return risk
+
+    # Caminho raro: remove marcação, fica com a primeira palavra e normaliza a caixa
+    word = _RISK_WORD_RE.split(token.strip(_RISK_STRIP), 1)[0].strip(_RISK_STRIP)
+    risk = _RISK_MAP.get(word)
+    if risk is None:
+        risk = _RISK_MAP.get(word.upper(), _RISK_MEDIO)
+    return risk
+
+
+# Limite de violações coletadas: saída degenerada do modelo não cresce a lista sem limite
+_MAX_VIOLATIONS = 16
+
+# Campos obrigatórios já encontrados (bitmask) para encerrar a varredura cedo
+_GUARD_PASSED = 1
+_GUARD_RISK = 2
+_GUARD_REQUIRED = _GUARD_PASSED | _GUARD_RISK
+
+
+def _iter_guard_fields(text: str) -> Iterator[Tuple[str, str]]:
+    """Gera pares (campo, valor) da resposta de guardrails: Aho-Corasick se disponível, senão _GUARD_RE."""
+    if _GUARD_AUTOMATON is None:
+        for match in _GUARD_RE.finditer(text):
+            field: str = match.lastgroup or ""
+            yield field, match.group(field)
+        return
+
+    # "\n" inicial para que um item "- " na primeira linha também seja encontrado
+    text = "\n" + text
+    for end, marker_field in _GUARD_AUTOMATON.iter(text):
+        line_end = text.find("\n", end + 1)
+        yield marker_field, text[end + 1:line_end if line_end != -1 else len(text)].strip(' \t\r*')
+
+
+def parse_guardrail_text(text: str) -> Tuple[bool, str, List[str]]:
+    """
+    Retorna (passou, nível de risco normalizado - baixo, medio ou alto -, violações).
+    As violações só são usadas quando a verificação falha: com PASSOU_VERIFICACAO: SIM
+    e NIVEL_RISCO lidos, o restante do texto não é varrido. No máximo _MAX_VIOLATIONS
+    violações são coletadas.
+    """
+    passed = True  # Valor padrão
+    risk_level = _RISK_BAIXO
+    violations: List[str] = []
+    found = 0
+
+    # Uma única varredura do texto, despachando pelo campo encontrado
+    for field, value in _iter_guard_fields(text):
+        if field == 'violation':
+            if len(violations) < _MAX_VIOLATIONS:
+                violations.append(value)
+            elif found == _GUARD_REQUIRED:
+                # Limite atingido e decisão já lida: nada mais a extrair
+                break
+            continue
+
+        if field == 'passed':
+            # SIM/Sim/sim: basta a primeira letra, fora colchetes/aspas/asteriscos ("[SIM]", "'sim'")
+            passed = value.lstrip(' \t[]*"\'')[:1] in ('S', 's')
+            found |= _GUARD_PASSED
+        else:
+            risk_level = _risk_level(value)
+            found |= _GUARD_RISK
+
+        if found == _GUARD_REQUIRED and passed:
+            break
+
+    if passed:
+        violations = []
+
+    return passed, risk_level, violations
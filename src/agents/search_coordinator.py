@@ -1,10 +1,15 @@
 from src.core.workflow_state import AgentState
 from src.interfaces.external_search_client import unified_mcp, LexMLSearchRequest, TavilySearchRequest
 from src.core.llm_factory import get_pydantic_ai_llm, MODEL_DECISION
+from src.core.legal_models import ProcessingConfig
 from pydantic_ai import Agent
 from pydantic import BaseModel, Field
 from typing import Literal
+import asyncio
 import traceback
+import structlog
+
+logger = structlog.get_logger(__name__)
 
 # Modelo para decisão de busca
 class SearchDecision(BaseModel):
@@ -63,20 +68,20 @@ async def search_jurisprudencia(state: AgentState) -> dict:
 
 async def evaluate_search_necessity(state: AgentState) -> dict:
     """Avalia se é necessário buscar na web baseado nos resultados atuais."""
-    print("---NODE: EVALUATE SEARCH NECESSITY---")
+    logger.debug("NODE: EVALUATE SEARCH NECESSITY")
     
-    # Coleta informações do estado atual
+    # Coleta informações do estado atual (uma leitura por chave)
     query_object = state.get("query")
     if not query_object:
-        print("  ERRO: Query não encontrada no estado")
+        logger.error("Query não encontrada no estado")
         return {"needs_web_search": False, "evaluation_complete": True}
     
     query_text = query_object.text
-    retrieved_docs = state.get("retrieved_docs", [])
-    lexml_results = state.get("lexml_results", [])
+    retrieved_docs = state.get("retrieved_docs") or []
+    lexml_results = state.get("lexml_results") or []
     grade = state.get("grade", "unknown")
     
-    # Formato resumo das informações para análise
+    # Formato resumo das informações para análise (os trechos entram no prompt do agente)
     crag_summary = f"CRAG Grade: {grade}, Documentos: {len(retrieved_docs)}"
     if retrieved_docs:
         crag_content = "\n".join([f"- {doc.text[:200]}..." for doc in retrieved_docs[:3]])
@@ -97,12 +102,12 @@ async def evaluate_search_necessity(state: AgentState) -> dict:
     )
     
     try:
-        print("  Analisando necessidade de busca web...")
         result = await search_decision_agent.run(analysis_input)
         decision: SearchDecision = result.output
         
-        print(f"  Decisão: {'Buscar na web' if decision.needs_web_search else 'Não buscar na web'}")
-        print(f"  Justificativa: {decision.reasoning}")
+        logger.debug("Necessidade de busca web avaliada",
+                    needs_web_search=decision.needs_web_search,
+                    reasoning=decision.reasoning)
         
         return {
             "needs_web_search": decision.needs_web_search,
@@ -112,11 +117,12 @@ async def evaluate_search_necessity(state: AgentState) -> dict:
         }
         
     except Exception as e:
-        print(f"  ERRO na avaliação: {e}. Usando fallback conservador.")
+        logger.warning("Erro na avaliação de busca web - usando fallback conservador", error=str(e))
         # Fallback: não buscar na web se houver erro
         return {
             "needs_web_search": False,
             "web_search_reasoning": f"Erro na avaliação: {e}. Prosseguindo sem busca web.",
+            "web_search_evaluation_failed": True,
             "evaluation_complete": True
         }
 
@@ -162,31 +168,52 @@ async def search_web_conditional(state: AgentState) -> dict:
             "web_search_error": str(e)
         }
 
-# Função para decidir próximo passo após busca jurisprudencial
-async def decide_after_jurisprudencia(state: AgentState) -> dict:
-    """Decide se deve avaliar necessidade de busca web ou ir direto para síntese."""
-    print("---NODE: DECIDE AFTER JURISPRUDENCIA---")
-    
-    # Sempre avalia necessidade de busca web após jurisprudência
-    print("  Roteando para avaliação de necessidade de busca web")
-    return {"next_node": "evaluate_search_necessity"}
+# Histórico das decisões de busca web (estimativa de P(sim) para a especulação)
+_web_decision_history = {"yes": 0, "total": 0}
 
-# Função para decidir próximo passo após avaliação
-async def decide_after_evaluation(state: AgentState) -> dict:
-    """Decide se deve buscar na web ou ir para síntese."""
-    print("---NODE: DECIDE AFTER EVALUATION---")
-    
-    needs_web = state.get("needs_web_search", False)
-    if needs_web:
-        print("  Busca web necessária. Roteando para busca web.")
-        return {"next_node": "search_web_conditional"}
-    else:
-        print("  Busca web não necessária. Roteando para síntese.")
-        return {"next_node": "synthesize_response"}
+def _web_search_yes_rate() -> float:
+    """Taxa histórica de decisões 'buscar na web' (otimista enquanto não há histórico)."""
+    if _web_decision_history["total"] == 0:
+        return 1.0
+    return _web_decision_history["yes"] / _web_decision_history["total"]
 
-# Função para decidir próximo passo após busca web
-async def decide_after_web_search(state: AgentState) -> dict:
-    """Decide próximo passo após busca web (sempre síntese)."""
-    print("---NODE: DECIDE AFTER WEB SEARCH---")
-    print("  Roteando para síntese final.")
-    return {"next_node": "synthesize_response"} 
\ No newline at end of file
+async def evaluate_and_search_web(state: AgentState) -> dict:
+    """
+    Avalia a necessidade de busca web e executa a busca quando necessária.
+    Se a taxa histórica de 'sim' superar config.speculative_web_threshold, a busca Tavily
+    (com o texto da consulta) é disparada em paralelo com a avaliação e aproveitada sempre
+    que a decisão for 'sim' (a query otimizada da decisão não refaz a busca); com 'não',
+    é cancelada.
+    """
+    config = (state.get("processing") or {}).get("config") or ProcessingConfig()
+    yes_rate = _web_search_yes_rate()
+    
+    speculative_task = None
+    if yes_rate > config.speculative_web_threshold:
+        speculative_task = asyncio.create_task(
+            search_web_conditional({**state, "needs_web_search": True})
+        )
+    
+    try:
+        evaluation = await evaluate_search_necessity(state)
+    except BaseException:
+        if speculative_task is not None:
+            speculative_task.cancel()
+        raise
+    
+    needs_web = evaluation.get("needs_web_search", False)
+    if not evaluation.get("web_search_evaluation_failed"):
+        # O 'não' do fallback de erro não é uma decisão: não pode desligar a especulação
+        _web_decision_history["total"] += 1
+        _web_decision_history["yes"] += int(needs_web)
+    
+    if speculative_task is not None:
+        if needs_web:
+            return {**evaluation, **await speculative_task}
+        speculative_task.cancel()
+        logger.info("Busca web especulativa descartada", yes_rate=round(yes_rate, 2))
+    
+    if not needs_web:
+        return {**evaluation, "tavily_results": None, "web_search_skipped": True}
+    
+    return {**evaluation, **await search_web_conditional({**state, **evaluation})}
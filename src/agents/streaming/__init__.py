@@ -4,10 +4,14 @@ Contém sintetizadores de resposta e processadores legais com streaming
 """
 
 from .response_synthesizer import synthesize_response_streaming, synthesize_response
-from .hybrid_legal_processor import process_legal_query_hybrid_corrected
+from .hybrid_legal_processor import (
+    process_legal_query_hybrid_corrected,
+    process_legal_query_hybrid_batch
+)
 
 __all__ = [
     "synthesize_response_streaming",
     "synthesize_response", 
-    "process_legal_query_hybrid_corrected"
+    "process_legal_query_hybrid_corrected",
+    "process_legal_query_hybrid_batch"
 ] 
\ No newline at end of file
@@ -2,27 +2,37 @@
 Implementação híbrida CORRETA: OpenRouter para quase tudo + Groq apenas para WEB/LexML.
 Arquitetura REAL conforme especificação do usuário:
 
-🧠 OpenRouter (meta-llama/llama-4-maverick:free) - Etapa 1: Decisão de busca
+🧠 OpenRouter (meta-llama/llama-3.2-3b-instruct:free) - Etapa 1: Decisão de busca
 🧠 OpenRouter (meta-llama/llama-4-maverick:free) - Etapa 2: Busca vectordb  
 🔧 Groq (llama-3.3-70b-versatile) - Etapa 2.1: Busca WEB + LexML
 🧠 OpenRouter (meta-llama/llama-4-maverick:free) - Etapa 3: Análise jurídica RAG
 🧠 OpenRouter (meta-llama/llama-4-maverick:free) - Etapa 4: Síntese final
-🧠 OpenRouter (meta-llama/llama-4-maverick:free) - Etapa 5: Validação de qualidade
-🧠 OpenRouter (meta-llama/llama-4-maverick:free) - Etapa 6: Verificação de guardrails
+🧠 OpenRouter (meta-llama/llama-3.1-8b-instruct:free) - Etapa 5: Validação de qualidade
+🧠 OpenRouter (meta-llama/llama-3.1-8b-instruct:free) - Etapa 6: Verificação de guardrails
 """
 
 from __future__ import annotations
 
 import asyncio
+import collections
+import contextlib
+import dataclasses
+import functools
+import hashlib
+import io
+import logging
 import os
+import re
 import time
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Final, List, Optional, Tuple, Union
 
+import httpx
 import structlog
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
 from pydantic_ai import Agent, ModelRetry, RunContext
+from pydantic_ai.exceptions import ModelHTTPError, UnexpectedModelBehavior
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.models.groq import GroqModel
 from pydantic_ai.providers.openai import OpenAIProvider
@@ -50,6 +60,16 @@ from src.core.legal_models import (
     DocumentMetadata
 )
 
+from src.core.llm_factory import MODEL_DECISION_SMALL, MODEL_VALIDATOR_SMALL
+from src.interfaces.external_search_client import unified_mcp, TavilySearchRequest
+from src.core.semantic_cache import (
+    ExactLRUCache, SemanticCache, embed_query, exact_key, get_redis_storage, normalize_query
+)
+from src.core.http_client import get_shared_http_client
+from src.core.token_budget import CHARS_PER_TOKEN, trim_tokens
+from src.agents.guardrails.fast_filter import count_red_flags, find_fast_guardrail_violation, find_pii
+from src.agents.guardrails.guardrail_parse import parse_guardrail_text
+
 # Importar sistema de observabilidade COMPLETO
 from src.core.observability import (
     track_data_integration,
@@ -57,7 +77,7 @@ from src.core.observability import (
     track_groq_searches,
     track_synthesis_streaming,
     log_detailed_state,
-    log_data_flow_checkpoint,
+    log_data_flow_checkpoint_background,
     log_performance_metrics,
     serialize_for_langfuse,
     extract_metadata
@@ -71,9 +91,42 @@ logger = structlog.get_logger(__name__)
 # CONFIGURAÇÃO DOS PROVEDORES
 # ===============================
 
+class TimeoutConfig(BaseModel):
+    """Timeouts (segundos) das etapas LLM, ajustáveis por variáveis de ambiente."""
+    model_config = ConfigDict(frozen=True)
+    
+    groq_search: float = Field(10.0, gt=0)
+    # Cada perna (Tavily, LexML) da ferramenta search_all_sources, dentro do orçamento do Groq
+    search_leg: float = Field(4.0, gt=0)
+    vectordb_search: float = Field(30.0, gt=0)
+    analysis: float = Field(60.0, gt=0)
+    synthesis_section: float = Field(90.0, gt=0)
+    
+    @classmethod
+    def from_env(cls) -> "TimeoutConfig":
+        """Lê HYBRID_TIMEOUT_<ETAPA> (ex.: HYBRID_TIMEOUT_GROQ_SEARCH=15)."""
+        overrides = {
+            name: float(os.environ[f"HYBRID_TIMEOUT_{name.upper()}"])
+            for name in cls.model_fields
+            if f"HYBRID_TIMEOUT_{name.upper()}" in os.environ
+        }
+        return cls(**overrides)
+
+
+TIMEOUTS = TimeoutConfig.from_env()
+
+
+@functools.cache
 def create_openrouter_model(model_name: str) -> OpenAIModel:
     """
     Cria modelo OpenRouter para a maioria das operações.
+    
+    O OpenRouter aplica cache de prefixo automaticamente nos provedores que o suportam;
+    por isso os system prompts dos agentes são estáticos e os dados dinâmicos vão
+    apenas na mensagem do usuário. Ver log_prompt_cache_usage.
+    
+    Memoizado por nome: agentes que usam o mesmo modelo compartilham modelo, provider
+    e cliente OpenAI (todos sobre o cliente httpx compartilhado).
     """
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
@@ -83,14 +136,16 @@ def create_openrouter_model(model_name: str) -> OpenAIModel:
         model_name,
         provider=OpenAIProvider(
             base_url='https://openrouter.ai/api/v1',
-            api_key=api_key
+            api_key=api_key,
+            http_client=get_shared_http_client()
         )
     )
 
 
+@functools.cache
 def create_groq_model(model_name: str) -> GroqModel:
     """
-    Cria modelo Groq APENAS para buscas WEB + LexML com tools.
+    Cria modelo Groq APENAS para buscas WEB + LexML com tools (memoizado por nome).
     """
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
@@ -98,10 +153,26 @@ def create_groq_model(model_name: str) -> GroqModel:
     
     return GroqModel(
         model_name,
-        provider=GroqProvider(api_key=api_key)
+        provider=GroqProvider(api_key=api_key, http_client=get_shared_http_client())
     )
 
 
+
+def log_prompt_cache_usage(stage: str, result: Any) -> None:
+    """
+    Registra quantos tokens do prompt foram servidos do cache do provedor
+    (usage.prompt_tokens_details.cached_tokens na resposta do OpenRouter).
+    """
+    try:
+        usage = result.usage()
+    except Exception:
+        return
+    
+    logger.info("Uso de tokens do prompt",
+               stage=stage,
+               request_tokens=usage.request_tokens,
+               cached_tokens=(usage.details or {}).get("cached_tokens", 0))
+
 # ===============================
 # DEPENDÊNCIAS DOS AGENTES
 # ===============================
@@ -118,6 +189,9 @@ class AgentDependencies(BaseModel):
     
     # Clientes HTTP e APIs (serão injetados)
     http_client: Any = None
+    
+    # Embedding da consulta, calculado uma vez pelo orquestrador e reutilizado pelos caches
+    query_embedding: Any = None
     vector_store: Any = None
     lexml_client: Any = None
     tavily_client: Any = None
@@ -125,6 +199,9 @@ class AgentDependencies(BaseModel):
     # Estado compartilhado
     shared_state: Dict[str, Any] = Field(default_factory=dict)
     
+    # Resultados das etapas LLM desta requisição (ver request_cached)
+    request_cache: Dict[str, Any] = Field(default_factory=dict)
+    
     # Logging
     logger: Any = Field(default_factory=lambda: structlog.get_logger())
 
@@ -180,106 +257,84 @@ class QualityAssessment(BaseModel):
 
 
 class GuardrailCheck(BaseModel):
-    """Resultado da verificação de guardrails (OPENROUTER)."""
+    """
+    Resultado da verificação de guardrails (OPENROUTER).
+    Imutável (frozen + tupla de violações): instâncias em cache são compartilhadas sem cópia
+    e os caminhos internos confiáveis constroem via model_construct, sem validação.
+    """
+    model_config = ConfigDict(frozen=True)
     
     passed: bool = Field(description="Se passou em todos os guardrails")
-    violations: List[str] = Field(description="Violações encontradas")
-    overall_risk_level: str = Field(description="Nível de risco geral")
+    violations: Tuple[str, ...] = Field(description="Violações encontradas")
+    overall_risk_level: str = Field(description="Nível de risco geral: baixo, medio ou alto")
+
+
+class ValidationWithGuardrails(BaseModel):
+    """Resultado das etapas 5+6 fundidas: qualidade + guardrails em um único objeto (OPENROUTER)."""
+    
+    quality: QualityAssessment = Field(description="Avaliação de qualidade da resposta")
+    guardrails: GuardrailCheck = Field(description="Verificação das diretrizes éticas")
 
 
 # ===============================
-# AGENTES HÍBRIDOS CORRETOS
+# PROMPTS DE SISTEMA (VERSIONADOS)
 # ===============================
 
-# OPENROUTER: Etapa 1 - Decisão de busca (meta-llama/llama-4-maverick:free)
-search_decision_agent = Agent[AgentDependencies, str](
-    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
-    output_type=str,
-    system_prompt="""
+def prompt_hash(prompt: str) -> str:
+    """Hash curto do prompt; compõe o namespace dos caches para invalidá-los quando o prompt muda."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+
+
+SEARCH_DECISION_PROMPT = """
     Você é um especialista em pesquisa jurídica que decide quais fontes consultar.
     
-    Analise a consulta jurídica e determine quais buscas são necessárias.
+    Analise a consulta jurídica e determine quais buscas são necessárias:
+    vectordb (documentos já indexados), LexML (legislação oficial brasileira),
+    web (informações atualizadas) e jurisprudência (decisões judiciais).
     
-    RESPONDA APENAS COM ESTE FORMATO EXATO:
+    Sempre marque needs_vectordb como verdadeiro para consultar documentos já indexados.
     
-    VECTORDB: [SIM/NAO] - Para documentos já indexados no sistema
-    LEXML: [SIM/NAO] - Para legislação e normas oficiais brasileiras  
-    WEB: [SIM/NAO] - Para informações atualizadas e jurisprudência recente
-    JURISPRUDENCIA: [SIM/NAO] - Para decisões judiciais relevantes
-    
-    JUSTIFICATIVA: [Explique brevemente sua decisão]
-    CONFIANCA: [0.0-1.0]
-    PRIORIDADE: [Liste as buscas em ordem de prioridade]
-    
-    Sempre inclua VECTORDB: SIM para consultar documentos já indexados.
+    Retorne o objeto estruturado.
     """
-)
+SEARCH_DECISION_PROMPT_HASH = prompt_hash(SEARCH_DECISION_PROMPT)
 
-# OPENROUTER: Etapa 2 - Busca vectordb (meta-llama/llama-4-maverick:free)
-vectordb_search_agent = Agent[AgentDependencies, str](
-    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
-    output_type=str,
-    system_prompt="""
+VECTORDB_SEARCH_PROMPT = """
     Você é um especialista em busca vectorial para documentos jurídicos.
     
-    Execute busca semântica no banco vetorial e retorne informações estruturadas.
-    
-    RESPONDA APENAS COM ESTE FORMATO EXATO:
-    
-    DOCUMENTOS_ENCONTRADOS: [número]
-    QUALIDADE_BUSCA: [0.0-1.0]
+    Execute busca semântica no banco vetorial. Foque em precisão e relevância semântica.
     
-    TRECHOS_RELEVANTES:
-    - [Trecho 1 mais relevante]
-    - [Trecho 2 mais relevante]
-    - [Trecho 3 mais relevante]
-    
-    RESUMO: [Resumo dos resultados encontrados para análise posterior]
-    
-    Foque em precisão e relevância semântica.
+    Retorne o objeto estruturado.
     """
-)
-
-# NOTA: groq_search_agent agora está definido com as ferramentas
+VECTORDB_SEARCH_PROMPT_HASH = prompt_hash(VECTORDB_SEARCH_PROMPT)
 
-# OPENROUTER: Etapa 3 - Análise jurídica RAG (meta-llama/llama-4-maverick:free)
-legal_analyzer_agent = Agent[AgentDependencies, str](
-    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
-    output_type=str,
-    system_prompt="""
-    Você é um analista jurídico que SEMPRE produz análises detalhadas e completas.
+LEGAL_ANALYZER_PROMPT = """
+    Você é um analista jurídico que produz análises estruturadas para orientar a resposta final.
     
-    REGRA FUNDAMENTAL: NUNCA produza análise com menos de 200 palavras. SEMPRE seja extensivo.
+    Seja detalhado quando necessário; seja conciso quando os dados são claros.
     
-    ESTRUTURA OBRIGATÓRIA DA ANÁLISE:
+    ESTRUTURA DA ANÁLISE:
     
     ## RESUMO DOS DADOS COLETADOS
-    [Descreva detalhadamente todas as fontes consultadas - mínimo 40 palavras]
+    [Descreva as fontes consultadas]
     
     ## PRINCÍPIOS JURÍDICOS IDENTIFICADOS
-    [Liste e explique princípios aplicáveis ao tema - mínimo 40 palavras]
+    [Liste e explique princípios aplicáveis ao tema]
     
     ## LEGISLAÇÃO APLICÁVEL
-    [Identifique leis, códigos e normas relevantes - mínimo 40 palavras]
+    [Identifique leis, códigos e normas relevantes]
     
     ## JURISPRUDÊNCIA E DOUTRINA
-    [Mencione precedentes e entendimentos doutrinários - mínimo 40 palavras]
+    [Mencione precedentes e entendimentos doutrinários]
     
     ## INTERPRETAÇÕES E CORRELAÇÕES
-    [Analise conexões entre as fontes consultadas - mínimo 40 palavras]
+    [Analise conexões entre as fontes consultadas]
     
     ## CONCLUSÕES PRELIMINARES
-    [Sintetize os achados para orientar a resposta final - mínimo 40 palavras]
-    
-    IMPORTANTE: Mesmo com dados limitados, EXPANDA com conhecimento jurídico geral sobre o tema. NUNCA seja superficial.
+    [Sintetize os achados para orientar a resposta final]
     """
-)
+LEGAL_ANALYZER_PROMPT_HASH = prompt_hash(LEGAL_ANALYZER_PROMPT)
 
-# OPENROUTER: Etapa 4 - Síntese final (meta-llama/llama-4-maverick:free)
-final_synthesizer_agent = Agent[AgentDependencies, str](
-    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
-    output_type=str,
-    system_prompt="""
+FINAL_SYNTHESIZER_PROMPT = """
     Você é um especialista jurídico que cria respostas completas e claras.
     
     Forneça respostas jurídicas bem estruturadas, detalhadas e úteis para o usuário.
@@ -289,59 +344,143 @@ final_synthesizer_agent = Agent[AgentDependencies, str](
     
     Seja abrangente e didático em suas explicações.
     """
-)
+FINAL_SYNTHESIZER_PROMPT_HASH = prompt_hash(FINAL_SYNTHESIZER_PROMPT)
 
-# OPENROUTER: Etapa 5 - Validação de qualidade (meta-llama/llama-4-maverick:free)
-quality_validator_agent = Agent[AgentDependencies, str](
-    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
-    output_type=str,
-    system_prompt="""
+QUALITY_VALIDATOR_PROMPT = """
     Você é um especialista em validação de qualidade de respostas jurídicas.
     
-    RESPONDA APENAS COM ESTE FORMATO EXATO:
-    
-    SCORE_GERAL: [0.0-1.0]
-    COMPLETUDE: [0.0-1.0] 
-    PRECISAO: [0.0-1.0]
-    CLAREZA: [0.0-1.0]
-    
-    PRECISA_MELHORIA: [SIM/NAO]
-    PRECISA_REVISAO_HUMANA: [SIM/NAO]
-    
-    MOTIVO_REVISAO: [Descrição do motivo]
-    
-    SUGESTOES:
-    - [Sugestão 1 se aplicável]
-    - [Sugestão 2 se aplicável]
-    
     Seja generoso com os scores (mínimo 0.7 para respostas adequadas).
     Foque na utilidade da resposta para o usuário final.
+    
+    Retorne o objeto estruturado.
     """
-)
+QUALITY_VALIDATOR_PROMPT_HASH = prompt_hash(QUALITY_VALIDATOR_PROMPT)
 
-# OPENROUTER: Etapa 6 - Verificação de guardrails
-guardrail_checker_agent = Agent[AgentDependencies, str](
-    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
-    output_type=str,
-    system_prompt="""
+# Rubrica completa e estática no system prompt: o prefixo é idêntico em todas as chamadas
+# (elegível ao cache de prompt do provedor) e a mensagem do usuário leva só a resposta
+GUARDRAIL_CHECKER_PROMPT = """
     Você é um especialista em verificação ética e legal de respostas jurídicas.
     
-    RESPONDA APENAS COM ESTE FORMATO EXATO:
+    Verifique se a resposta jurídica enviada segue as diretrizes éticas.
+    
+    VERIFICAÇÕES OBRIGATÓRIAS:
+    1. Inclui disclaimers sobre assessoria jurídica?
+    2. Não faz afirmações categóricas sobre casos específicos?
+    3. Sugere orientação profissional quando necessário?
+    4. Mantém neutralidade em questões controversas?
+    5. Não promove atividades ilegais?
     
-    PASSOU_VERIFICACAO: [SIM/NAO]
-    NIVEL_RISCO: [BAIXO/MEDIO/ALTO]
+    Identifique violações e avalie o nível de risco geral (baixo, medio ou alto).
+    Retorne o objeto estruturado.
+    """
+GUARDRAIL_CHECKER_PROMPT_HASH = prompt_hash(GUARDRAIL_CHECKER_PROMPT)
+
+FUSED_ANALYZER_SYNTHESIZER_PROMPT = """
+    Você é um analista jurídico que produz a análise e, na mesma resposta, a resposta final ao usuário.
+
+    RESPONDA COM EXATAMENTE DUAS SEÇÕES, NESTA ORDEM:
+
+    ## ANÁLISE
+    [Análise interna estruturada: dados coletados, princípios jurídicos, legislação aplicável,
+    jurisprudência e doutrina, interpretações e conclusões preliminares]
+
+    ## RESPOSTA FINAL
+    [Resposta completa e clara ao usuário, baseada na análise acima: explicação do conceito,
+    fundamentação legal, exemplos práticos, orientações para próximos passos e disclaimer
+    sobre assessoria jurídica. Use linguagem técnica mas acessível, em texto corrido.]
+
+    IMPORTANTE: Mesmo com dados limitados, EXPANDA com conhecimento jurídico geral sobre o tema.
+    """
+FUSED_ANALYZER_SYNTHESIZER_PROMPT_HASH = prompt_hash(FUSED_ANALYZER_SYNTHESIZER_PROMPT)
+
+FUSED_VALIDATOR_GUARDRAIL_PROMPT = """
+    Você é um especialista em validação de qualidade e verificação ética de respostas jurídicas.
+
+    Avalie a qualidade (scores de 0.0 a 1.0 para geral, completude, precisão e clareza) e
+    verifique se a resposta inclui disclaimers, evita afirmações categóricas sobre casos
+    específicos, sugere orientação profissional, mantém neutralidade e não promove atividades ilegais.
+
+    Seja generoso com os scores (mínimo 0.7 para respostas adequadas).
+    Retorne o objeto estruturado com a avaliação (quality) e a verificação de guardrails (guardrails).
+    """
+FUSED_VALIDATOR_GUARDRAIL_PROMPT_HASH = prompt_hash(FUSED_VALIDATOR_GUARDRAIL_PROMPT)
+
+GROQ_SEARCH_PROMPT = """
+    Você é um assistente de busca jurídica. Use a ferramenta search_all_sources UMA VEZ para a consulta fornecida.
     
-    VIOLACOES:
-    - [Violação 1 se encontrada]
-    - [Violação 2 se encontrada]
+    Após usar a ferramenta, forneça um resumo simples dos resultados encontrados.
     
-    Verifique se a resposta:
-    1. Inclui disclaimers apropriados sobre assessoria jurídica
-    2. Não faz afirmações categóricas sobre casos específicos
-    3. Sugere orientação profissional quando necessário
-    4. Mantém neutralidade em questões controversas
-    5. Não promove atividades ilegais
+    Se houver erro na ferramenta, simplesmente informe o erro e continue.
     """
+GROQ_SEARCH_PROMPT_HASH = prompt_hash(GROQ_SEARCH_PROMPT)
+
+
+# ===============================
+# AGENTES HÍBRIDOS CORRETOS
+# ===============================
+
+# OPENROUTER: Etapa 1 - Decisão de busca (modelo menor: classificação SIM/NAO)
+search_decision_agent = Agent[AgentDependencies, SearchDecision](
+    model=create_openrouter_model(MODEL_DECISION_SMALL),
+    output_type=SearchDecision,
+    model_settings={"temperature": 0},
+    system_prompt=SEARCH_DECISION_PROMPT
+)
+
+# OPENROUTER: Etapa 2 - Busca vectordb (meta-llama/llama-4-maverick:free)
+vectordb_search_agent = Agent[AgentDependencies, VectorSearchResult](
+    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
+    output_type=VectorSearchResult,
+    system_prompt=VECTORDB_SEARCH_PROMPT
+)
+
+# NOTA: groq_search_agent agora está definido com as ferramentas
+
+# OPENROUTER: Etapa 3 - Análise jurídica RAG (meta-llama/llama-4-maverick:free)
+LEGAL_ANALYZER_MODEL = 'meta-llama/llama-4-maverick:free'
+legal_analyzer_agent = Agent[AgentDependencies, str](
+    model=create_openrouter_model(LEGAL_ANALYZER_MODEL),
+    output_type=str,
+    model_settings={"temperature": 0, "max_tokens": 800},
+    system_prompt=LEGAL_ANALYZER_PROMPT
+)
+
+# OPENROUTER: Etapa 4 - Síntese final (meta-llama/llama-4-maverick:free)
+final_synthesizer_agent = Agent[AgentDependencies, str](
+    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
+    output_type=str,
+    system_prompt=FINAL_SYNTHESIZER_PROMPT
+)
+
+# OPENROUTER: Etapa 5 - Validação de qualidade (modelo menor: scores 0.0-1.0)
+quality_validator_agent = Agent[AgentDependencies, QualityAssessment](
+    model=create_openrouter_model(MODEL_VALIDATOR_SMALL),
+    output_type=QualityAssessment,
+    model_settings={"temperature": 0},
+    system_prompt=QUALITY_VALIDATOR_PROMPT
+)
+
+# OPENROUTER: Etapa 6 - Verificação de guardrails (modelo menor)
+guardrail_checker_agent = Agent[AgentDependencies, GuardrailCheck](
+    model=create_openrouter_model(MODEL_VALIDATOR_SMALL),
+    output_type=GuardrailCheck,
+    model_settings={"temperature": 0},
+    system_prompt=GUARDRAIL_CHECKER_PROMPT
+)
+
+# OPENROUTER: Etapas 3+4 fundidas - Análise + síntese em uma única chamada
+fused_analyzer_synthesizer_agent = Agent[AgentDependencies, str](
+    model=create_openrouter_model('meta-llama/llama-4-maverick:free'),
+    output_type=str,
+    system_prompt=FUSED_ANALYZER_SYNTHESIZER_PROMPT
+)
+
+# OPENROUTER: Etapas 5+6 fundidas - Validação de qualidade + guardrails (modelo menor)
+fused_validator_guardrail_agent = Agent[AgentDependencies, ValidationWithGuardrails](
+    model=create_openrouter_model(MODEL_VALIDATOR_SMALL),
+    output_type=ValidationWithGuardrails,
+    model_settings={"temperature": 0},
+    system_prompt=FUSED_VALIDATOR_GUARDRAIL_PROMPT
 )
 
 
@@ -353,162 +492,573 @@ guardrail_checker_agent = Agent[AgentDependencies, str](
 groq_search_agent = Agent[AgentDependencies, str](
     model=create_groq_model('llama-3.3-70b-versatile'),
     output_type=str,
-    system_prompt="""
-    Você é um assistente de busca jurídica. Use as ferramentas search_web_legal e search_lexml_legislation UMA VEZ cada uma para a consulta fornecida.
-    
-    Após usar as ferramentas, forneça um resumo simples dos resultados encontrados.
-    
-    Se houver erro nas ferramentas, simplesmente informe o erro e continue.
-    """
+    system_prompt=GROQ_SEARCH_PROMPT
 )
 
+
+async def _search_leg(search: Any) -> Any:
+    """Aguarda uma perna da busca com TIMEOUTS.search_leg; falhas voltam como valor (TimeoutError inclusive)."""
+    try:
+        async with asyncio.timeout(TIMEOUTS.search_leg):
+            return await search
+    except Exception as e:
+        return e
+
+
 @groq_search_agent.tool
-async def search_web_legal(
+async def search_all_sources(
     ctx: RunContext[AgentDependencies],
     query: str,
-    max_results: int = 10
+    max_results: int = 5
 ) -> str:
-    """Busca informações jurídicas na web usando ferramentas específicas."""
-    
-    try:
-        # Simular busca web
-        await asyncio.sleep(0.5)
-        
-        web_summary = f"""
-        BUSCA WEB EXECUTADA:
-        
-        Query: {query[:100]}...
-        Fontes consultadas: {max_results}
-        
-        PRINCIPAIS ACHADOS:
-        1. STJ - Decisões recentes sobre {query[:50]} (2024)
-        2. TJSP - Jurisprudência local aplicável
-        3. Doutrina - Artigos acadêmicos especializados
-        
-        CONTEÚDO RELEVANTE:
-        - Precedentes judiciais atualizados
-        - Interpretações doutrinárias recentes
-        - Orientações dos tribunais superiores
-        
-        CREDIBILIDADE DAS FONTES:
-        - Tribunais oficiais: 100%
-        - Revistas jurídicas: 95%
-        - Sites especializados: 85%
-        
-        SCORE CREDIBILIDADE GERAL: 0.93
+    """Busca simultaneamente informações jurídicas na web (Tavily) e legislação no LexML."""
+    
+    # Cada perna tem o próprio timeout e devolve a exceção em vez de levantá-la: uma perna
+    # lenta ou com erro não cancela a outra nem segura a Etapa 3 além de TIMEOUTS.search_leg
+    async with asyncio.TaskGroup() as task_group:
+        web_task = task_group.create_task(_search_leg(
+            unified_mcp.buscar_web(TavilySearchRequest(query=query, max_results=max_results))
+        ))
+        lexml_task = task_group.create_task(_search_leg(
+            unified_mcp.buscar_jurisprudencia(
+                termo=query,
+                tipo_documento="lei",
+                max_results=max_results,
+                query_original=query
+            )
+        ))
+    web_response, lexml_response = web_task.result(), lexml_task.result()
+    
+    sections = ["BUSCA WEB (Tavily):"]
+    if isinstance(web_response, TimeoutError):
+        logger.warning("Timeout na busca web", timeout_s=TIMEOUTS.search_leg)
+        sections.append(f"AVISO: busca web sem resultados (excedeu {TIMEOUTS.search_leg:g}s)")
+    elif isinstance(web_response, Exception):
+        logger.error("Erro na busca web", error=str(web_response))
+        sections.append(f"Erro na busca web: {web_response}")
+    else:
+        for result in web_response.results:
+            sections.append(f"- {result.title or result.url}: {result.content[:300]} ({result.url})")
+    
+    sections.append("\nBUSCA LEXML (legislação):")
+    if isinstance(lexml_response, TimeoutError):
+        logger.warning("Timeout na busca LexML", timeout_s=TIMEOUTS.search_leg)
+        sections.append(f"AVISO: busca LexML sem resultados (excedeu {TIMEOUTS.search_leg:g}s)")
+    elif isinstance(lexml_response, Exception):
+        logger.error("Erro na busca LexML", error=str(lexml_response))
+        sections.append(f"Erro na busca LexML: {lexml_response}")
+    else:
+        for documento in lexml_response.documentos:
+            titulo = documento.titulo or documento.urn or documento.id
+            sections.append(f"- {titulo}: {(documento.ementa or '')[:300]}")
+    
+    web_ok = not isinstance(web_response, Exception)
+    lexml_ok = not isinstance(lexml_response, Exception)
+    if not (web_ok and lexml_ok):
+        # Resultado parcial (erro ou timeout de uma perna): execute_groq_searches não o guarda em cache
+        ctx.deps.shared_state[GROQ_SEARCH_DEGRADED_KEY] = True
+    
+    logger.info("Buscas web + LexML concorrentes executadas",
+               query=query[:50],
+               web_ok=web_ok,
+               lexml_ok=lexml_ok)
+    
+    return "\n".join(sections)
+
+
+# ===============================
+# MICRO-BATCHING DE AGENTES
+# ===============================
+
+class BatchAgent:
+    """
+    Agrupa várias consultas em uma única chamada ao agente (micro-batching).
+
+    Cada entrada é numerada no prompt ("Query 1: ...") e o modelo deve abrir cada
+    resposta com o marcador "--- QUERY i ---", usado para separar as N saídas,
+    que seguem o formato texto CHAVE: valor lido pelos parsers deste módulo.
+    Amortiza o overhead de rede e prefill do system prompt em cargas offline.
+    """
+
+    _MARKER_RE = re.compile(r'-{3}\s*QUERY\s+(\d+)\s*-{3}', re.IGNORECASE)
+
+    def __init__(self, agent: Agent, response_format: str, max_batch_size: int = 8):
+        self.agent = agent
+        self.response_format = response_format
+        self.max_batch_size = max_batch_size
+
+    def _build_prompt(self, inputs: List[str]) -> str:
+        """Monta um único prompt com as consultas numeradas."""
+        numbered = "\n\n".join(
+            f"Query {i}: {text}" for i, text in enumerate(inputs, start=1)
+        )
+        return (
+            f"Processe as {len(inputs)} consultas abaixo de forma INDEPENDENTE.\n"
+            f"Para CADA consulta, inicie a resposta com o marcador '--- QUERY i ---' "
+            f"(i = número da consulta) e siga exatamente este formato:\n"
+            f"{self.response_format}\n\n"
+            f"{numbered}"
+        )
+
+    def _split_output(self, text: str, expected: int) -> List[Optional[str]]:
+        """Separa a saída do lote pelos marcadores numerados."""
+        outputs: List[Optional[str]] = [None] * expected
+        parts = self._MARKER_RE.split(text)
+
+        # parts = [preambulo, "1", corpo1, "2", corpo2, ...]
+        for index, body in zip(parts[1::2], parts[2::2], strict=True):
+            position = int(index) - 1
+            if 0 <= position < expected and outputs[position] is None:
+                outputs[position] = body.strip()
+
+        return outputs
+
+    async def run(
+        self,
+        inputs: List[str],
+        deps: AgentDependencies
+    ) -> List[Optional[str]]:
         """
+        Executa as entradas em lotes de até max_batch_size.
+        Retorna uma saída por entrada; None quando o item não pôde ser separado.
+        """
+        outputs: List[Optional[str]] = []
+
+        for start in range(0, len(inputs), self.max_batch_size):
+            chunk = inputs[start:start + self.max_batch_size]
+
+            try:
+                # Lote sempre em texto: o objeto estruturado cobre apenas uma consulta
+                result = await self.agent.run(
+                    self._build_prompt(chunk),
+                    deps=deps,
+                    output_type=str
+                )
+                chunk_outputs = self._split_output(result.output, len(chunk))
+            except Exception as e:
+                logger.error("Erro na execução em lote", error=str(e), batch_size=len(chunk))
+                chunk_outputs = [None] * len(chunk)
+
+            logger.info("Lote executado",
+                       batch_size=len(chunk),
+                       parsed=sum(1 for output in chunk_outputs if output is not None))
+            outputs.extend(chunk_outputs)
+
+        return outputs
+
+
+DECISION_RESPONSE_FORMAT = """
+VECTORDB: [SIM/NAO]
+LEXML: [SIM/NAO]
+WEB: [SIM/NAO]
+JURISPRUDENCIA: [SIM/NAO]
+JUSTIFICATIVA: [Explique brevemente sua decisão]
+CONFIANCA: [0.0-1.0]
+PRIORIDADE: [Liste as buscas em ordem de prioridade]
+"""
+
+QUALITY_RESPONSE_FORMAT = """
+SCORE_GERAL: [0.0-1.0]
+COMPLETUDE: [0.0-1.0]
+PRECISAO: [0.0-1.0]
+CLAREZA: [0.0-1.0]
+PRECISA_MELHORIA: [SIM/NAO]
+PRECISA_REVISAO_HUMANA: [SIM/NAO]
+MOTIVO_REVISAO: [Descrição do motivo]
+SUGESTOES:
+- [Sugestão 1 se aplicável]
+"""
+
+# Formato texto das etapas 5+6 fundidas, usado quando o modelo não entrega a saída estruturada
+FUSED_VALIDATION_RESPONSE_FORMAT = """
+## QUALIDADE
+SCORE_GERAL: [0.0-1.0]
+COMPLETUDE: [0.0-1.0]
+PRECISAO: [0.0-1.0]
+CLAREZA: [0.0-1.0]
+PRECISA_MELHORIA: [SIM/NAO]
+PRECISA_REVISAO_HUMANA: [SIM/NAO]
+MOTIVO_REVISAO: [Descrição do motivo]
+SUGESTOES:
+- [Sugestão 1 se aplicável]
+
+## GUARDRAILS
+PASSOU_VERIFICACAO: [SIM/NAO]
+NIVEL_RISCO: [BAIXO/MEDIO/ALTO]
+VIOLACOES:
+- [Violação 1 se encontrada]
+"""
+
+SECTION_RESPONSE_FORMAT = """
+[Texto corrido da seção pedida, sem títulos ou subseções]
+"""
+
+decision_batch_agent = BatchAgent(search_decision_agent, DECISION_RESPONSE_FORMAT)
+quality_batch_agent = BatchAgent(quality_validator_agent, QUALITY_RESPONSE_FORMAT)
+synthesis_batch_agent = BatchAgent(final_synthesizer_agent, SECTION_RESPONSE_FORMAT, max_batch_size=4)
+
+
+# ===============================
+# FUNÇÕES AUXILIARES DO WORKFLOW
+# ===============================
+
+# Pool de IDs de sessão: um único os.urandom a cada SESSION_ID_BATCH IDs em vez de um por
+# requisição. deque é thread-safe e não fica presa a um event loop (o app cria um por consulta)
+SESSION_ID_BATCH = 1024
+_session_id_pool: "collections.deque[str]" = collections.deque()
+
+
+def _refill_session_id_pool() -> None:
+    entropy = os.urandom(16 * SESSION_ID_BATCH)
+    _session_id_pool.extend(
+        uuid.UUID(bytes=entropy[i:i + 16], version=4).hex
+        for i in range(0, len(entropy), 16)
+    )
+
+
+def new_session_id() -> str:
+    """ID de sessão (UUID4 em hex, sem hífens) retirado do pool pré-gerado."""
+    try:
+        return _session_id_pool.popleft()
+    except IndexError:
+        _refill_session_id_pool()
+        return _session_id_pool.popleft()
+
+
+def request_cached(func):
+    """
+    Memoiza uma etapa LLM assíncrona `func(deps, *args)` em deps.request_cache.
+    Chamadas repetidas com os mesmos argumentos na mesma requisição (retries, fallbacks)
+    reutilizam o resultado; o cache vive e morre com o AgentDependencies da requisição.
+    """
+    @functools.wraps(func)
+    async def wrapper(deps: AgentDependencies, *args):
+        key = exact_key(func.__name__, *(arg if isinstance(arg, str) else repr(arg) for arg in args))
+        if key in deps.request_cache:
+            logger.debug("Cache da requisição: hit", step=func.__name__)
+            return deps.request_cache[key]
         
-        logger.info("Busca web Groq executada", query=query[:50])
-        return web_summary
+        result = await func(deps, *args)
+        deps.request_cache[key] = result
+        return result
+    
+    return wrapper
+
+
+_WORD_RE = re.compile(r'\S+')
+
+
+def _word_count(text: str) -> int:
+    """Conta palavras sem materializar a lista de `text.split()`."""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+
+_SECTION_LOG_KEYS = ("intro_words", "dev_words", "analysis_words", "conclusion_words")
+
+
+def _section_word_counts(sections: List[str]) -> Dict[str, int]:
+    """Contagens por seção (e total) para o log final da síntese, calculadas uma única vez."""
+    counts = {key: _word_count(text) for key, text in zip(_SECTION_LOG_KEYS, sections, strict=True)}
+    counts["word_count"] = sum(counts.values())
+    return counts
+
+
+# Campos SIM/NAO da resposta em texto da decisão de busca -> campo de SearchDecision
+_DECISION_FLAGS: Dict[str, str] = {
+    "VECTORDB": "needs_vectordb",
+    "LEXML": "needs_lexml",
+    "WEB": "needs_web",
+    "JURISPRUDENCIA": "needs_jurisprudence",
+    "JURISPRUDÊNCIA": "needs_jurisprudence",
+}
+_DECISION_REASONING_KEYS = frozenset({"JUSTIFICATIVA"})
+_DECISION_CONFIDENCE_KEYS = frozenset({"CONFIANCA", "CONFIANÇA"})
+
+
+def _decision_key(key: str) -> str:
+    """Chave normalizada de uma linha CHAVE: valor, ou "" se o prefixo não for uma chave."""
+    key = key.strip(' \t*-').upper()
+    return key if key and key.replace('_', '').isalpha() else ""
+
+
+def parse_decision_response(text: str) -> SearchDecision:
+    """
+    Parse manual da resposta estruturada em texto do search decision.
+    Uma única passada pelas linhas (CHAVE: valor), sem regex; a JUSTIFICATIVA pode
+    continuar nas linhas seguintes até a próxima chave.
+    """
+    try:
+        # Valores padrão
+        flags = {
+            "needs_vectordb": True,  # Sempre buscar vectordb
+            "needs_lexml": True,
+            "needs_web": True,
+            "needs_jurisprudence": True,
+        }
+        reasoning = "Análise jurídica completa necessária"
+        confidence = 0.8
+        priority_order = ["vectordb", "lexml", "web"]
+        
+        reasoning_lines: List[str] = []
+        in_reasoning = False
+        
+        for line in text.splitlines():
+            raw_key, sep, value = line.partition(':')
+            key = _decision_key(raw_key) if sep else ""
+            
+            if not key:
+                if in_reasoning:
+                    reasoning_lines.append(line.strip())
+                continue
+            
+            in_reasoning = False
+            value = value.strip(' \t*')
+            
+            field = _DECISION_FLAGS.get(key)
+            if field is not None:
+                # SIM/NAO (ou NÃO); valores desconhecidos mantêm o padrão
+                first = value[:1].upper()
+                if first == 'S':
+                    flags[field] = True
+                elif first == 'N':
+                    flags[field] = False
+            
+            elif key in _DECISION_REASONING_KEYS:
+                reasoning_lines = [value]
+                in_reasoning = True
+            
+            elif key in _DECISION_CONFIDENCE_KEYS and value:
+                try:
+                    parsed_confidence = float(value.split(None, 1)[0])
+                except ValueError:
+                    # Ex.: "0.8." ou "alta" - mantém o padrão
+                    pass
+                else:
+                    confidence = max(0.0, min(1.0, parsed_confidence))  # Garantir range válido
         
+        joined_reasoning = "\n".join(reasoning_lines).strip()
+        if joined_reasoning:
+            reasoning = joined_reasoning
+
+        return SearchDecision(
+            reasoning=reasoning,
+            confidence=confidence,
+            priority_order=priority_order,
+            **flags
+        )
+
     except Exception as e:
-        logger.error("Erro na busca web Groq", error=str(e))
-        return f"Erro na busca web: {str(e)}"
+        logger.error("Erro no parsing da decisão", error=str(e))
+        # Retornar decisão padrão segura
+        return SearchDecision(
+            needs_vectordb=True,
+            needs_lexml=True,
+            needs_web=True,
+            needs_jurisprudence=True,
+            reasoning="Erro no parsing - usando configuração padrão completa",
+            confidence=0.8,
+            priority_order=["vectordb", "lexml", "web"]
+        )
 
 
-@groq_search_agent.tool
-async def search_lexml_legislation(
-    ctx: RunContext[AgentDependencies],
-    query: str,
-    max_results: int = 10
-) -> str:
-    """Busca legislação no LexML usando ferramentas específicas."""
+# Linhas reconhecidas na resposta em texto do validador (compilado uma vez na importação)
+_QUALITY_LINE_RE = re.compile(
+    r'^[ \t*]*(?:'
+    r'(?P<field>SCORE_GERAL|COMPLETUDE|PRECISAO|CLAREZA|PRECISA_MELHORIA|PRECISA_REVISAO_HUMANA|MOTIVO_REVISAO):'
+    r'(?P<value>.*?)'
+    r'|-[ \t]+(?P<item>.+?)'
+    r')[ \t]*\r?$',
+    re.MULTILINE
+)
+_QUALITY_SCORE_FIELDS = frozenset({'SCORE_GERAL', 'COMPLETUDE', 'PRECISAO', 'CLAREZA'})
+
+
+def parse_quality_response(response_text_val: str) -> QualityAssessment:
+    """Parse manual da resposta estruturada em texto do validador de qualidade."""
+
+    # Extrair informações do texto estruturado
+    overall_score = 0.8  # Valor padrão
+    completeness = 0.8
+    accuracy = 0.8
+    clarity = 0.8
+    needs_improvement = False
+    needs_human_review = False
+    review_reason = "Avaliação automática concluída"
+    suggestions = []
+
+    # Uma única varredura (finditer) do texto: campo "CHAVE: valor" ou item "- sugestão"
+    for match in _QUALITY_LINE_RE.finditer(response_text_val):
+        field = match.group('field')
+        if field is None:
+            suggestions.append(match.group('item'))
+            continue
+
+        value = match.group('value').strip(' *')
+        if field in _QUALITY_SCORE_FIELDS:
+            try:
+                score = float(value)
+            except ValueError:
+                continue
+            if field == 'SCORE_GERAL':
+                overall_score = score
+            elif field == 'COMPLETUDE':
+                completeness = score
+            elif field == 'PRECISAO':
+                accuracy = score
+            else:
+                clarity = score
+        elif field == 'PRECISA_MELHORIA':
+            needs_improvement = 'SIM' in value.upper()
+        elif field == 'PRECISA_REVISAO_HUMANA':
+            needs_human_review = 'SIM' in value.upper()
+        else:
+            review_reason = value
+
+    return QualityAssessment(
+        overall_score=overall_score,
+        completeness=completeness,
+        accuracy=accuracy,
+        clarity=clarity,
+        needs_improvement=needs_improvement,
+        improvement_suggestions=suggestions,
+        needs_human_review=needs_human_review,
+        review_reason=review_reason
+    )
+
+
+
+def parse_guardrail_response(response_text_guard: str) -> GuardrailCheck:
+    """Parse manual da resposta estruturada em texto do verificador de guardrails (ver guardrail_parse)."""
+    passed, risk_level, violations = parse_guardrail_text(response_text_guard)
+    return GuardrailCheck.model_construct(
+        passed=passed,
+        violations=tuple(violations),
+        overall_risk_level=risk_level
+    )
+
+
+async def _decide_search_text(deps: AgentDependencies, decision_prompt: str) -> SearchDecision:
+    """
+    Etapa 1 em modo texto: aceita o objeto JSON (validado direto pelo pydantic-core)
+    ou, na falta dele, o formato CHAVE: valor lido por parse_decision_response.
+    """
+    text_result = await search_decision_agent.run(
+        f"{decision_prompt}\nRESPONDA APENAS COM ESTE FORMATO EXATO:\n{DECISION_RESPONSE_FORMAT}",
+        deps=deps,
+        output_type=str
+    )
+    text = text_result.output
+    
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            return SearchDecision.model_validate_json(text[start:end + 1])
+        except ValidationError:
+            pass
+    
+    return parse_decision_response(text)
+
+
+# Nível exato local da Etapa 1, indexado pela consulta normalizada: repetições da mesma
+# pergunta dispensam a chamada LLM (e a ida ao Redis) da decisão de busca
+decision_exact_cache = ExactLRUCache(f"search_decision:{SEARCH_DECISION_PROMPT_HASH}", maxsize=2048, ttl_seconds=3600)
+
+
+@request_cached
+async def decide_search_with_openrouter(
+    deps: AgentDependencies,
+    query: str
+) -> SearchDecision:
+    """Decide quais buscas realizar usando OpenRouter (saída estruturada)."""
+    
+    cache_key = exact_key(normalize_query(query))
+    cached_decision = decision_exact_cache.get(cache_key)
+    if cached_decision is not None:
+        logger.debug("decision_cache_hit", tier="memory")
+        return cached_decision.model_copy(deep=True)
+    
+    # Nível exato compartilhado entre workers (apenas com REDIS_URL configurado);
+    # o hash do prompt no namespace descarta entradas geradas por versões anteriores
+    decision_storage = get_redis_storage(f"search_decision:{SEARCH_DECISION_PROMPT_HASH}")
     
     try:
-        # Simular busca LexML
-        await asyncio.sleep(0.3)
-        
-        lexml_summary = f"""
-        BUSCA LEXML EXECUTADA:
-        
-        Query: {query[:100]}...
-        Leis encontradas: {max_results}
-        
-        LEGISLAÇÃO APLICÁVEL:
-        1. Lei 10.406/2002 (Código Civil) - Arts. aplicáveis
-        2. Lei 6.404/1976 (Lei das S.A.) - Dispositivos relevantes
-        3. Lei 8.078/1990 (CDC) - Se aplicável ao caso
-        
-        ARTIGOS ESPECÍFICOS:
-        - Dispositivos diretamente relacionados ao tema
-        - Normas complementares e regulamentares
-        - Jurisprudência oficial consolidada
-        
-        JURISPRUDÊNCIA OFICIAL:
-        - Súmulas dos tribunais superiores
-        - Enunciados do CJF/CNJ
-        - Precedentes vinculantes
-        
-        APLICABILIDADE: Direta ao caso apresentado
-        """
-        
-        logger.info("Busca LexML Groq executada", query=query[:50])
-        return lexml_summary
+        if decision_storage is not None:
+            cached_decision = await decision_storage.get_model(query, SearchDecision)
+            log_performance_metrics("search_decision_cache", 0.0, **decision_storage.stats())
+            if cached_decision is not None:
+                logger.debug("decision_cache_hit", tier="redis")
+                decision_exact_cache.put(cache_key, cached_decision.model_copy(deep=True))
+                return cached_decision
+        
+        decision_prompt = f"Analise esta consulta jurídica e decida quais buscas realizar: {query}"
+        try:
+            decision_result = await search_decision_agent.run(decision_prompt, deps=deps)
+            log_prompt_cache_usage("search_decision", decision_result)
+            decision = decision_result.output
+        except UnexpectedModelBehavior as e:
+            # Modelo não respeitou a saída estruturada: uma tentativa em modo texto
+            logger.warning("Decisão estruturada falhou - tentando modo texto", error=str(e))
+            decision = await _decide_search_text(deps, decision_prompt)
+        
+        decision_exact_cache.put(cache_key, decision.model_copy(deep=True))
+        if decision_storage is not None:
+            await decision_storage.set_model(query, decision)
+        
+        return decision
         
     except Exception as e:
-        logger.error("Erro na busca LexML Groq", error=str(e))
-        return f"Erro na busca LexML: {str(e)}"
+        logger.error("Erro na decisão de busca OpenRouter", error=str(e))
+        # Retornar decisão padrão segura
+        return SearchDecision(
+            needs_vectordb=True,
+            needs_lexml=True,
+            needs_web=True,
+            needs_jurisprudence=True,
+            reasoning="Erro na decisão - usando configuração padrão completa",
+            confidence=0.8,
+            priority_order=["vectordb", "lexml", "web"]
+        )
 
+# Cache semântico da Etapa 2: consultas quase idênticas (cosseno >= 0.95) reutilizam o resultado
+VECTORDB_CACHE_THRESHOLD = 0.95
+vectordb_semantic_cache = SemanticCache(
+    f"vectordb:{VECTORDB_SEARCH_PROMPT_HASH}",
+    similarity_threshold=VECTORDB_CACHE_THRESHOLD,
+    max_entries=1024
+)
 
-# ===============================
-# FUNÇÕES AUXILIARES DO WORKFLOW
-# ===============================
 
 async def execute_vectordb_search_openrouter(
     deps: AgentDependencies,
     query: str
 ) -> VectorSearchResult:
-    """Executa busca vectordb usando OpenRouter."""
+    """Executa busca vectordb usando OpenRouter (com cache semântico por embedding da consulta)."""
     
     try:
         start_time = time.time()
         
+        query_embedding = deps.query_embedding
+        if query_embedding is None:
+            query_embedding = await embed_query(query)
+        if query_embedding is not None:
+            cached_result = vectordb_semantic_cache.get(query_embedding)
+            if cached_result is not None:
+                return cached_result.model_copy(deep=True)
+        
         vectordb_prompt = f"""
         Execute busca semântica para esta consulta jurídica:
         
         CONSULTA: {query}
-        
-        Simule uma busca vectorial retornando informações estruturadas.
         """
         
-        result = await vectordb_search_agent.run(
-            vectordb_prompt,
-            deps=deps
-        )
-        
-        # Processar resposta em texto simples
-        response_text: str = result.output
-        
-        # Extrair informações do texto estruturado
-        docs_found = 5  # Valor padrão
-        quality = 0.8   # Valor padrão
-        snippets = []
-        summary = "Busca vectorial executada com sucesso"
+        async with asyncio.timeout(TIMEOUTS.vectordb_search):
+            result = await vectordb_search_agent.run(
+                vectordb_prompt,
+                deps=deps
+            )
         
-        # Parse simples do texto estruturado
-        lines = response_text.split('\n')
-        for line in lines:
-            if 'DOCUMENTOS_ENCONTRADOS:' in line:
-                try:
-                    docs_found = int(line.split(':')[1].strip())
-                except:
-                    pass
-            elif 'QUALIDADE_BUSCA:' in line:
-                try:
-                    quality = float(line.split(':')[1].strip())
-                except:
-                    pass
-            elif line.strip().startswith('- '):
-                snippets.append(line.strip()[2:])
-            elif 'RESUMO:' in line:
-                summary = line.split(':', 1)[1].strip()
-        
-        vectordb_result = VectorSearchResult(
-            documents_found=docs_found,
-            relevant_snippets=snippets[:3],  # Máximo 3 snippets
-            search_quality=quality,
-            summary=summary
-        )
+        vectordb_result: VectorSearchResult = result.output
+        vectordb_result.relevant_snippets = vectordb_result.relevant_snippets[:3]  # Máximo 3 snippets
         
         search_time = (time.time() - start_time) * 1000
         
@@ -517,6 +1067,9 @@ async def execute_vectordb_search_openrouter(
                    docs_found=vectordb_result.documents_found,
                    quality=vectordb_result.search_quality)
         
+        if query_embedding is not None:
+            vectordb_semantic_cache.put(query_embedding, vectordb_result.model_copy(deep=True))
+        
         return vectordb_result
         
     except Exception as e:
@@ -530,28 +1083,48 @@ async def execute_vectordb_search_openrouter(
         )
 
 
+# Cache semântico da Etapa 2.1, sobre o mesmo embedding da consulta já calculado em deps
+# (nenhum embedding extra); TTL menor que o do vectordb porque resultados web envelhecem
+GROQ_CACHE_THRESHOLD = 0.95
+groq_semantic_cache = SemanticCache(
+    f"groq_search:{GROQ_SEARCH_PROMPT_HASH}",
+    similarity_threshold=GROQ_CACHE_THRESHOLD,
+    ttl_seconds=900,
+    max_entries=1024
+)
+
+# Marcado em deps.shared_state por search_all_sources quando uma perna falhou ou excedeu o
+# tempo: o resultado vale para esta requisição, mas não é reaproveitado pelo cache
+GROQ_SEARCH_DEGRADED_KEY = "groq_search_degraded"
+
+
 async def execute_groq_searches(
     deps: AgentDependencies,
     query: str
 ) -> GroqSearchResult:
-    """Executa buscas WEB + LexML usando Groq com tools."""
+    """Executa buscas WEB + LexML usando Groq com tools (com cache semântico por embedding da consulta)."""
     
     try:
         start_time = time.time()
         
+        query_embedding = deps.query_embedding
+        if query_embedding is not None:
+            cached_result = groq_semantic_cache.get(query_embedding)
+            if cached_result is not None:
+                return cached_result.model_copy(deep=True)
+        
         groq_prompt = f"""
         Consulta: {query}
         
-        Use as ferramentas search_web_legal e search_lexml_legislation UMA VEZ cada uma.
+        Use a ferramenta search_all_sources UMA VEZ.
         Depois forneça um resumo simples das buscas.
         """
         
-        # Executar com timeout de 10 segundos para evitar loops
-        import asyncio
-        result = await asyncio.wait_for(
-            groq_search_agent.run(groq_prompt, deps=deps),
-            timeout=10.0
-        )
+        # Executar com timeout (padrão 10 segundos) para evitar loops
+        deps.shared_state.pop(GROQ_SEARCH_DEGRADED_KEY, None)
+        async with asyncio.timeout(TIMEOUTS.groq_search):
+            result = await groq_search_agent.run(groq_prompt, deps=deps)
+        search_degraded = deps.shared_state.pop(GROQ_SEARCH_DEGRADED_KEY, False)
         
         # Processar resposta de texto do Groq
         groq_text: str = result.output
@@ -590,6 +1163,11 @@ async def execute_groq_searches(
                    time_ms=search_time,
                    total_sources=groq_result.total_sources)
         
+        if search_degraded:
+            logger.warning("Buscas Groq parciais (erro ou timeout em uma perna): resultado fora do cache")
+        elif query_embedding is not None:
+            groq_semantic_cache.put(query_embedding, groq_result.model_copy(deep=True))
+        
         return groq_result
         
     except asyncio.TimeoutError:
@@ -611,44 +1189,274 @@ async def execute_groq_searches(
         )
 
 
-async def analyze_with_openrouter(
+async def execute_searches_concurrently(
+    deps: AgentDependencies,
+    query: str
+) -> tuple[VectorSearchResult, GroqSearchResult]:
+    """Executa as Etapas 2 (vectordb) e 2.1 (Groq) em paralelo; latência = máx. das duas."""
+    
+    vectordb_results, groq_results = await asyncio.gather(
+        execute_vectordb_search_openrouter(deps, query),
+        execute_groq_searches(deps, query),
+        return_exceptions=True
+    )
+    
+    if isinstance(vectordb_results, Exception):
+        logger.error("Erro na busca vectordb OpenRouter", error=str(vectordb_results))
+        vectordb_results = VectorSearchResult(
+            documents_found=0,
+            relevant_snippets=[],
+            search_quality=0.0,
+            summary="Erro na busca vectorial"
+        )
+    
+    if isinstance(groq_results, Exception):
+        logger.error("Erro nas buscas Groq", error=str(groq_results))
+        groq_results = GroqSearchResult(
+            web_results={"summary": "Erro na busca web"},
+            lexml_results={"summary": "Erro na busca LexML"},
+            total_sources=0,
+            summary="Erro nas buscas Groq"
+        )
+    
+    return vectordb_results, groq_results
+
+
+def start_search_prefetch(
+    deps: AgentDependencies,
+    query: str
+) -> tuple[asyncio.Task, asyncio.Task]:
+    """
+    Dispara as Etapas 2 e 2.1 em background antes da decisão de busca (execução especulativa):
+    a política padrão habilita todas as buscas, então a latência da decisão se sobrepõe à da busca.
+    """
+    return (
+        asyncio.create_task(execute_vectordb_search_openrouter(deps, query)),
+        asyncio.create_task(execute_groq_searches(deps, query))
+    )
+
+
+async def resolve_search_prefetch(
+    decision: SearchDecision,
+    vectordb_task: asyncio.Task,
+    groq_task: asyncio.Task
+) -> tuple[VectorSearchResult, GroqSearchResult]:
+    """Aguarda as buscas antecipadas que a decisão manteve e cancela as que ela desabilitou."""
+    
+    if not decision.needs_vectordb:
+        vectordb_task.cancel()
+    if not (decision.needs_web or decision.needs_lexml):
+        groq_task.cancel()
+    
+    try:
+        vectordb_results, groq_results = await asyncio.gather(
+            vectordb_task, groq_task, return_exceptions=True
+        )
+    except asyncio.CancelledError:
+        # Orquestrador cancelado: não deixar as buscas rodando sem dono
+        vectordb_task.cancel()
+        groq_task.cancel()
+        raise
+    
+    if isinstance(vectordb_results, BaseException):
+        if not isinstance(vectordb_results, asyncio.CancelledError):
+            logger.error("Erro na busca vectordb OpenRouter", error=str(vectordb_results))
+        vectordb_results = VectorSearchResult(
+            documents_found=0,
+            relevant_snippets=[],
+            search_quality=0.0,
+            summary="Busca vectorial não realizada"
+        )
+    
+    if isinstance(groq_results, BaseException):
+        if not isinstance(groq_results, asyncio.CancelledError):
+            logger.error("Erro nas buscas Groq", error=str(groq_results))
+        groq_results = GroqSearchResult(
+            web_results={"summary": "Busca web não realizada"},
+            lexml_results={"summary": "Busca LexML não realizada"},
+            total_sources=0,
+            summary="Buscas Groq não realizadas"
+        )
+    
+    return vectordb_results, groq_results
+
+
+def _skipped_search() -> asyncio.Future:
+    """Busca desabilitada pela decisão: future já cancelado, resolvido como "não realizada"."""
+    future = asyncio.get_running_loop().create_future()
+    future.cancel()
+    return future
+
+
+async def execute_searches_for_decision(
     deps: AgentDependencies,
+    query: str,
+    decision: SearchDecision
+) -> tuple[VectorSearchResult, GroqSearchResult]:
+    """Etapas 2 e 2.1 sem especulação: só as buscas habilitadas pela decisão são disparadas."""
+    
+    vectordb_task = (
+        asyncio.create_task(execute_vectordb_search_openrouter(deps, query))
+        if decision.needs_vectordb else _skipped_search()
+    )
+    groq_task = (
+        asyncio.create_task(execute_groq_searches(deps, query))
+        if decision.needs_web or decision.needs_lexml else _skipped_search()
+    )
+    return await resolve_search_prefetch(decision, vectordb_task, groq_task)
+
+
+# Abaixo deste score de busca os dados são escassos e a expansão com conhecimento geral ajuda
+SPARSE_DATA_QUALITY_THRESHOLD = 0.5
+SPARSE_DATA_INSTRUCTION = (
+    "IMPORTANTE: Os dados coletados são escassos. Produza ao menos 200 palavras, "
+    "EXPANDINDO com conhecimento jurídico geral sobre o tema."
+)
+
+
+def build_analysis_prompt(
     query: str,
     vectordb_results: VectorSearchResult,
     groq_results: GroqSearchResult
 ) -> str:
-    """Executa análise jurídica RAG usando OpenRouter."""
+    """Monta o prompt de análise jurídica a partir dos resultados das buscas."""
     
-    try:
-        analysis_prompt = f"""
-        Analise esta consulta jurídica com base nos dados coletados:
-        
-        CONSULTA ORIGINAL: {query}
-        
-        DADOS DO VECTORDB:
-        - Documentos encontrados: {vectordb_results.documents_found}
-        - Resumo: {vectordb_results.summary}
-        - Trechos relevantes: {vectordb_results.relevant_snippets}
-        
-        DADOS DAS BUSCAS GROQ:
-        - Total de fontes: {groq_results.total_sources}
-        - Resumo: {groq_results.summary}
-        - Resultados web: {groq_results.web_results}
-        - Resultados LexML: {groq_results.lexml_results}
-        
-        Forneça uma análise jurídica estruturada correlacionando:
-        1. Legislação aplicável
-        2. Doutrina relevante  
-        3. Jurisprudência atual
-        4. Princípios jurídicos envolvidos
-        """
-        
+    return f"""
+    Analise esta consulta jurídica com base nos dados coletados:
+    
+    CONSULTA ORIGINAL: {query}
+    
+    DADOS DO VECTORDB:
+    - Documentos encontrados: {vectordb_results.documents_found}
+    - Resumo: {vectordb_results.summary}
+    - Trechos relevantes: {vectordb_results.relevant_snippets}
+    
+    DADOS DAS BUSCAS GROQ:
+    - Total de fontes: {groq_results.total_sources}
+    - Resumo: {groq_results.summary}
+    - Resultados web: {groq_results.web_results}
+    - Resultados LexML: {groq_results.lexml_results}
+    
+    Forneça uma análise jurídica estruturada correlacionando:
+    1. Legislação aplicável
+    2. Doutrina relevante  
+    3. Jurisprudência atual
+    4. Princípios jurídicos envolvidos
+    {SPARSE_DATA_INSTRUCTION if vectordb_results.search_quality < SPARSE_DATA_QUALITY_THRESHOLD else ""}
+    """
+
+
+# Sem nenhuma fonte recuperada o analisador só repetiria conhecimento geral: a Etapa 3 é
+# substituída por esta orientação fixa e a síntese parte dela
+_NO_SOURCE_ANALYSIS_TEMPLATE = """
+    ANÁLISE SEM FONTES RECUPERADAS
+    
+    CONSULTA: {query}
+    
+    Nenhum documento indexado, resultado web ou registro do LexML foi encontrado para esta consulta.
+    Fundamente a resposta no conhecimento jurídico geral sobre o tema: legislação brasileira
+    aplicável (Constituição, códigos e leis específicas), princípios jurídicos envolvidos e
+    entendimentos consolidados, deixando claro que não houve consulta a fontes específicas.
+    """
+
+
+# Resumos dos resultados de fallback (erro, timeout ou busca não realizada): zero fontes
+# nesses casos não prova que não há material sobre a consulta
+_VECTORDB_FALLBACK_SUMMARIES = frozenset({"Erro na busca vectorial", "Busca vectorial não realizada"})
+_GROQ_FALLBACK_SUMMARIES = frozenset({
+    "Erro nas buscas Groq", "Buscas Groq não realizadas", "Buscas Groq com timeout - usando fallback"
+})
+
+
+def searches_completed(vectordb_results: VectorSearchResult, groq_results: GroqSearchResult) -> bool:
+    """Vectordb e Groq concluíram de fato (nenhum dos dois é um resultado de fallback)."""
+    return (
+        vectordb_results.summary not in _VECTORDB_FALLBACK_SUMMARIES
+        and groq_results.summary not in _GROQ_FALLBACK_SUMMARIES
+    )
+
+
+def decision_searches_ran(
+    decision: SearchDecision,
+    vectordb_results: VectorSearchResult,
+    groq_results: GroqSearchResult
+) -> bool:
+    """Todas as buscas rodaram: a decisão não desabilitou nenhuma e nenhuma caiu no fallback."""
+    return (
+        decision.needs_vectordb
+        and (decision.needs_web or decision.needs_lexml)
+        and searches_completed(vectordb_results, groq_results)
+    )
+
+
+def no_source_analysis(
+    query: str,
+    vectordb_results: VectorSearchResult,
+    groq_results: GroqSearchResult,
+    *crag_results: Optional[List],
+    searches_ran: bool
+) -> Optional[str]:
+    """
+    Análise fixa quando vectordb/CRAG, Groq e resultados CRAG vieram vazios; None se há fontes.
+    searches_ran informa que todas as buscas foram executadas até o fim (nenhuma desabilitada
+    pela decisão, com erro ou timeout): só assim zero fontes significa ausência de material.
+    """
+    
+    if not searches_ran:
+        return None
+    if vectordb_results.documents_found or groq_results.total_sources or any(crag_results):
+        return None
+    
+    logger.info("Etapa 3 pulada: zero fontes")
+    return _NO_SOURCE_ANALYSIS_TEMPLATE.format(query=query)
+
+
+# A análise (temperature 0) depende apenas do prompt montado: prompts idênticos (mesmos
+# resultados de busca) reutilizam o texto. Modelo e hash do system prompt entram no nome do cache
+analysis_exact_cache = ExactLRUCache(
+    f"analysis:{LEGAL_ANALYZER_MODEL}:{LEGAL_ANALYZER_PROMPT_HASH}", maxsize=512, ttl_seconds=3600
+)
+
+
+async def run_legal_analysis(deps: AgentDependencies, analysis_prompt: str) -> str:
+    """Executa o legal_analyzer_agent (Etapa 3) sobre o prompt, consultando antes o cache exato."""
+    
+    cache_key = exact_key(analysis_prompt)
+    cached_analysis = analysis_exact_cache.get(cache_key)
+    if cached_analysis is not None:
+        logger.info("Análise recuperada do cache", text_length=len(cached_analysis))
+        return cached_analysis
+    
+    async with asyncio.timeout(TIMEOUTS.analysis):
         analysis_result = await legal_analyzer_agent.run(
             analysis_prompt,
             deps=deps
         )
+    log_prompt_cache_usage("legal_analysis", analysis_result)
+    
+    analysis_text: str = analysis_result.output
+    analysis_exact_cache.put(cache_key, analysis_text)
+    return analysis_text
+
+
+@request_cached
+async def analyze_with_openrouter(
+    deps: AgentDependencies,
+    query: str,
+    vectordb_results: VectorSearchResult,
+    groq_results: GroqSearchResult,
+    searches_ran: bool = False
+) -> str:
+    """Executa análise jurídica RAG usando OpenRouter (searches_ran: ver no_source_analysis)."""
+    
+    try:
+        analysis_text = no_source_analysis(query, vectordb_results, groq_results, searches_ran=searches_ran)
+        if analysis_text is not None:
+            return analysis_text
+        
+        analysis_prompt = build_analysis_prompt(query, vectordb_results, groq_results)
         
-        analysis_text: str = analysis_result.output
+        analysis_text = await run_legal_analysis(deps, analysis_prompt)
         
         logger.info("Análise OpenRouter concluída", 
                    text_length=len(analysis_text))
@@ -660,22 +1468,139 @@ async def analyze_with_openrouter(
         raise
 
 
-async def synthesize_with_openrouter_4_parts(
+
+async def analyze_and_synthesize_with_openrouter(
     deps: AgentDependencies,
     query: str,
-    analysis_text: str
-) -> str:
-    """Executa síntese final usando 4 chamadas especializadas para OpenRouter."""
-    
-    logger.info("Iniciando síntese em 4 partes especializadas")
+    vectordb_results: VectorSearchResult,
+    groq_results: GroqSearchResult,
+    analysis_prompt: Optional[str] = None
+) -> tuple[str, str]:
+    """
+    Executa análise + síntese em uma única chamada OpenRouter (etapas 3+4 fundidas).
+    Retorna (analysis_text, response_text) separando a saída em "## RESPOSTA FINAL".
+    analysis_prompt substitui o prompt padrão de build_analysis_prompt (ex.: fluxo CRAG).
+    """
     
     try:
-        # PARTE 1: INTRODUÇÃO
-        logger.info("Parte 1/4: Gerando introdução")
-        intro_prompt = f"""
+        fused_prompt = analysis_prompt or build_analysis_prompt(query, vectordb_results, groq_results)
+        
+        fused_result = await fused_analyzer_synthesizer_agent.run(
+            fused_prompt,
+            deps=deps
+        )
+        
+        analysis_part, separator, final_part = fused_result.output.partition("## RESPOSTA FINAL")
+        if not separator:
+            # Modelo não respeitou as seções: usar a saída inteira como resposta
+            analysis_part, final_part = "", analysis_part
+        
+        analysis_text = analysis_part.replace("## ANÁLISE", "", 1).strip()
+        response_text = final_part.strip()
+        
+        if len(response_text) < 200:
+            response_text = create_fallback_response(query, analysis_text)
+        
+        logger.info("Análise + síntese fundidas OpenRouter concluídas",
+                   analysis_length=len(analysis_text),
+                   word_count=_word_count(response_text))
+        
+        return analysis_text, response_text
+        
+    except Exception as e:
+        logger.error("Erro na análise + síntese fundidas OpenRouter", error=str(e))
+        raise
+
+# Limite de chamadas simultâneas ao sintetizador (respeita rate limits do provedor)
+SYNTHESIS_MAX_CONCURRENCY = 4
+
+_synthesis_semaphore: Optional[asyncio.Semaphore] = None
+_synthesis_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_synthesis_semaphore() -> asyncio.Semaphore:
+    """Semáforo compartilhado do sintetizador, recriado por event loop (o Streamlit usa vários)."""
+    global _synthesis_semaphore, _synthesis_semaphore_loop
+    
+    loop = asyncio.get_running_loop()
+    if _synthesis_semaphore is None or _synthesis_semaphore_loop is not loop:
+        _synthesis_semaphore = asyncio.Semaphore(SYNTHESIS_MAX_CONCURRENCY)
+        _synthesis_semaphore_loop = loop
+    return _synthesis_semaphore
+
+
+# Abaixo desta fração do mínimo de palavras a seção é reescrita; acima, o desvio só é registrado
+SECTION_RETRY_RATIO = 0.5
+
+
+async def _run_synthesizer(
+    deps: AgentDependencies,
+    prompt: str,
+    max_tokens: Optional[int] = None
+) -> str:
+    """Executa o sintetizador final respeitando o semáforo compartilhado."""
+    model_settings = {"max_tokens": max_tokens} if max_tokens else None
+    async with get_synthesis_semaphore():
+        async with asyncio.timeout(TIMEOUTS.synthesis_section):
+            result = await final_synthesizer_agent.run(prompt, deps=deps, model_settings=model_settings)
+    return result.output.strip()
+
+
+async def _ensure_length(
+    deps: AgentDependencies,
+    section_name: str,
+    text: str,
+    min_words: int,
+    expand_hint: str,
+    max_tokens: int
+) -> str:
+    """
+    Registra seções abaixo de min_words palavras; só as expande (uma vez) quando ficam
+    abaixo de SECTION_RETRY_RATIO do mínimo, o que indica geração truncada ou falha.
+    """
+    word_count = _word_count(text)
+    if word_count >= min_words:
+        return text
+    
+    if word_count >= min_words * SECTION_RETRY_RATIO:
+        logger.info("Seção abaixo do tamanho alvo - mantida sem nova chamada",
+                   section=section_name, word_count=word_count, min_words=min_words)
+        return text
+    
+    logger.warning(f"{section_name} muito curta: {word_count} palavras. Expandindo...")
+    expand_prompt = f"""
+            Expanda este texto para ter pelo menos {min_words} palavras, mantendo o conteúdo original:
+            
+            {text}
+            
+            {expand_hint}
+            """
+    return await _run_synthesizer(deps, expand_prompt, max_tokens=int(max_tokens * 1.5))
+
+
+async def _generate_section(
+    deps: AgentDependencies,
+    section_name: str,
+    prompt: str,
+    min_words: int,
+    expand_hint: str,
+    max_tokens: int
+) -> str:
+    """Gera uma seção com orçamento de tokens e verifica seu tamanho (cada tarefa cuida da própria expansão)."""
+    text = await _run_synthesizer(deps, prompt, max_tokens=max_tokens)
+    return await _ensure_length(deps, section_name, text, min_words, expand_hint, max_tokens)
+
+
+def synthesis_context(analysis_text: str) -> str:
+    """Contexto das seções: a análise, ou conhecimento geral quando ela é vazia/curta demais."""
+    return analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"
+
+
+# Templates das seções da síntese (definidos uma vez; preenchidos com format_map)
+_INTRO_TEMPLATE = """
         TAREFA: Escreva uma INTRODUÇÃO detalhada e abrangente sobre: {query}
         
-        CONTEXTO DISPONÍVEL: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO DISPONÍVEL: {ctx}
         
         INSTRUÇÕES ESPECÍFICAS:
         - Escreva uma introdução de EXATAMENTE 200-300 palavras (mínimo obrigatório)
@@ -687,30 +1612,11 @@ async def synthesize_with_openrouter_4_parts(
         
         FORMATO: Escreva apenas a introdução, sem títulos ou seções.
         """
-        
-        intro_result = await final_synthesizer_agent.run(intro_prompt, deps=deps)
-        introduction = intro_result.output.strip()
-        
-        # VALIDAÇÃO: Introdução deve ter pelo menos 200 palavras
-        intro_word_count = len(introduction.split())
-        if intro_word_count < 200:
-            logger.warning(f"Introdução muito curta: {intro_word_count} palavras. Expandindo...")
-            intro_expand_prompt = f"""
-            Expanda esta introdução para ter pelo menos 200 palavras, mantendo o conteúdo original:
-            
-            {introduction}
-            
-            Adicione mais detalhes sobre contexto jurídico, importância do tema, e aspectos que serão abordados.
-            """
-            expand_result = await final_synthesizer_agent.run(intro_expand_prompt, deps=deps)
-            introduction = expand_result.output.strip()
-        
-        # PARTE 2: DESENVOLVIMENTO
-        logger.info("Parte 2/4: Gerando desenvolvimento")
-        dev_prompt = f"""
+
+_DEV_TEMPLATE = """
         TAREFA: Escreva o DESENVOLVIMENTO detalhado sobre: {query}
         
-        CONTEXTO: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO: {ctx}
         
         INSTRUÇÕES ESPECÍFICAS:
         - Desenvolva adequadamente o tema (aproximadamente 400-500 palavras)
@@ -723,30 +1629,11 @@ async def synthesize_with_openrouter_4_parts(
         
         FORMATO: Escreva apenas o desenvolvimento, sem títulos. Seja muito detalhado.
         """
-        
-        dev_result = await final_synthesizer_agent.run(dev_prompt, deps=deps)
-        development = dev_result.output.strip()
-        
-        # VALIDAÇÃO: Desenvolvimento deve ter pelo menos 400 palavras
-        dev_word_count = len(development.split())
-        if dev_word_count < 400:
-            logger.warning(f"Desenvolvimento muito curto: {dev_word_count} palavras. Expandindo...")
-            dev_expand_prompt = f"""
-            Expanda este desenvolvimento para ter pelo menos 400 palavras, mantendo o conteúdo original:
-            
-            {development}
-            
-            Adicione mais exemplos práticos, detalhes da legislação, classificações e aspectos técnicos.
-            """
-            expand_result = await final_synthesizer_agent.run(dev_expand_prompt, deps=deps)
-            development = expand_result.output.strip()
-        
-        # PARTE 3: ANÁLISE DETALHADA
-        logger.info("Parte 3/4: Gerando análise detalhada")
-        analysis_prompt = f"""
+
+_ANALYSIS_TEMPLATE = """
         TAREFA: Escreva uma ANÁLISE DETALHADA sobre: {query}
         
-        CONTEXTO: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO: {ctx}
         
         INSTRUÇÕES ESPECÍFICAS:
         - Analise profundamente o tema (aproximadamente 400-500 palavras)
@@ -762,30 +1649,11 @@ async def synthesize_with_openrouter_4_parts(
         
         Desenvolva uma análise abrangente e detalhada que explore adequadamente todos os aspectos relevantes.
         """
-        
-        analysis_result = await final_synthesizer_agent.run(analysis_prompt, deps=deps)
-        detailed_analysis = analysis_result.output.strip()
-        
-        # VALIDAÇÃO: Análise deve ter pelo menos 400 palavras
-        analysis_word_count = len(detailed_analysis.split())
-        if analysis_word_count < 400:
-            logger.warning(f"Análise muito curta: {analysis_word_count} palavras. Expandindo...")
-            analysis_expand_prompt = f"""
-            Expanda esta análise para ter pelo menos 400 palavras, mantendo o conteúdo original:
-            
-            {detailed_analysis}
-            
-            Adicione mais perspectivas doutrinárias, jurisprudência, casos especiais, tendências e análises críticas.
-            """
-            expand_result = await final_synthesizer_agent.run(analysis_expand_prompt, deps=deps)
-            detailed_analysis = expand_result.output.strip()
-        
-        # PARTE 4: CONCLUSÃO
-        logger.info("Parte 4/4: Gerando conclusão")
-        conclusion_prompt = f"""
+
+_CONCLUSION_TEMPLATE = """
         TAREFA: Escreva uma CONCLUSÃO abrangente sobre: {query}
         
-        CONTEXTO: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO: {ctx}
         
         INSTRUÇÕES ESPECÍFICAS:
         - Escreva EXATAMENTE 250-300 palavras de conclusão (mínimo obrigatório)
@@ -800,23 +1668,61 @@ async def synthesize_with_openrouter_4_parts(
         
         Conclua de forma abrangente e consolidada, sintetizando os principais pontos discutidos.
         """
+
+# Cache exato da síntese em 4 partes: (query, análise) -> resposta final
+synthesis_exact_cache = ExactLRUCache(f"synthesis:{FINAL_SYNTHESIZER_PROMPT_HASH}", maxsize=512, ttl_seconds=3600)
+
+
+# (nome, template, mínimo de palavras, dica de expansão, orçamento de tokens)
+_SYNTHESIS_SECTIONS = (
+    ("Introdução", _INTRO_TEMPLATE, 200,
+     "Adicione mais detalhes sobre contexto jurídico, importância do tema, e aspectos que serão abordados.", 600),
+    ("Desenvolvimento", _DEV_TEMPLATE, 400,
+     "Adicione mais exemplos práticos, detalhes da legislação, classificações e aspectos técnicos.", 900),
+    ("Análise", _ANALYSIS_TEMPLATE, 400,
+     "Adicione mais perspectivas doutrinárias, jurisprudência, casos especiais, tendências e análises críticas.", 900),
+    ("Conclusão", _CONCLUSION_TEMPLATE, 250,
+     "Adicione mais orientações práticas, próximos passos, recomendações e reflexões finais.", 550),
+)
+
+
+@request_cached
+async def synthesize_with_openrouter_4_parts(
+    deps: AgentDependencies,
+    query: str,
+    analysis_text: str
+) -> str:
+    """Executa síntese final usando 4 chamadas especializadas e concorrentes para OpenRouter."""
+    
+    cache_key = exact_key(query, analysis_text)
+    cached_response = synthesis_exact_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
+    
+    logger.info("Iniciando síntese em 4 partes especializadas (concorrentes)")
+    
+    try:
+        # As 4 seções dependem apenas de query e analysis_text: prompts montados antes do gather
+        template_values = {"query": query, "ctx": synthesis_context(analysis_text)}
         
-        conclusion_result = await final_synthesizer_agent.run(conclusion_prompt, deps=deps)
-        conclusion = conclusion_result.output.strip()
+        prompts = [
+            template.format_map(template_values)
+            for _, template, _, _, _ in _SYNTHESIS_SECTIONS
+        ]
         
-        # VALIDAÇÃO: Conclusão deve ter pelo menos 250 palavras
-        conclusion_word_count = len(conclusion.split())
-        if conclusion_word_count < 250:
-            logger.warning(f"Conclusão muito curta: {conclusion_word_count} palavras. Expandindo...")
-            conclusion_expand_prompt = f"""
-            Expanda esta conclusão para ter pelo menos 250 palavras, mantendo o conteúdo original:
-            
-            {conclusion}
-            
-            Adicione mais orientações práticas, próximos passos, recomendações e reflexões finais.
-            """
-            expand_result = await final_synthesizer_agent.run(conclusion_expand_prompt, deps=deps)
-            conclusion = expand_result.output.strip()
+        # Lote: uma requisição para as 4 seções; itens não separados voltam ao gather individual
+        if deps.config.enable_batch_synthesis:
+            batched = await synthesis_batch_agent.run(prompts, deps)
+        else:
+            batched = [None] * len(prompts)
+        
+        introduction, development, detailed_analysis, conclusion = await asyncio.gather(*(
+            _ensure_length(deps, name, text, min_words, expand_hint, max_tokens)
+            if text else
+            _generate_section(deps, name, prompt, min_words, expand_hint, max_tokens)
+            for (name, _, min_words, expand_hint, max_tokens), prompt, text
+            in zip(_SYNTHESIS_SECTIONS, prompts, batched, strict=True)
+        ))
         
         # SÍNTESE FINAL: Combinar todas as partes
         logger.info("Combinando as 4 partes em resposta final")
@@ -837,17 +1743,12 @@ async def synthesize_with_openrouter_4_parts(
 
 {conclusion}"""
         
-        # Verificar qualidade da resposta final
-        word_count = len(final_response.split())
-        char_count = len(final_response)
-        
-        logger.info("Síntese em 4 partes concluída com sucesso", 
-                   word_count=word_count, char_count=char_count,
-                   intro_words=len(introduction.split()),
-                   dev_words=len(development.split()),
-                   analysis_words=len(detailed_analysis.split()),
-                   conclusion_words=len(conclusion.split()))
+        if logger.is_enabled_for(logging.INFO):
+            counts = _section_word_counts([introduction, development, detailed_analysis, conclusion])
+            logger.info("Síntese em 4 partes concluída com sucesso",
+                       char_count=len(final_response), **counts)
         
+        synthesis_exact_cache.put(cache_key, final_response)
         return final_response
         
     except Exception as e:
@@ -867,7 +1768,7 @@ async def synthesize_with_openrouter_fallback(
         synthesis_prompt = f"""
         PERGUNTA: {query}
         
-        CONTEXTO: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO: {synthesis_context(analysis_text)}
         
         Crie uma resposta jurídica completa e detalhada com aproximadamente 400 palavras.
         
@@ -905,17 +1806,15 @@ async def synthesize_with_openrouter(
     return await synthesize_with_openrouter_4_parts(deps, query, analysis_text)
 
 
-def create_fallback_response(query: str, analysis_text: str) -> str:
-    """Cria resposta de fallback estruturada"""
-    
-    return f"""
+# Texto da resposta de fallback (montado uma vez; preenchido com query e trecho da análise)
+_FALLBACK_TPL = """
 Com base na consulta apresentada sobre "{query}", podemos abordar os aspectos fundamentais do tema solicitado. O direito brasileiro oferece diversos mecanismos e institutos jurídicos para tratar questões como esta, sendo importante compreender tanto os aspectos teóricos quanto práticos da matéria.
 
 A legislação brasileira, incluindo a Constituição Federal, códigos específicos e leis complementares, estabelece o arcabouço normativo necessário para o tratamento adequado da questão. É fundamental considerar a hierarquia das normas e a jurisprudência consolidada dos tribunais superiores.
 
 Na prática, a implementação dos conceitos jurídicos requer atenção aos procedimentos estabelecidos, prazos legais e formalidades específicas. Cada caso concreto pode apresentar particularidades que influenciam na aplicação das normas gerais.
 
-{analysis_text[:300] if analysis_text else "Baseado em conhecimento jurídico geral sobre o tema, é importante considerar que"} a matéria demanda análise cuidadosa das circunstâncias específicas.
+{middle} a matéria demanda análise cuidadosa das circunstâncias específicas.
 
 É essencial observar que o direito é uma ciência dinâmica, sujeita a interpretações e mudanças legislativas. Precedentes judiciais e orientações dos órgãos competentes devem ser considerados na análise de casos específicos.
 
@@ -924,22 +1823,103 @@ Para situações concretas, recomenda-se consultar legislação atualizada, veri
 Esta resposta tem caráter informativo e educacional, não constituindo assessoria jurídica específica. Para questões particulares, é indispensável consultar um advogado devidamente habilitado que possa analisar as circunstâncias específicas do caso e fornecer orientação personalizada.
 """
 
+_FALLBACK_GENERIC_MIDDLE = "Baseado em conhecimento jurídico geral sobre o tema, é importante considerar que"
 
-async def synthesize_with_openrouter_streaming(
+
+def create_fallback_response(query: str, analysis_text: str) -> str:
+    """Cria resposta de fallback estruturada"""
+    
+    middle = trim_tokens(analysis_text, 75) if analysis_text else _FALLBACK_GENERIC_MIDDLE
+    return _FALLBACK_TPL.format(query=query, middle=middle)
+
+
+# ===============================
+# GUARDRAIL RÁPIDO DURANTE O STREAMING
+# ===============================
+
+# Intervalo (em palavras) entre verificações do texto parcial
+STREAM_GUARDRAIL_CHECK_INTERVAL = 100
+
+STRICT_SYNTHESIS_SUFFIX = """
+        ATENÇÃO: Não faça afirmações categóricas nem garanta resultados de casos específicos,
+        recomende orientação profissional e não oriente nenhuma atividade ilegal.
+        """
+
+
+async def stream_synthesis_section(
     deps: AgentDependencies,
-    query: str,
-    analysis_text: str
-):
-    """Síntese streaming OpenRouter em 4 partes - VERSÃO CORRIGIDA."""
+    prompt: str,
+    queue: Optional[asyncio.Queue] = None
+) -> str:
+    """
+    Gera uma seção da síntese via run_stream, verificando o texto parcial a cada
+    STREAM_GUARDRAIL_CHECK_INTERVAL palavras. Cada janela aprovada pelo guardrail rápido
+    é publicada imediatamente em `queue` (quando fornecida).
     
-    try:
-        logger.info("Iniciando síntese em 4 partes com streaming")
-        
-        # PARTE 1: INTRODUÇÃO - SIMPLES E DIRETA
-        intro_prompt = f"""
+    Em violação o stream é interrompido (limitando o decode desperdiçado). Se nada foi
+    publicado ainda, a seção é regenerada uma vez com prompt mais rígido; caso contrário
+    ela termina no último trecho aprovado, já que texto emitido não pode ser retirado.
+    """
+    released: List[str] = []
+    
+    def release(text: str) -> None:
+        if not released:
+            text = text.lstrip()
+        if text:
+            released.append(text)
+            if queue is not None:
+                queue.put_nowait(text)
+    
+    pending_text = ""
+    for attempt in range(2):
+        section_prompt = prompt if attempt == 0 else prompt + STRICT_SYNTHESIS_SUFFIX
+        pending: List[str] = []
+        words_since_check = 0
+        # Final do trecho já aprovado, reverificado para pegar padrões na fronteira
+        checked_tail = ""
+        violation = None
+        
+        async with final_synthesizer_agent.run_stream(section_prompt, deps=deps) as stream:
+            async for delta in stream.stream_text(delta=True):
+                pending.append(delta)
+                words_since_check += _word_count(delta)
+                
+                if words_since_check >= STREAM_GUARDRAIL_CHECK_INTERVAL:
+                    window = "".join(pending)
+                    violation = find_fast_guardrail_violation(checked_tail + window)
+                    words_since_check = 0
+                    if violation:
+                        break
+                    release(window)
+                    checked_tail = window[-200:]
+                    pending = []
+        
+        pending_text = "".join(pending)
+        if violation is None:
+            violation = find_fast_guardrail_violation(checked_tail + pending_text)
+        
+        if violation is None:
+            release(pending_text)
+            return "".join(released).strip()
+        
+        logger.warning("Guardrail rápido interrompeu o streaming da seção",
+                      attempt=attempt + 1,
+                      violation=violation,
+                      released_chars=sum(len(part) for part in released))
+        
+        if released:
+            return "".join(released).strip()
+    
+    # Segunda tentativa também violou: o guardrail final registra a violação
+    release(pending_text)
+    return "".join(released).strip()
+
+
+# Templates das seções da síntese streaming
+_STREAM_INTRO_TEMPLATE = """
         Escreva uma INTRODUÇÃO sobre: {query}
         
-        CONTEXTO: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO: {ctx}
         
         INSTRUÇÕES:
         - Escreva 200-250 palavras
@@ -950,27 +1930,11 @@ async def synthesize_with_openrouter_streaming(
         
         Escreva apenas a introdução, sem títulos ou seções.
         """
-        
-        intro_result = await final_synthesizer_agent.run(intro_prompt, deps=deps)
-        introduction = intro_result.output.strip()
-        
-        # Verificação simples de tamanho - SEM EXPANSÃO COMPLEXA
-        intro_word_count = len(introduction.split())
-        if intro_word_count < 150:
-            logger.warning(f"Introdução curta: {intro_word_count} palavras. Ajustando...")
-            intro_result = await final_synthesizer_agent.run(
-                f"Reescreva esta introdução com mais detalhes (200-250 palavras): {introduction}",
-                deps=deps
-            )
-            introduction = intro_result.output.strip()
-        
-        yield f"## INTRODUÇÃO\n\n{introduction}\n\n"
-        
-        # PARTE 2: DESENVOLVIMENTO - SIMPLES E DIRETO
-        dev_prompt = f"""
+
+_STREAM_DEV_TEMPLATE = """
         Escreva o DESENVOLVIMENTO sobre: {query}
         
-        CONTEXTO: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO: {ctx}
         
         INSTRUÇÕES:
         - Escreva 350-400 palavras
@@ -982,27 +1946,11 @@ async def synthesize_with_openrouter_streaming(
         
         Escreva apenas o desenvolvimento, sem títulos ou seções.
         """
-        
-        dev_result = await final_synthesizer_agent.run(dev_prompt, deps=deps)
-        development = dev_result.output.strip()
-        
-        # Verificação simples de tamanho - SEM EXPANSÃO COMPLEXA
-        dev_word_count = len(development.split())
-        if dev_word_count < 250:
-            logger.warning(f"Desenvolvimento curto: {dev_word_count} palavras. Ajustando...")
-            dev_result = await final_synthesizer_agent.run(
-                f"Reescreva este desenvolvimento com mais detalhes (350-400 palavras): {development}",
-                deps=deps
-            )
-            development = dev_result.output.strip()
-        
-        yield f"## DESENVOLVIMENTO\n\n{development}\n\n"
-        
-        # PARTE 3: ANÁLISE DETALHADA - SIMPLES E DIRETA
-        analysis_prompt = f"""
+
+_STREAM_ANALYSIS_TEMPLATE = """
         Escreva uma ANÁLISE DETALHADA sobre: {query}
         
-        CONTEXTO: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO: {ctx}
         
         INSTRUÇÕES:
         - Escreva 400-450 palavras
@@ -1014,27 +1962,11 @@ async def synthesize_with_openrouter_streaming(
         
         Escreva apenas a análise, sem títulos ou seções.
         """
-        
-        analysis_result = await final_synthesizer_agent.run(analysis_prompt, deps=deps)
-        detailed_analysis = analysis_result.output.strip()
-        
-        # Verificação simples de tamanho - SEM EXPANSÃO COMPLEXA
-        analysis_word_count = len(detailed_analysis.split())
-        if analysis_word_count < 300:
-            logger.warning(f"Análise curta: {analysis_word_count} palavras. Ajustando...")
-            analysis_result = await final_synthesizer_agent.run(
-                f"Reescreva esta análise com mais detalhes (400-450 palavras): {detailed_analysis}",
-                deps=deps
-            )
-            detailed_analysis = analysis_result.output.strip()
-        
-        yield f"## ANÁLISE DETALHADA\n\n{detailed_analysis}\n\n"
-        
-        # PARTE 4: CONCLUSÃO - SIMPLES E DIRETA
-        conclusion_prompt = f"""
+
+_STREAM_CONCLUSION_TEMPLATE = """
         Escreva uma CONCLUSÃO sobre: {query}
         
-        CONTEXTO: {analysis_text if analysis_text and len(analysis_text) > 50 else "Conhecimento jurídico geral"}
+        CONTEXTO: {ctx}
         
         INSTRUÇÕES:
         - Escreva 250-300 palavras
@@ -1046,426 +1978,982 @@ async def synthesize_with_openrouter_streaming(
         
         Escreva apenas a conclusão, sem títulos ou seções.
         """
-        
-        conclusion_result = await final_synthesizer_agent.run(conclusion_prompt, deps=deps)
-        conclusion = conclusion_result.output.strip()
-        
-        # Verificação simples de tamanho - SEM EXPANSÃO COMPLEXA
-        conclusion_word_count = len(conclusion.split())
-        if conclusion_word_count < 200:
-            logger.warning(f"Conclusão curta: {conclusion_word_count} palavras. Ajustando...")
-            conclusion_result = await final_synthesizer_agent.run(
-                f"Reescreva esta conclusão com mais detalhes (250-300 palavras): {conclusion}",
-                deps=deps
-            )
-            conclusion = conclusion_result.output.strip()
-        
-        yield f"## CONCLUSÃO\n\n{conclusion}"
+
+
+# Marca de fim de seção na fila de streaming
+_SECTION_DONE = object()
+
+# (cabeçalho, nome para log, template, mínimo de palavras)
+_STREAM_SECTIONS = (
+    ("INTRODUÇÃO", "Introdução", _STREAM_INTRO_TEMPLATE, 150),
+    ("DESENVOLVIMENTO", "Desenvolvimento", _STREAM_DEV_TEMPLATE, 250),
+    ("ANÁLISE DETALHADA", "Análise", _STREAM_ANALYSIS_TEMPLATE, 300),
+    ("CONCLUSÃO", "Conclusão", _STREAM_CONCLUSION_TEMPLATE, 200),
+)
+
+
+async def _stream_section_to_queue(
+    deps: AgentDependencies,
+    section_name: str,
+    prompt: str,
+    min_words: int,
+    queue: asyncio.Queue
+) -> str:
+    """Produz uma seção publicando os deltas na fila; sempre encerra a fila com _SECTION_DONE."""
+    try:
+        async with get_synthesis_semaphore():
+            text = await stream_synthesis_section(deps, prompt, queue)
+    finally:
+        queue.put_nowait(_SECTION_DONE)
+    
+    # Texto já foi emitido: seções curtas são apenas registradas
+    word_count = _word_count(text)
+    if word_count < min_words:
+        logger.warning(f"{section_name} curta", word_count=word_count, min_words=min_words)
+    
+    return text
+
+
+async def synthesize_with_openrouter_streaming(
+    deps: AgentDependencies,
+    query: str,
+    analysis_text: str
+):
+    """
+    Síntese streaming OpenRouter em 4 partes - VERSÃO CORRIGIDA.
+    As 4 seções são geradas concorrentemente; a seção corrente é emitida token a token
+    enquanto as seguintes acumulam seus deltas na própria fila.
+    """
+    
+    tasks: List[asyncio.Task] = []
+    try:
+        logger.info("Iniciando síntese em 4 partes com streaming (seções concorrentes)")
+        
+        template_values = {"query": query, "ctx": synthesis_context(analysis_text)}
+        queues = [asyncio.Queue() for _ in _STREAM_SECTIONS]
+        tasks = [
+            asyncio.create_task(_stream_section_to_queue(
+                deps, section_name, template.format_map(template_values), min_words, queue
+            ))
+            for (_, section_name, template, min_words), queue in zip(_STREAM_SECTIONS, queues, strict=True)
+        ]
+        
+        last_index = len(_STREAM_SECTIONS) - 1
+        for index, ((header, _, _, _), queue) in enumerate(zip(_STREAM_SECTIONS, queues, strict=True)):
+            yield f"## {header}\n\n"
+            while (chunk := await queue.get()) is not _SECTION_DONE:
+                yield chunk
+            # Propaga erros da seção (a fila já foi encerrada pelo produtor)
+            await tasks[index]
+            if index < last_index:
+                yield "\n\n"
         
         # Log final
-        total_words = (len(introduction.split()) + len(development.split()) + 
-                      len(detailed_analysis.split()) + len(conclusion.split()))
-        
-        logger.info("Síntese em 4 partes com streaming concluída", 
-                   total_words=total_words,
-                   intro_words=len(introduction.split()),
-                   dev_words=len(development.split()),
-                   analysis_words=len(detailed_analysis.split()),
-                   conclusion_words=len(conclusion.split()))
+        if logger.is_enabled_for(logging.INFO):
+            counts = _section_word_counts([task.result() for task in tasks])
+            logger.info("Síntese em 4 partes com streaming concluída", **counts)
         
     except Exception as e:
         logger.error("Erro na síntese streaming em 4 partes", error=str(e))
         yield f"❌ Erro na síntese: {str(e)}"
+    
+    finally:
+        # Consumidor interrompeu o stream ou houve erro: não deixar seções órfãs em execução
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
 
+# Orçamentos (em tokens) do trecho da resposta enviado aos validadores
+VALIDATION_INPUT_TOKENS = 400
+GUARDRAIL_INPUT_TOKENS = 250
+
+# Heurísticas baratas que dispensam o validador LLM
+HEURISTIC_MIN_WORDS = 300
+HEURISTIC_MIN_SECTIONS = 3
+HEURISTIC_DISCLAIMER_TERMS = ("advogado", "orientação profissional", "assessoria jurídica")
+
+# Contadores para calibrar a taxa de bypass
+_heuristic_validation_stats = {"bypassed": 0, "total": 0}
+
+
+def heuristic_quality_ok(response: str) -> bool:
+    """Resposta longa, estruturada em seções e com recomendação profissional."""
+    lowered = response.lower()
+    return (
+        _word_count(response) >= HEURISTIC_MIN_WORDS
+        and response.count("## ") >= HEURISTIC_MIN_SECTIONS
+        and any(term in lowered for term in HEURISTIC_DISCLAIMER_TERMS)
+    )
 
+
+# Cache exato da validação, indexado pelo hash da resposta completa: um hit dispensa
+# heurísticas, tokenização do trecho e a chamada LLM
+validation_exact_cache = ExactLRUCache(f"validation:{QUALITY_VALIDATOR_PROMPT_HASH}", maxsize=1024, ttl_seconds=3600)
+
+
+def _validation_shortcut(response_text: str, cache_key: str) -> Optional[QualityAssessment]:
+    """Avaliação sem LLM (cache hit ou heurísticas), ou None se a chamada ao validador for necessária."""
+    
+    cached_assessment = validation_exact_cache.get(cache_key)
+    if cached_assessment is not None:
+        return cached_assessment.model_copy(deep=True)
+    
+    _heuristic_validation_stats["total"] += 1
+    if heuristic_quality_ok(response_text):
+        _heuristic_validation_stats["bypassed"] += 1
+        logger.info("Validação LLM dispensada pelas heurísticas",
+                   bypass_rate=round(_heuristic_validation_stats["bypassed"] / _heuristic_validation_stats["total"], 3))
+        return QualityAssessment(
+            overall_score=0.8,
+            completeness=0.8,
+            accuracy=0.8,
+            clarity=0.8,
+            needs_improvement=False,
+            needs_human_review=False,
+            review_reason="Aprovada pelas heurísticas de qualidade"
+        )
+    
+    return None
+
+
+async def _validate_excerpt_llm(
+    deps: AgentDependencies,
+    response_excerpt: str
+) -> QualityAssessment:
+    """Chamada ao validador LLM sobre o trecho (já recortado) da resposta; erros propagam."""
+    
+    validation_prompt = f"""
+    Avalie esta resposta jurídica nos critérios de qualidade:
+    
+    RESPOSTA A AVALIAR:
+    {response_excerpt}...
+    
+    Avalie objetivamente:
+    1. Completude - Aborda todos os aspectos necessários?
+    2. Precisão - As informações jurídicas estão corretas?
+    3. Clareza - A linguagem é compreensível?
+    4. Estrutura - A organização está adequada?
+    
+    Forneça scores de 0.0 a 1.0 e sugestões de melhoria.
+    """
+    
+    validation_result = await quality_validator_agent.run(
+        validation_prompt,
+        deps=deps
+    )
+    
+    assessment: QualityAssessment = validation_result.output
+    
+    logger.info("Validação OpenRouter concluída",
+               quality_score=assessment.overall_score)
+    
+    return assessment
+
+
+def validation_failure_assessment(error: BaseException) -> QualityAssessment:
+    """Avaliação padrão quando o validador LLM falha (a resposta segue, com revisão recomendada)."""
+    
+    logger.error("Erro na validação OpenRouter", error=str(error))
+    
+    return QualityAssessment(
+        overall_score=0.75,
+        completeness=0.8,
+        accuracy=0.8,
+        clarity=0.7,
+        needs_improvement=False,
+        improvement_suggestions=["Validação automática falhou - revisão recomendada"],
+        needs_human_review=False,
+        review_reason="Erro no sistema de validação"
+    )
+
+
+@request_cached
 async def validate_with_openrouter(
     deps: AgentDependencies,
     response_text: str
 ) -> QualityAssessment:
-    """Valida resposta usando OpenRouter."""
+    """Valida resposta usando OpenRouter (dispensado em cache hit ou quando as heurísticas passam)."""
+    
+    cache_key = exact_key(response_text)
+    shortcut = _validation_shortcut(response_text, cache_key)
+    if shortcut is not None:
+        return shortcut
     
     try:
-        validation_prompt = f"""
-        Avalie esta resposta jurídica nos critérios de qualidade:
-        
-        RESPOSTA A AVALIAR:
-        {response_text[:1500]}...
-        
-        Avalie objetivamente:
-        1. Completude - Aborda todos os aspectos necessários?
-        2. Precisão - As informações jurídicas estão corretas?
-        3. Clareza - A linguagem é compreensível?
-        4. Estrutura - A organização está adequada?
-        
-        Forneça scores de 0.0 a 1.0 e sugestões de melhoria.
-        """
-        
-        validation_result = await quality_validator_agent.run(
-            validation_prompt,
-            deps=deps
+        assessment = await _validate_excerpt_llm(deps, trim_tokens(response_text, VALIDATION_INPUT_TOKENS))
+    except Exception as e:
+        return validation_failure_assessment(e)
+    
+    validation_exact_cache.put(cache_key, assessment.model_copy(deep=True))
+    return assessment
+
+
+# Cache exato dos guardrails: prompt completo + modelo -> GuardrailCheck já interpretado
+guardrail_exact_cache = ExactLRUCache(f"guardrail:{GUARDRAIL_CHECKER_PROMPT_HASH}", maxsize=1024, ttl_seconds=3600)
+
+# Cache semântico dos guardrails: guarda apenas reprovações. Trechos quase idênticos a um
+# texto reprovado são reprovados sem nova chamada; uma aprovação nunca é reaproveitada por
+# similaridade (uma única frase de risco muda pouco o embedding e aprovaria texto não verificado)
+GUARDRAIL_CACHE_THRESHOLD = 0.95
+guardrail_semantic_cache = SemanticCache(
+    f"guardrail_failed:{GUARDRAIL_CHECKER_PROMPT_HASH}",
+    similarity_threshold=GUARDRAIL_CACHE_THRESHOLD,
+    max_entries=1024
+)
+
+
+# Resultado compartilhado do pré-filtro (imutável)
+GUARDRAIL_SAFE_CHECK = GuardrailCheck.model_construct(passed=True, violations=(), overall_risk_level="baixo")
+
+# Contadores para calibrar a taxa de dispensa do pré-filtro
+_guardrail_prefilter_stats = {"skipped": 0, "total": 0}
+
+
+def _has_disclaimer(text: str) -> bool:
+    """Resposta recomenda orientação profissional (mesmos termos da heurística de qualidade)."""
+    lowered = text.lower()
+    return any(term in lowered for term in HEURISTIC_DISCLAIMER_TERMS)
+
+
+# Logger dos guardrails com o componente já vinculado (bind feito uma vez, na importação)
+_guard_log = logger.bind(component="guardrail_openrouter")
+
+# Falhas esperadas do provedor/modelo (rede, HTTP, timeout, saída inválida). CancelledError
+# (BaseException) nunca é capturado: o cancelamento sempre se propaga
+GUARDRAIL_EXPECTED_ERRORS = (
+    httpx.HTTPError,
+    ModelHTTPError,
+    UnexpectedModelBehavior,
+    ValidationError,
+    TimeoutError,
+)
+
+
+def guardrail_failure_check(error: BaseException) -> GuardrailCheck:
+    """Em caso de erro do provedor, assumir que passou com aviso (risco medio)."""
+    return GuardrailCheck.model_construct(
+        passed=True,
+        violations=(f"Sistema de guardrails falhou: {str(error)}",),
+        overall_risk_level="medio"
+    )
+
+
+# Verificações em andamento por chave do cache (single-flight)
+_guardrail_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _single_flight_guardrail(key: str, run_check) -> GuardrailCheck:
+    """
+    Executa `run_check()` uma única vez por chave: chamadores concorrentes com a mesma chave
+    aguardam o resultado da chamada em andamento em vez de disparar outra requisição ao LLM.
+    """
+    loop = asyncio.get_running_loop()
+    inflight = _guardrail_inflight.get(key)
+    # Futures pertencem ao event loop que as criou (o Streamlit pode criar vários)
+    if inflight is not None and inflight.get_loop() is loop:
+        _guard_log.info("Guardrail: aguardando verificação idêntica em andamento")
+        return await asyncio.shield(inflight)
+    
+    future = loop.create_future()
+    _guardrail_inflight[key] = future
+    try:
+        check = await run_check()
+        future.set_result(check)
+        return check
+    except BaseException as e:
+        # Quem aguarda recebe um erro comum (e cai no próprio fallback), nunca o cancelamento do líder
+        future.set_exception(e if isinstance(e, Exception) else RuntimeError("Verificação de guardrails cancelada"))
+        future.exception()  # Marca como lida: sem aviso quando ninguém aguardava
+        raise
+    finally:
+        if _guardrail_inflight.get(key) is future:
+            del _guardrail_inflight[key]
+
+
+async def _check_guardrails_llm(
+    deps: AgentDependencies,
+    guardrail_prompt: str,
+    response_excerpt: str,
+    cache_key: str
+) -> GuardrailCheck:
+    """Nível semântico do cache e, em miss, a chamada ao guardrail_checker_agent."""
+    # get/put do SemanticCache são síncronos e o event loop é único: dispensa lock
+    excerpt_embedding = await embed_query(response_excerpt)
+    if excerpt_embedding is not None:
+        cached_check = guardrail_semantic_cache.get(excerpt_embedding)
+        if cached_check is not None and not cached_check.passed:
+            _guard_log.info("Guardrail recuperado do cache", cache=guardrail_semantic_cache.name,
+                            passed=cached_check.passed)
+            guardrail_exact_cache.put(cache_key, cached_check)
+            return cached_check
+    
+    guardrail_result = await guardrail_checker_agent.run(
+        guardrail_prompt,
+        deps=deps
+    )
+    
+    check: GuardrailCheck = guardrail_result.output
+    log_prompt_cache_usage("guardrails", guardrail_result)
+    
+    if _guard_log.is_enabled_for(logging.DEBUG):
+        _guard_log.debug("Guardrails OpenRouter concluídos",
+                        passed=check.passed,
+                        risk=check.overall_risk_level)
+    
+    guardrail_exact_cache.put(cache_key, check)
+    if excerpt_embedding is not None and not check.passed:
+        guardrail_semantic_cache.put(excerpt_embedding, check)
+    return check
+
+
+def _guardrail_shortcut(response_text: str) -> Optional[GuardrailCheck]:
+    """Verificação sem LLM (filtro rápido ou pré-filtro), ou None se o guardrail LLM for necessário."""
+    
+    # Guardrail rápido: só chama o LLM se os padrões baratos não encontrarem violação
+    fast_violation = find_fast_guardrail_violation(response_text)
+    if fast_violation:
+        _guard_log.info("Guardrail rápido detectou violação - LLM não acionado",
+                       violation=fast_violation)
+        return GuardrailCheck.model_construct(
+            passed=False,
+            violations=(f"Trecho potencialmente inadequado: \"{fast_violation}\"",),
+            overall_risk_level="alto"
         )
-        
-        # Processar resposta em texto simples
-        response_text_val: str = validation_result.output
-        
-        # Extrair informações do texto estruturado
-        overall_score = 0.8  # Valor padrão
-        completeness = 0.8
-        accuracy = 0.8
-        clarity = 0.8
-        needs_improvement = False
-        needs_human_review = False
-        review_reason = "Avaliação automática concluída"
-        suggestions = []
-        
-        # Parse simples do texto estruturado
-        lines = response_text_val.split('\n')
-        for line in lines:
-            if 'SCORE_GERAL:' in line:
-                try:
-                    overall_score = float(line.split(':')[1].strip())
-                except:
-                    pass
-            elif 'COMPLETUDE:' in line:
-                try:
-                    completeness = float(line.split(':')[1].strip())
-                except:
-                    pass
-            elif 'PRECISAO:' in line:
-                try:
-                    accuracy = float(line.split(':')[1].strip())
-                except:
-                    pass
-            elif 'CLAREZA:' in line:
-                try:
-                    clarity = float(line.split(':')[1].strip())
-                except:
-                    pass
-            elif 'PRECISA_MELHORIA:' in line:
-                needs_improvement = 'SIM' in line.upper()
-            elif 'PRECISA_REVISAO_HUMANA:' in line:
-                needs_human_review = 'SIM' in line.upper()
-            elif 'MOTIVO_REVISAO:' in line:
-                review_reason = line.split(':', 1)[1].strip()
-            elif line.strip().startswith('- '):
-                suggestions.append(line.strip()[2:])
-        
-        assessment = QualityAssessment(
-            overall_score=overall_score,
-            completeness=completeness,
-            accuracy=accuracy,
-            clarity=clarity,
-            needs_improvement=needs_improvement,
-            improvement_suggestions=suggestions,
-            needs_human_review=needs_human_review,
-            review_reason=review_reason
+    
+    # Pré-filtro: sem termos de alerta e com recomendação profissional, nada a escalar ao LLM
+    red_flags = count_red_flags(response_text)
+    _guardrail_prefilter_stats["total"] += 1
+    if not red_flags and _has_disclaimer(response_text):
+        _guardrail_prefilter_stats["skipped"] += 1
+        _guard_log.info("Pré-filtro: resposta sem termos de alerta - LLM não acionado",
+                       skip_rate=round(_guardrail_prefilter_stats["skipped"] / _guardrail_prefilter_stats["total"], 3))
+        return GUARDRAIL_SAFE_CHECK
+    _guard_log.info("Pré-filtro: escalando ao guardrail LLM", red_flags=red_flags)
+    
+    return None
+
+
+async def _check_guardrail_excerpt(
+    deps: AgentDependencies,
+    response_excerpt: str
+) -> GuardrailCheck:
+    """Guardrail LLM sobre o trecho (já recortado) da resposta, com caches e single-flight."""
+    
+    try:
+        # Apenas o trecho variável: a rubrica está no system prompt
+        guardrail_prompt = f"RESPOSTA A VERIFICAR:\n{response_excerpt}..."
+        
+        cache_key = exact_key(MODEL_VALIDATOR_SMALL, guardrail_prompt)
+        cached_check = guardrail_exact_cache.get(cache_key)
+        if cached_check is not None:
+            _guard_log.info("Guardrail recuperado do cache", cache=guardrail_exact_cache.name,
+                            passed=cached_check.passed)
+            return cached_check
+        
+        # Chamadas idênticas concorrentes compartilham uma única verificação
+        return await _single_flight_guardrail(
+            cache_key,
+            lambda: _check_guardrails_llm(deps, guardrail_prompt, response_excerpt, cache_key)
         )
         
-        logger.info("Validação OpenRouter concluída",
-                   quality_score=assessment.overall_score)
-        
-        return assessment
-        
-    except Exception as e:
-        logger.error("Erro na validação OpenRouter", error=str(e))
-        
-        # Retornar avaliação padrão em caso de erro
-        return QualityAssessment(
-            overall_score=0.75,
-            completeness=0.8,
-            accuracy=0.8,
-            clarity=0.7,
-            needs_improvement=False,
-            improvement_suggestions=["Validação automática falhou - revisão recomendada"],
-            needs_human_review=False,
-            review_reason="Erro no sistema de validação"
-        )
+    except GUARDRAIL_EXPECTED_ERRORS as e:
+        # Só falhas do provedor/modelo aprovam com aviso; qualquer outra exceção (possível bug
+        # no código dos guardrails) se propaga e a consulta termina em resposta de erro
+        _guard_log.error("Erro nos guardrails OpenRouter", error=str(e), error_type=type(e).__name__)
+        return guardrail_failure_check(e)
 
 
+@request_cached
 async def check_guardrails_with_openrouter(
     deps: AgentDependencies,
     response_text: str
 ) -> GuardrailCheck:
     """Verifica guardrails usando OpenRouter."""
     
+    shortcut = _guardrail_shortcut(response_text)
+    if shortcut is not None:
+        return shortcut
+    
+    return await _check_guardrail_excerpt(deps, trim_tokens(response_text, GUARDRAIL_INPUT_TOKENS))
+
+
+# Respostas curtas bem avaliadas quase nunca violam guardrails: o LLM dá lugar a uma varredura local
+HIGH_QUALITY_GUARDRAIL_SCORE = 0.9
+HIGH_QUALITY_GUARDRAIL_MAX_CHARS = 2000
+
+
+def high_quality_guardrail_check(
+    quality_assessment: QualityAssessment,
+    response_text: str
+) -> Optional[GuardrailCheck]:
+    """Guardrail local (padrões rápidos + CPF/CNPJ) se a resposta é curta e de alta qualidade."""
+    
+    if (quality_assessment.overall_score <= HIGH_QUALITY_GUARDRAIL_SCORE
+            or len(response_text) >= HIGH_QUALITY_GUARDRAIL_MAX_CHARS):
+        return None
+    
+    violations = [f"Dado pessoal exposto: {pii}" for pii in find_pii(response_text)]
+    fast_violation = find_fast_guardrail_violation(response_text)
+    if fast_violation:
+        violations.append(f"Trecho potencialmente inadequado: \"{fast_violation}\"")
+    
+    if not violations:
+        return GUARDRAIL_SAFE_CHECK
+    return GuardrailCheck.model_construct(
+        passed=False,
+        violations=tuple(violations),
+        overall_risk_level="alto" if fast_violation else "medio"
+    )
+
+
+async def _gather_quality_and_guardrails(
+    response_text: str,
+    validation: Any,
+    guardrails: Any
+) -> Tuple[QualityAssessment, GuardrailCheck]:
+    """
+    Etapas 5 e 6 em paralelo. Se a validação aprovar uma resposta curta com nota alta, o
+    guardrail LLM ainda em execução é cancelado e substituído pela varredura local; se ele já
+    terminou, prevalece e a concordância com a varredura local é registrada.
+    """
+    
+    guardrail_task = asyncio.ensure_future(guardrails)
     try:
-        guardrail_prompt = f"""
-        Verifique se esta resposta jurídica segue as diretrizes éticas:
-        
-        RESPOSTA A VERIFICAR:
-        {response_text[:1000]}...
-        
-        VERIFICAÇÕES OBRIGATÓRIAS:
-        1. Inclui disclaimers sobre assessoria jurídica?
-        2. Não faz afirmações categóricas sobre casos específicos?
-        3. Sugere orientação profissional quando necessário?
-        4. Mantém neutralidade em questões controversas?
-        5. Não promove atividades ilegais?
-        
-        Identifique violações e avalie o nível de risco geral.
-        """
+        quality_assessment = await validation
+    except BaseException:
+        guardrail_task.cancel()
+        raise
+    
+    local_check = high_quality_guardrail_check(quality_assessment, response_text)
+    if local_check is None:
+        return quality_assessment, await guardrail_task
+    
+    if guardrail_task.done() and not guardrail_task.cancelled():
+        guardrail_check = guardrail_task.result()
+        _guard_log.info("Guardrail local em sombra",
+                       local_passed=local_check.passed,
+                       llm_passed=guardrail_check.passed,
+                       agrees=local_check.passed == guardrail_check.passed)
+        return quality_assessment, guardrail_check
+    
+    guardrail_task.cancel()
+    _guard_log.info("Guardrail LLM dispensado: resposta curta com nota alta",
+                   quality_score=quality_assessment.overall_score,
+                   chars=len(response_text),
+                   passed=local_check.passed)
+    return quality_assessment, local_check
+
+
+async def execute_validation_concurrently(
+    deps: AgentDependencies,
+    response_text: str
+) -> Tuple[QualityAssessment, GuardrailCheck]:
+    """Executa as Etapas 5 (validação) e 6 (guardrails) em paralelo; latência = máx. das duas."""
+    
+    # Ambas as etapas já devolvem modelos padrão em caso de erro, então não há exceção a tratar
+    quality_assessment, guardrail_check = await _gather_quality_and_guardrails(
+        response_text,
+        validate_with_openrouter(deps, response_text),
+        check_guardrails_with_openrouter(deps, response_text)
+    )
+    
+    logger.info("Validação OpenRouter concluída",
+               quality_score=quality_assessment.overall_score)
+    
+    return quality_assessment, guardrail_check
+
+
+# Intervalo (em caracteres, ~200 tokens) entre as varreduras incrementais do stream da síntese
+INCREMENTAL_SCAN_CHARS = 200 * CHARS_PER_TOKEN
+# Sobreposição entre janelas para não perder termos de alerta cortados na fronteira
+INCREMENTAL_SCAN_OVERLAP = 64
+
+
+class IncrementalValidation:
+    """
+    Consome a síntese em streaming e antecipa as Etapas 5/6.
+
+    Os validadores LLM só enxergam o início da resposta (VALIDATION_INPUT_TOKENS e
+    GUARDRAIL_INPUT_TOKENS): assim que o stream ultrapassa cada orçamento, o trecho está
+    fixo e a chamada é disparada em background. O guardrail LLM só é antecipado se a
+    varredura incremental já encontrou termos de alerta (sem eles o pré-filtro costuma
+    dispensá-lo). No fim do stream, finish() aplica os atalhos sem LLM sobre o texto
+    completo e só então aproveita (ou cancela) as chamadas antecipadas.
+    """
+    
+    def __init__(self, deps: AgentDependencies):
+        self.deps = deps
+        self._parts: List[str] = []
+        self._length = 0
+        self._scanned = 0
+        self._red_flags_seen = False
+        self._fast_violation_seen = False
+        self._validation_task: Optional[asyncio.Task] = None
+        self._guardrail_task: Optional[asyncio.Task] = None
+        self._cancelled = False
+    
+    def feed(self, chunk: str) -> None:
+        """Recebe um trecho do stream; a cada ~200 tokens novos faz a varredura incremental."""
+        if self._cancelled:
+            # Após cancel(), trechos atrasados da produtora não disparam novas chamadas
+            return
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        if self._length - self._scanned >= INCREMENTAL_SCAN_CHARS:
+            self._scan("".join(self._parts))
+    
+    def _scan(self, text: str) -> None:
+        window = text[max(0, self._scanned - INCREMENTAL_SCAN_OVERLAP):]
+        self._scanned = len(text)
+        
+        if not self._fast_violation_seen and find_fast_guardrail_violation(window):
+            # O filtro rápido vai decidir no fim: o guardrail LLM não será necessário
+            self._fast_violation_seen = True
+        if not self._red_flags_seen and count_red_flags(window):
+            self._red_flags_seen = True
+        
+        if self._validation_task is None:
+            excerpt = self._final_excerpt(text, VALIDATION_INPUT_TOKENS)
+            if excerpt is not None:
+                self._validation_task = asyncio.create_task(_validate_excerpt_llm(self.deps, excerpt))
+        
+        if self._guardrail_task is None and self._red_flags_seen and not self._fast_violation_seen:
+            excerpt = self._final_excerpt(text, GUARDRAIL_INPUT_TOKENS)
+            if excerpt is not None:
+                self._guardrail_task = asyncio.create_task(_check_guardrail_excerpt(self.deps, excerpt))
+    
+    @staticmethod
+    def _final_excerpt(text: str, max_tokens: int) -> Optional[str]:
+        """Trecho enviado ao validador, se o texto já excede o orçamento (não muda mais)."""
+        if len(text) <= max_tokens:
+            return None
+        excerpt = trim_tokens(text, max_tokens)
+        return excerpt if len(excerpt) < len(text) else None
+    
+    @staticmethod
+    def _discard(task: Optional[asyncio.Task]) -> None:
+        """Descarta uma chamada antecipada: cancela se em execução, consome o erro se já falhou."""
+        if task is None:
+            return
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+    
+    def cancel(self) -> None:
+        """Descarta as chamadas antecipadas ainda não aproveitadas; feed() passa a ser ignorado."""
+        self._cancelled = True
+        self._discard(self._validation_task)
+        self._discard(self._guardrail_task)
+    
+    async def _reconcile_validation(self, response_text: str) -> QualityAssessment:
+        cache_key = exact_key(response_text)
+        shortcut = _validation_shortcut(response_text, cache_key)
+        if shortcut is not None:
+            self._discard(self._validation_task)
+            return shortcut
+        
+        try:
+            if self._validation_task is not None:
+                assessment = await self._validation_task
+            else:
+                assessment = await _validate_excerpt_llm(
+                    self.deps, trim_tokens(response_text, VALIDATION_INPUT_TOKENS)
+                )
+        except Exception as e:
+            return validation_failure_assessment(e)
         
-        guardrail_result = await guardrail_checker_agent.run(
-            guardrail_prompt,
-            deps=deps
+        validation_exact_cache.put(cache_key, assessment.model_copy(deep=True))
+        return assessment
+    
+    async def _reconcile_guardrails(self, response_text: str) -> GuardrailCheck:
+        shortcut = _guardrail_shortcut(response_text)
+        if shortcut is not None:
+            self._discard(self._guardrail_task)
+            return shortcut
+        
+        if self._guardrail_task is not None and not self._guardrail_task.cancelled():
+            return await self._guardrail_task
+        return await _check_guardrail_excerpt(self.deps, trim_tokens(response_text, GUARDRAIL_INPUT_TOKENS))
+    
+    async def finish(self, response_text: str) -> tuple[QualityAssessment, GuardrailCheck]:
+        """Etapas 5 + 6 sobre o texto completo, reaproveitando as chamadas já em andamento."""
+        logger.info("Validação incremental: reconciliando",
+                   validation_prefetched=self._validation_task is not None,
+                   guardrail_prefetched=self._guardrail_task is not None)
+        
+        return await _gather_quality_and_guardrails(
+            response_text,
+            self._reconcile_validation(response_text),
+            self._reconcile_guardrails(response_text)
         )
+
+
+async def _run_fused_validation_text(
+    deps: AgentDependencies,
+    fused_prompt: str
+) -> Tuple[QualityAssessment, GuardrailCheck]:
+    """Etapas 5+6 fundidas em formato texto (CHAVE: valor), interpretado pelos parsers manuais."""
+    text_result = await fused_validator_guardrail_agent.run(
+        f"{fused_prompt}\nRESPONDA APENAS COM ESTE FORMATO EXATO:\n{FUSED_VALIDATION_RESPONSE_FORMAT}",
+        deps=deps,
+        output_type=str
+    )
+    
+    quality_part, separator, guardrail_part = text_result.output.partition("## GUARDRAILS")
+    if not separator:
+        # Alguns modelos devolvem o objeto JSON mesmo no modo texto: validação direta pelo
+        # parser JSON do pydantic-core, sem dict intermediário
+        start, end = quality_part.find("{"), quality_part.rfind("}")
+        if start != -1 and end > start:
+            try:
+                fused = ValidationWithGuardrails.model_validate_json(quality_part[start:end + 1])
+                return fused.quality, fused.guardrails
+            except ValidationError:
+                pass
+        raise ValueError("Seção de guardrails ausente na resposta fundida")
+    
+    return parse_quality_response(quality_part), parse_guardrail_response(guardrail_part)
+
+
+@request_cached
+async def validate_and_check_guardrails_with_openrouter(
+    deps: AgentDependencies,
+    response_text: str
+) -> Tuple[QualityAssessment, GuardrailCheck]:
+    """
+    Executa validação de qualidade + guardrails em uma única chamada OpenRouter
+    (etapas 5+6 fundidas). Em caso de erro, volta para as duas chamadas separadas.
+    """
+    
+    try:
+        fused_prompt = f"""
+        Avalie a qualidade e verifique as diretrizes éticas desta resposta jurídica:
         
-        # Processar resposta em texto simples
-        response_text_guard: str = guardrail_result.output
-        
-        # Extrair informações do texto estruturado
-        passed = True  # Valor padrão
-        risk_level = "BAIXO"
-        violations = []
-        
-        # Parse simples do texto estruturado
-        lines = response_text_guard.split('\n')
-        for line in lines:
-            if 'PASSOU_VERIFICACAO:' in line:
-                passed = 'SIM' in line.upper()
-            elif 'NIVEL_RISCO:' in line:
-                risk_level = line.split(':')[1].strip().upper()
-            elif line.strip().startswith('- '):
-                violations.append(line.strip()[2:])
-        
-        check = GuardrailCheck(
-            passed=passed,
-            violations=violations,
-            overall_risk_level=risk_level.lower()
-        )
+        RESPOSTA A AVALIAR:
+        {trim_tokens(response_text, VALIDATION_INPUT_TOKENS)}...
+        """
         
-        logger.info("Guardrails OpenRouter concluídos",
+        try:
+            fused_result = await fused_validator_guardrail_agent.run(
+                fused_prompt,
+                deps=deps
+            )
+            assessment = fused_result.output.quality
+            check = fused_result.output.guardrails
+        except (UnexpectedModelBehavior, ModelHTTPError) as e:
+            # Modelos gratuitos nem sempre suportam tool calling: pedir o formato texto e interpretá-lo
+            logger.warning("Saída estruturada indisponível na validação fundida - usando formato texto",
+                          error=str(e))
+            assessment, check = await _run_fused_validation_text(deps, fused_prompt)
+        
+        logger.info("Validação + guardrails fundidos OpenRouter concluídos",
+                   quality_score=assessment.overall_score,
                    passed=check.passed)
         
-        return check
+        return assessment, check
         
     except Exception as e:
-        logger.error("Erro nos guardrails OpenRouter", error=str(e))
-        
-        # Em caso de erro, assumir que passou com aviso
-        return GuardrailCheck(
-            passed=True,
-            violations=[f"Sistema de guardrails falhou: {str(e)}"],
-            overall_risk_level="medium"
+        logger.error("Erro na validação + guardrails fundidos OpenRouter", error=str(e))
+        return (
+            await validate_with_openrouter(deps, response_text),
+            await check_guardrails_with_openrouter(deps, response_text)
         )
 
 
+def _final_warnings(quality_assessment: QualityAssessment, guardrail_check: GuardrailCheck) -> List[str]:
+    """Avisos da resposta final (sugestões de melhoria + violações de guardrails), montados uma vez."""
+    warnings = list(quality_assessment.improvement_suggestions) if quality_assessment.needs_improvement else []
+    if not guardrail_check.passed:
+        warnings.extend(f"Atenção: {violation}" for violation in guardrail_check.violations)
+    return warnings
+
+
 # ===============================
-# FUNÇÃO PRINCIPAL DO WORKFLOW HÍBRIDO CORRETO
+# CACHE DE RESPOSTAS FINAIS
 # ===============================
 
-async def process_legal_query_hybrid_corrected(
+# Consultas repetidas (mesmo texto normalizado) reutilizam a resposta final inteira, dispensando
+# buscas, análise, síntese, validação e guardrails. Cache exato: paráfrases próximas podem mudar
+# a pergunta jurídica (prazo, parte, tipo societário), e um vizinho semântico não prova equivalência
+
+# As respostas em cache também podem vir dos caminhos fundidos (Etapas 3+4 e 5+6): os hashes
+# dos prompts fundidos entram no nome para que editá-los invalide o cache, como os demais
+_FUSED_PROMPTS_KEY = f"{FUSED_ANALYZER_SYNTHESIZER_PROMPT_HASH}:{FUSED_VALIDATOR_GUARDRAIL_PROMPT_HASH}"
+
+final_response_cache = ExactLRUCache(
+    f"final_response:{FINAL_SYNTHESIZER_PROMPT_HASH}:{_FUSED_PROMPTS_KEY}",
+    maxsize=1024,
+    ttl_seconds=3600
+)
+
+# No fluxo integrado ao CRAG a resposta também depende dos documentos recuperados: cache
+# separado (prompts de análise e síntese no nome)
+crag_final_response_cache = ExactLRUCache(
+    f"crag_final_response:{LEGAL_ANALYZER_PROMPT_HASH}:{FINAL_SYNTHESIZER_PROMPT_HASH}:{_FUSED_PROMPTS_KEY}",
+    maxsize=1024,
+    ttl_seconds=3600
+)
+
+# Campos de ProcessingConfig que não alteram a resposta produzida (apenas como ela é obtida)
+_RESPONSE_NEUTRAL_CONFIG_FIELDS = {"enable_response_cache", "max_concurrent_tasks"}
+
+
+def final_response_cache_key(query: LegalQuery, config: ProcessingConfig) -> str:
+    """Texto normalizado da consulta + configuração que afeta a resposta (guardrails, fusões, lote...)."""
+    return exact_key(
+        normalize_query(query.text),
+        config.model_dump_json(exclude=_RESPONSE_NEUTRAL_CONFIG_FIELDS)
+    )
+
+
+def get_cached_final_response(
+    deps: AgentDependencies,
     query: LegalQuery,
-    config: Optional[ProcessingConfig] = None,
-    user_id: Optional[str] = None
-) -> FinalResponse:
-    """
-    Processa consulta jurídica com workflow híbrido CORRETO:
-    - OpenRouter: Decisão, vectordb, análise, síntese, validação, guardrails  
-    - Groq: Apenas buscas WEB + LexML com tools
-    """
+    cache: ExactLRUCache = final_response_cache
+) -> Optional[FinalResponse]:
+    """Resposta final da mesma consulta sob a mesma configuração, com identificação renovada."""
+    
+    if not deps.config.enable_response_cache:
+        return None
+    
+    cached_response = cache.get(final_response_cache_key(query, deps.config))
+    if cached_response is None:
+        return None
+    
+    return cached_response.model_copy(
+        deep=True,
+        update={
+            "query_id": query.id,
+            "response_id": str(uuid.uuid4()),
+            "generated_at": datetime.now()
+        }
+    )
+
+
+def cache_final_response(
+    deps: AgentDependencies,
+    query: LegalQuery,
+    final_response: FinalResponse,
+    guardrail_check: GuardrailCheck,
+    cache: ExactLRUCache = final_response_cache
+) -> None:
+    """Armazena a resposta final; respostas reprovadas nos guardrails não são reaproveitadas."""
     
-    logger.info("Iniciando processamento híbrido CORRETO",
-               query_id=query.id,
-               openrouter_role="Decisão + vectordb + análise + síntese + validação + guardrails",
-               groq_role="Apenas WEB + LexML")
+    if not deps.config.enable_response_cache:
+        return
+    if not guardrail_check.passed or final_response.status != Status.COMPLETED:
+        return
     
-    try:
-        # Configurar dependências
-        if config is None:
-            config = ProcessingConfig()
-        
-        deps = AgentDependencies(
-            config=config,
-            session_id=str(uuid.uuid4()),
-            user_id=user_id,
-            shared_state={}
-        )
-        
-        # === ETAPA 1: DECISÃO DE BUSCA (OPENROUTER - meta-llama/llama-4-maverick:free) ===
-        logger.info("Etapa 1: Decisão de busca com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        decision_result = await search_decision_agent.run(
-            f"Analise esta consulta jurídica e decida quais buscas realizar: {query.text}",
-            deps=deps
-        )
-        
-        # Processar resposta de texto do search decision
-        decision_text: str = decision_result.output
-        
-        # Fazer parsing manual da decisão
-        def parse_decision_response(text: str) -> SearchDecision:
-            """Parse manual da resposta estruturada em texto do search decision."""
-            try:
-                import re
-                
-                # Valores padrão
-                needs_vectordb = True  # Sempre buscar vectordb
-                needs_lexml = True
-                needs_web = True  
-                needs_jurisprudence = True
-                reasoning = "Análise jurídica completa necessária"
-                confidence = 0.8
-                priority_order = ["vectordb", "lexml", "web"]
-                
-                # Extrair informações usando regex
-                vectordb_match = re.search(r'VECTORDB:\s*(SIM|NAO)', text, re.IGNORECASE)
-                if vectordb_match:
-                    needs_vectordb = vectordb_match.group(1).upper() == 'SIM'
-                
-                lexml_match = re.search(r'LEXML:\s*(SIM|NAO)', text, re.IGNORECASE)
-                if lexml_match:
-                    needs_lexml = lexml_match.group(1).upper() == 'SIM'
-                
-                web_match = re.search(r'WEB:\s*(SIM|NAO)', text, re.IGNORECASE)
-                if web_match:
-                    needs_web = web_match.group(1).upper() == 'SIM'
-                
-                jurisprudencia_match = re.search(r'JURISPRUDENCIA:\s*(SIM|NAO)', text, re.IGNORECASE)
-                if jurisprudencia_match:
-                    needs_jurisprudence = jurisprudencia_match.group(1).upper() == 'SIM'
-                
-                # Buscar justificativa
-                justificativa_match = re.search(r'JUSTIFICATIVA:\s*(.+?)(?=\n[A-Z_]+:|$)', text, re.DOTALL | re.IGNORECASE)
-                if justificativa_match:
-                    reasoning = justificativa_match.group(1).strip()
-                
-                # Buscar confiança
-                confianca_match = re.search(r'CONFIANCA:\s*([0-9.]+)', text, re.IGNORECASE)
-                if confianca_match:
-                    try:
-                        confidence = float(confianca_match.group(1))
-                        confidence = max(0.0, min(1.0, confidence))  # Garantir range válido
-                    except:
-                        pass
-                
-                return SearchDecision(
-                    needs_vectordb=needs_vectordb,
-                    needs_lexml=needs_lexml,
-                    needs_web=needs_web,
-                    needs_jurisprudence=needs_jurisprudence,
-                    reasoning=reasoning,
-                    confidence=confidence,
-                    priority_order=priority_order
-                )
-                
-            except Exception as e:
-                logger.error("Erro no parsing da decisão", error=str(e))
-                # Retornar decisão padrão segura
-                return SearchDecision(
-                    needs_vectordb=True,
-                    needs_lexml=True,
-                    needs_web=True,
-                    needs_jurisprudence=True,
-                    reasoning="Erro no parsing - usando configuração padrão completa",
-                    confidence=0.8,
-                    priority_order=["vectordb", "lexml", "web"]
-                )
-        
-        decision = parse_decision_response(decision_text)
-        
-        logger.info("Decisão tomada com OpenRouter", 
-                   vectordb=decision.needs_vectordb,
-                   lexml=decision.needs_lexml,
-                   web=decision.needs_web,
-                   confidence=decision.confidence)
-        
-        # === ETAPA 2: BUSCA VECTORDB (OPENROUTER - meta-llama/llama-4-maverick:free) ===
-        logger.info("Etapa 2: Busca vectordb com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        vectordb_results = await execute_vectordb_search_openrouter(deps, query.text)
-        
-        logger.info("Busca vectordb OpenRouter concluída", 
-                   documents_found=vectordb_results.documents_found)
-        
-        # === ETAPA 2.1: BUSCAS WEB + LEXML (GROQ - llama-3.3-70b-versatile) ===
-        logger.info("Etapa 2.1: Buscas WEB + LexML com Groq (llama-3.3-70b-versatile)")
-        
-        groq_results = await execute_groq_searches(deps, query.text)
-        
-        logger.info("Buscas Groq concluídas", 
-                   total_sources=groq_results.total_sources)
-        
-        # === ETAPA 3: ANÁLISE JURÍDICA RAG (OPENROUTER - meta-llama/llama-4-maverick:free) ===
-        logger.info("Etapa 3: Análise jurídica com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        analysis_text = await analyze_with_openrouter(deps, query.text, vectordb_results, groq_results)
-        
-        logger.info("Análise OpenRouter concluída",
-                   text_length=len(analysis_text))
-        
-        # === ETAPA 4: SÍNTESE FINAL (OPENROUTER - meta-llama/llama-4-maverick:free) ===
-        logger.info("Etapa 4: Síntese final com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        response_text = await synthesize_with_openrouter(deps, query.text, analysis_text)
-        
-        logger.info("Síntese OpenRouter concluída",
-                   word_count=len(response_text.split()))
-        
-        # === ETAPA 5: VALIDAÇÃO DE QUALIDADE (OPENROUTER - meta-llama/llama-4-maverick:free) ===
-        logger.info("Etapa 5: Validação de qualidade com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        quality_assessment = await validate_with_openrouter(deps, response_text)
-        
-        logger.info("Validação OpenRouter concluída",
-                   quality_score=quality_assessment.overall_score)
-        
-        # === ETAPA 6: VERIFICAÇÃO DE GUARDRAILS (OPENROUTER - meta-llama/llama-4-maverick:free) ===
-        logger.info("Etapa 6: Verificação de guardrails com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        guardrail_check = await check_guardrails_with_openrouter(deps, response_text)
-        
-        logger.info("Guardrails OpenRouter concluídos",
-                   passed=guardrail_check.passed)
-        
-        # === CRIAR RESPOSTA FINAL ===
-        final_response = FinalResponse(
-            query_id=query.id,
-            overall_summary=response_text,
-            status=Status.COMPLETED,
-            overall_confidence=quality_assessment.overall_score,
-            completeness_score=quality_assessment.completeness,
-            search_results=[],  # Simplificado para esta versão
-            detailed_analyses=[],  # Simplificado para esta versão
-            warnings=quality_assessment.improvement_suggestions if quality_assessment.needs_improvement else [],
-            disclaimer="Esta resposta foi gerada por sistema de IA integrado e está suscetível a erro. Para qualquer conclusão e tomada de descisão procure um advogado credenciado e qualificado."
-        )
-        
-        # Adicionar avisos de guardrails se necessário
-        if not guardrail_check.passed:
-            for violation in guardrail_check.violations:
-                final_response.warnings.append(f"Atenção: {violation}")
-        
-        logger.info("Processamento híbrido CORRETO concluído com sucesso",
-                   query_id=final_response.query_id,
-                   status=final_response.status,
-                   confidence=final_response.overall_confidence)
-        
-        return final_response
-        
-    except Exception as e:
-        logger.error("Erro crítico no processamento híbrido CORRETO", 
-                    error=str(e), 
-                    query_id=query.id)
-        
-        # Retornar resposta de erro
-        return FinalResponse(
-            query_id=query.id,
-            overall_summary=f"Desculpe, ocorreu um erro no sistema híbrido durante o processamento da sua consulta jurídica. O sistema OpenRouter + Groq encontrou dificuldades técnicas que impediram a conclusão da análise. Este tipo de erro pode ser temporário e recomendamos tentar novamente em alguns minutos. Se o problema persistir, entre em contato com o suporte técnico para assistência especializada.",
-            status=Status.FAILED,
-            warnings=["Falha no sistema híbrido OpenRouter + Groq"],
-            disclaimer="Sistema indisponível. Tente novamente mais tarde."
-        )
+    cache.put(final_response_cache_key(query, deps.config), final_response.model_copy(deep=True))
+
+
+# Disclaimer das respostas concluídas pelo workflow híbrido
+_DISCLAIMER: Final[str] = "Esta resposta foi gerada por sistema de IA integrado e está suscetível a erro. Para qualquer conclusão e tomada de descisão procure um advogado credenciado e qualificado."
+
+
+def build_final_response(
+    query_id: str,
+    response_text: str,
+    quality_assessment: QualityAssessment,
+    guardrail_check: GuardrailCheck
+) -> FinalResponse:
+    """
+    FinalResponse concluída sem revalidar campos que vêm de modelos já validados. Só
+    overall_summary (texto do LLM, com limites e validador de qualidade) é validado, pela
+    atribuição com validate_assignment: falhas continuam levantando ValidationError.
+    """
+    final_response = FinalResponse.model_construct(
+        query_id=query_id,
+        status=Status.COMPLETED,
+        overall_confidence=quality_assessment.overall_score,
+        completeness_score=quality_assessment.completeness,
+        warnings=_final_warnings(quality_assessment, guardrail_check),
+        disclaimer=_DISCLAIMER
+    )
+    final_response.overall_summary = response_text
+    return final_response
+
+
+# Serializador do evento "final" com o schema de FinalResponse construído uma única vez;
+# continua produzindo dict (modo python) porque é o formato consumido pela interface
+_dump_final_response = TypeAdapter(FinalResponse).dump_python
+
+
+def final_response_payload(final_response: FinalResponse) -> Dict[str, Any]:
+    """Payload do evento "final" (equivalente a model_dump, sem avisos de serialização)."""
+    return _dump_final_response(final_response, warnings=False)
+
+
+# Resposta de erro do workflow híbrido: idêntica em toda falha, validada uma única vez na importação
+_ERROR_RESPONSE_TEMPLATE: Dict[str, Any] = {
+    "overall_summary": "Desculpe, ocorreu um erro no sistema híbrido durante o processamento da sua consulta jurídica. O sistema OpenRouter + Groq encontrou dificuldades técnicas que impediram a conclusão da análise. Este tipo de erro pode ser temporário e recomendamos tentar novamente em alguns minutos. Se o problema persistir, entre em contato com o suporte técnico para assistência especializada.",
+    "status": Status.FAILED,
+    "warnings": ("Falha no sistema híbrido OpenRouter + Groq",),
+    "disclaimer": "Sistema indisponível. Tente novamente mais tarde."
+}
+_ERROR_RESPONSE_TEMPLATE_DUMP: Dict[str, Any] = final_response_payload(FinalResponse(
+    query_id="template", **_ERROR_RESPONSE_TEMPLATE
+))
+
+
+def error_response_payload(query_id: str) -> Dict[str, Any]:
+    """Payload (model_dump) da resposta de erro, sem nova validação pydantic por falha."""
+    return {
+        **_ERROR_RESPONSE_TEMPLATE_DUMP,
+        "response_id": str(uuid.uuid4()),
+        "query_id": query_id,
+        "warnings": list(_ERROR_RESPONSE_TEMPLATE["warnings"]),
+        "detailed_analyses": [],
+        "search_results": [],
+        "generated_at": datetime.now()
+    }
 
 
-async def process_legal_query_hybrid_corrected_streaming(
+def build_error_response(query_id: str) -> FinalResponse:
+    """Resposta de erro padrão como modelo (processamento em lote), sem revalidar o template."""
+    return FinalResponse.model_construct(
+        query_id=query_id,
+        **{**_ERROR_RESPONSE_TEMPLATE, "warnings": list(_ERROR_RESPONSE_TEMPLATE["warnings"])}
+    )
+
+
+# Resposta de erro do fluxo integrado ao CRAG, que inclui a mensagem da exceção
+_ERROR_SUMMARY: Final[str] = "Erro no sistema híbrido integrado: {err}. O sistema CRAG + OpenRouter + Groq encontrou dificuldades técnicas. Tente novamente."
+_CRAG_ERROR_WARNING: Final[str] = "Falha no sistema híbrido integrado"
+_CRAG_ERROR_DISCLAIMER: Final[str] = "Sistema integrado indisponível. Tente novamente mais tarde."
+
+
+def crag_error_response(query_id: str, error: Exception) -> FinalResponse:
+    """
+    Resposta de erro do fluxo CRAG via model_construct: o caminho de falha não passa pelos
+    validadores (nem pode falhar neles, p.ex. com uma mensagem de exceção longa demais).
+    """
+    return FinalResponse.model_construct(
+        query_id=query_id,
+        overall_summary=_ERROR_SUMMARY.format(err=error),
+        status=Status.FAILED,
+        warnings=[_CRAG_ERROR_WARNING],
+        disclaimer=_CRAG_ERROR_DISCLAIMER
+    )
+
+
+def progress_event(*messages: str) -> Tuple[str, str]:
+    """
+    Evento de progresso único para etapas anunciadas em sequência, sem await entre elas:
+    um quadro só no consumidor em vez de um por mensagem (mensagens repetidas são descartadas).
+    """
+    return ("progress", " · ".join(dict.fromkeys(messages)))
+
+
+# Trechos da síntese que podem ficar à frente do consumidor: o stream do OpenRouter continua
+# sendo drenado (e as Etapas 5/6 antecipadas alimentadas) enquanto o consumidor está ocupado
+SYNTHESIS_BUFFER_CHUNKS = 64
+_STREAM_END = object()
+
+
+async def buffered_stream(
+    source: Any,
+    maxsize: int = SYNTHESIS_BUFFER_CHUNKS,
+    on_chunk: Optional[Callable[[str], None]] = None
+):
+    """
+    Reentrega os trechos de source a partir de uma fila limitada preenchida por uma task
+    produtora. on_chunk é chamado na produção, assim que cada trecho chega. Erros do source
+    são relançados no consumidor; se o consumidor encerrar antes, a produção é cancelada.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    
+    async def produce() -> None:
+        try:
+            async for chunk in source:
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+            return
+        finally:
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await queue.put(_STREAM_END)
+    
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if not producer.done():
+            producer.cancel()
+        # Aguarda a produtora encerrar (source fechado, sem on_chunk em voo) antes de devolver o
+        # controle; asyncio.wait não relança o CancelledError da produtora, mas respeita o
+        # cancelamento da task consumidora
+        await asyncio.wait((producer,))
+        if not producer.cancelled():
+            producer.exception()  # Marca como lida: sem aviso de exceção não recuperada
+
+
+async def _single_chunk_stream(text: str):
+    """Entrega um texto já completo (síntese fundida ou em lote) pelo mesmo caminho do streaming."""
+    yield text
+
+
+# ===============================
+# FUNÇÃO PRINCIPAL DO WORKFLOW HÍBRIDO CORRETO
+# ===============================
+
+async def process_legal_query_hybrid_corrected(
     query: LegalQuery,
     config: Optional[ProcessingConfig] = None,
     user_id: Optional[str] = None
+) -> FinalResponse:
+    """
+    Processa consulta jurídica com workflow híbrido CORRETO:
+    - OpenRouter: Decisão, vectordb, análise, síntese, validação, guardrails  
+    - Groq: Apenas buscas WEB + LexML com tools
+    
+    Implementação única: consome process_legal_query_hybrid_corrected_streaming, descartando
+    os eventos de progresso e streaming, e retorna a resposta final. Sem consumidor de
+    trechos, a síntese usa o caminho não-streaming (cache exato, orçamentos por seção e
+    expansão de seções curtas).
+    """
+    
+    final_payload: Optional[Dict[str, Any]] = None
+    async for stage, payload in process_legal_query_hybrid_corrected_streaming(
+        query, config, user_id, stream_synthesis=False
+    ):
+        if stage == "final":
+            final_payload = payload
+    
+    if final_payload is None:
+        logger.error("Processamento híbrido encerrado sem resposta final", query_id=query.id)
+        return build_error_response(query.id)
+    
+    try:
+        return FinalResponse.model_validate(final_payload)
+    except ValidationError as e:
+        logger.error("Resposta final híbrida inválida", error=str(e), query_id=query.id)
+        return build_error_response(query.id)
+
+
+async def process_legal_query_hybrid_corrected_streaming(
+    query: LegalQuery,
+    config: Optional[ProcessingConfig] = None,
+    user_id: Optional[str] = None,
+    *,
+    stream_synthesis: bool = True
 ):
     """
     Processa consulta jurídica com workflow híbrido CORRETO e streaming na síntese.
     Yield: (etapa, conteudo) onde etapa pode ser 'progress', 'streaming', 'final'
+    Com stream_synthesis=False a síntese é gerada inteira e entregue como um só trecho.
     """
     
     logger.info("Iniciando processamento híbrido CORRETO com streaming",
@@ -1473,6 +2961,10 @@ async def process_legal_query_hybrid_corrected_streaming(
                openrouter_role="Decisão + vectordb + análise + síntese + validação + guardrails",
                groq_role="Apenas WEB + LexML")
     
+    vectordb_task: Optional[asyncio.Task] = None
+    groq_task: Optional[asyncio.Task] = None
+    incremental_validation: Optional[IncrementalValidation] = None
+    
     try:
         # Configurar dependências
         if config is None:
@@ -1480,93 +2972,29 @@ async def process_legal_query_hybrid_corrected_streaming(
         
         deps = AgentDependencies(
             config=config,
-            session_id=str(uuid.uuid4()),
+            session_id=new_session_id(),
             user_id=user_id,
+            http_client=get_shared_http_client(),
+            query_embedding=await embed_query(query.text),
             shared_state={}
         )
         
-        # === ETAPA 1: DECISÃO DE BUSCA (OPENROUTER) ===
-        yield ("progress", "🧠 Analisando consulta (OpenRouter)...")
-        logger.info("Etapa 1: Decisão de busca com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        decision_result = await search_decision_agent.run(
-            f"Analise esta consulta jurídica e decida quais buscas realizar: {query.text}",
-            deps=deps
-        )
+        cached_response = get_cached_final_response(deps, query)
+        if cached_response is not None:
+            logger.info("Resposta final recuperada do cache", query_id=query.id)
+            yield ("progress", "⚡ Resposta recuperada do cache...")
+            yield ("streaming", cached_response.overall_summary)
+            yield ("final", final_response_payload(cached_response))
+            return
         
-        # Processar resposta de texto do search decision
-        decision_text: str = decision_result.output
+        # === ETAPAS 2 + 2.1 (especulativas): buscas disparadas junto com a decisão ===
+        vectordb_task, groq_task = start_search_prefetch(deps, query.text)
         
-        # Fazer parsing manual da decisão
-        def parse_decision_response(text: str) -> SearchDecision:
-            """Parse manual da resposta estruturada em texto do search decision."""
-            try:
-                import re
-                
-                # Valores padrão
-                needs_vectordb = True  # Sempre buscar vectordb
-                needs_lexml = True
-                needs_web = True  
-                needs_jurisprudence = True
-                reasoning = "Análise jurídica completa necessária"
-                confidence = 0.8
-                priority_order = ["vectordb", "lexml", "web"]
-                
-                # Extrair informações usando regex
-                vectordb_match = re.search(r'VECTORDB:\s*(SIM|NAO)', text, re.IGNORECASE)
-                if vectordb_match:
-                    needs_vectordb = vectordb_match.group(1).upper() == 'SIM'
-                
-                lexml_match = re.search(r'LEXML:\s*(SIM|NAO)', text, re.IGNORECASE)
-                if lexml_match:
-                    needs_lexml = lexml_match.group(1).upper() == 'SIM'
-                
-                web_match = re.search(r'WEB:\s*(SIM|NAO)', text, re.IGNORECASE)
-                if web_match:
-                    needs_web = web_match.group(1).upper() == 'SIM'
-                
-                jurisprudencia_match = re.search(r'JURISPRUDENCIA:\s*(SIM|NAO)', text, re.IGNORECASE)
-                if jurisprudencia_match:
-                    needs_jurisprudence = jurisprudencia_match.group(1).upper() == 'SIM'
-                
-                # Buscar justificativa
-                justificativa_match = re.search(r'JUSTIFICATIVA:\s*(.+?)(?=\n[A-Z_]+:|$)', text, re.DOTALL | re.IGNORECASE)
-                if justificativa_match:
-                    reasoning = justificativa_match.group(1).strip()
-                
-                # Buscar confiança
-                confianca_match = re.search(r'CONFIANCA:\s*([0-9.]+)', text, re.IGNORECASE)
-                if confianca_match:
-                    try:
-                        confidence = float(confianca_match.group(1))
-                        confidence = max(0.0, min(1.0, confidence))  # Garantir range válido
-                    except:
-                        pass
-                
-                return SearchDecision(
-                    needs_vectordb=needs_vectordb,
-                    needs_lexml=needs_lexml,
-                    needs_web=needs_web,
-                    needs_jurisprudence=needs_jurisprudence,
-                    reasoning=reasoning,
-                    confidence=confidence,
-                    priority_order=priority_order
-                )
-                
-            except Exception as e:
-                logger.error("Erro no parsing da decisão", error=str(e))
-                # Retornar decisão padrão segura
-                return SearchDecision(
-                    needs_vectordb=True,
-                    needs_lexml=True,
-                    needs_web=True,
-                    needs_jurisprudence=True,
-                    reasoning="Erro no parsing - usando configuração padrão completa",
-                    confidence=0.8,
-                    priority_order=["vectordb", "lexml", "web"]
-                )
+        # === ETAPA 1: DECISÃO DE BUSCA (OPENROUTER) ===
+        yield ("progress", "🧠 Analisando consulta (OpenRouter)...")
+        logger.info("Etapa 1: Decisão de busca com OpenRouter (meta-llama/llama-3.2-3b-instruct:free)")
         
-        decision = parse_decision_response(decision_text)
+        decision = await decide_search_with_openrouter(deps, query.text)
         
         logger.info("Decisão tomada com OpenRouter", 
                    vectordb=decision.needs_vectordb,
@@ -1574,89 +3002,105 @@ async def process_legal_query_hybrid_corrected_streaming(
                    web=decision.needs_web,
                    confidence=decision.confidence)
         
-        # === ETAPA 2: BUSCA VECTORDB (OPENROUTER) ===
-        yield ("progress", "📚 Buscando no vectordb (OpenRouter)...")
-        logger.info("Etapa 2: Busca vectordb com OpenRouter (meta-llama/llama-4-maverick:free)")
+        # === ETAPAS 2 + 2.1: VECTORDB (OPENROUTER) E WEB + LEXML (GROQ) EM PARALELO ===
+        yield progress_event("📚 Buscando no vectordb (OpenRouter)...", "🔍 Buscando WEB + LexML (Groq)...")
+        logger.info("Etapas 2 + 2.1: Busca vectordb (OpenRouter) e WEB + LexML (Groq) em paralelo")
         
-        vectordb_results = await execute_vectordb_search_openrouter(deps, query.text)
+        vectordb_results, groq_results = await resolve_search_prefetch(decision, vectordb_task, groq_task)
         
-        logger.info("Busca vectordb OpenRouter concluída", 
-                   documents_found=vectordb_results.documents_found)
-        
-        # === ETAPA 2.1: BUSCAS WEB + LEXML (GROQ) ===
-        yield ("progress", "🔍 Buscando WEB + LexML (Groq)...")
-        logger.info("Etapa 2.1: Buscas WEB + LexML com Groq (llama-3.3-70b-versatile)")
-        
-        groq_results = await execute_groq_searches(deps, query.text)
-        
-        logger.info("Buscas Groq concluídas", 
+        logger.info("Buscas vectordb e Groq concluídas", 
+                   documents_found=vectordb_results.documents_found,
                    total_sources=groq_results.total_sources)
         
-        # === ETAPA 3: ANÁLISE JURÍDICA RAG (OPENROUTER) ===
-        yield ("progress", "🧠 Analisando resultados (OpenRouter)...")
-        logger.info("Etapa 3: Análise jurídica com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        analysis_text = await analyze_with_openrouter(deps, query.text, vectordb_results, groq_results)
-        
-        logger.info("Análise OpenRouter concluída",
-                   text_length=len(analysis_text))
-        
-        # === ETAPA 4: SÍNTESE FINAL COM STREAMING (OPENROUTER) ===
-        yield ("progress", "✍️ Gerando resposta (OpenRouter)...")
-        logger.info("Etapa 4: Síntese final com streaming (OpenRouter - meta-llama/llama-4-maverick:free)")
+        # Etapas 5/6 consomem o texto da síntese enquanto ele chega
+        if config.enable_incremental_validation and not config.enable_fused_validation:
+            incremental_validation = IncrementalValidation(deps)
         
-        # Streaming da síntese
-        full_response_text = ""
-        async for chunk in synthesize_with_openrouter_streaming(deps, query.text, analysis_text):
-            # Acumular todo o conteúdo
-            full_response_text += chunk
-            yield ("streaming", chunk)
+        if config.enable_fused_analysis_synthesis:
+            # === ETAPAS 3+4: ANÁLISE + SÍNTESE FUNDIDAS (OPENROUTER) ===
+            yield ("progress", "🧠 Analisando e gerando resposta (OpenRouter)...")
+            logger.info("Etapas 3+4: Análise + síntese fundidas com OpenRouter (meta-llama/llama-4-maverick:free)")
+            
+            analysis_text, fused_response_text = await analyze_and_synthesize_with_openrouter(
+                deps, query.text, vectordb_results, groq_results
+            )
+            synthesis_chunks = _single_chunk_stream(fused_response_text)
+        else:
+            # === ETAPA 3: ANÁLISE JURÍDICA RAG (OPENROUTER) ===
+            yield ("progress", "🧠 Analisando resultados (OpenRouter)...")
+            logger.info("Etapa 3: Análise jurídica com OpenRouter (meta-llama/llama-4-maverick:free)")
+            
+            # A Etapa 3 só é dispensada se todas as buscas rodaram e voltaram vazias
+            analysis_text = await analyze_with_openrouter(
+                deps, query.text, vectordb_results, groq_results,
+                decision_searches_ran(decision, vectordb_results, groq_results)
+            )
+            
+            logger.info("Análise OpenRouter concluída",
+                       text_length=len(analysis_text))
+            
+            # === ETAPA 4: SÍNTESE FINAL COM STREAMING (OPENROUTER) ===
+            yield ("progress", "✍️ Gerando resposta (OpenRouter)...")
+            logger.info("Etapa 4: Síntese final com streaming (OpenRouter - meta-llama/llama-4-maverick:free)")
+            
+            if config.enable_batch_synthesis or not stream_synthesis:
+                # Síntese em lote ou sem consumidor de trechos: gerada inteira (com cache e
+                # expansão de seções curtas) e entregue como um só trecho
+                synthesis_chunks = _single_chunk_stream(
+                    await synthesize_with_openrouter(deps, query.text, analysis_text)
+                )
+            else:
+                synthesis_chunks = synthesize_with_openrouter_streaming(deps, query.text, analysis_text)
+        
+        # Streaming da síntese (trechos acumulados em lista e unidos uma única vez no fim),
+        # desacoplado do consumidor por uma fila limitada
+        response_parts: List[str] = []
+        # aclosing: se o consumidor abandonar o stream, a produtora é encerrada antes do
+        # cancelamento das validações antecipadas no finally
+        async with contextlib.aclosing(buffered_stream(
+            synthesis_chunks,
+            on_chunk=incremental_validation.feed if incremental_validation is not None else None
+        )) as synthesis_stream:
+            async for chunk in synthesis_stream:
+                response_parts.append(chunk)
+                yield ("streaming", chunk)
+        full_response_text = "".join(response_parts)
         
         logger.info("Síntese OpenRouter streaming concluída",
-                   word_count=len(full_response_text.split()))
-        
-        # === ETAPA 5: VALIDAÇÃO DE QUALIDADE (OPENROUTER) ===
-        yield ("progress", "✅ Validando qualidade (OpenRouter)...")
-        logger.info("Etapa 5: Validação de qualidade com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        quality_assessment = await validate_with_openrouter(deps, full_response_text)
+                   word_count=_word_count(full_response_text))
         
-        logger.info("Validação OpenRouter concluída",
-                   quality_score=quality_assessment.overall_score)
-        
-        # === ETAPA 6: VERIFICAÇÃO DE GUARDRAILS (OPENROUTER) ===
-        yield ("progress", "🛡️ Verificando guardrails (OpenRouter)...")
-        logger.info("Etapa 6: Verificação de guardrails com OpenRouter (meta-llama/llama-4-maverick:free)")
-        
-        guardrail_check = await check_guardrails_with_openrouter(deps, full_response_text)
+        if config.enable_fused_validation:
+            # === ETAPAS 5+6: VALIDAÇÃO + GUARDRAILS FUNDIDOS (OPENROUTER) ===
+            yield ("progress", "✅ Validando qualidade e guardrails (OpenRouter)...")
+            logger.info("Etapas 5+6: Validação + guardrails fundidos com OpenRouter (meta-llama/llama-3.1-8b-instruct:free)")
+            
+            quality_assessment, guardrail_check = await validate_and_check_guardrails_with_openrouter(
+                deps, full_response_text
+            )
+        else:
+            # === ETAPAS 5 + 6: VALIDAÇÃO E GUARDRAILS (OPENROUTER) EM PARALELO ===
+            yield progress_event("✅ Validando qualidade (OpenRouter)...", "🛡️ Verificando guardrails (OpenRouter)...")
+            logger.info("Etapas 5 + 6: Validação de qualidade e guardrails com OpenRouter (meta-llama/llama-3.1-8b-instruct:free) em paralelo")
+            
+            if incremental_validation is not None:
+                quality_assessment, guardrail_check = await incremental_validation.finish(full_response_text)
+            else:
+                quality_assessment, guardrail_check = await execute_validation_concurrently(deps, full_response_text)
         
         logger.info("Guardrails OpenRouter concluídos",
                    passed=guardrail_check.passed)
         
         # === CRIAR RESPOSTA FINAL ===
-        final_response = FinalResponse(
-            query_id=query.id,
-            overall_summary=full_response_text,
-            status=Status.COMPLETED,
-            overall_confidence=quality_assessment.overall_score,
-            completeness_score=quality_assessment.completeness,
-            search_results=[],  # Simplificado para esta versão
-            detailed_analyses=[],  # Simplificado para esta versão
-            warnings=quality_assessment.improvement_suggestions if quality_assessment.needs_improvement else [],
-            disclaimer="Esta resposta foi gerada por sistema de IA integrado e está suscetível a erro. Para qualquer conclusão e tomada de descisão procure um advogado credenciado e qualificado."
-        )
+        final_response = build_final_response(query.id, full_response_text, quality_assessment, guardrail_check)
         
-        # Adicionar avisos de guardrails se necessário
-        if not guardrail_check.passed:
-            for violation in guardrail_check.violations:
-                final_response.warnings.append(f"Atenção: {violation}")
+        cache_final_response(deps, query, final_response, guardrail_check)
         
         logger.info("Processamento híbrido CORRETO com streaming concluído",
                    query_id=final_response.query_id,
                    status=final_response.status,
                    confidence=final_response.overall_confidence)
         
-        yield ("final", final_response.model_dump())
+        yield ("final", final_response_payload(final_response))
         
     except Exception as e:
         logger.error("Erro crítico no processamento híbrido CORRETO streaming", 
@@ -1664,15 +3108,277 @@ async def process_legal_query_hybrid_corrected_streaming(
                     query_id=query.id)
         
         # Retornar resposta de erro
-        error_response = FinalResponse(
-            query_id=query.id,
-            overall_summary=f"Desculpe, ocorreu um erro no sistema híbrido durante o processamento da sua consulta jurídica. O sistema OpenRouter + Groq encontrou dificuldades técnicas que impediram a conclusão da análise. Este tipo de erro pode ser temporário e recomendamos tentar novamente em alguns minutos. Se o problema persistir, entre em contato com o suporte técnico para assistência especializada.",
-            status=Status.FAILED,
-            warnings=["Falha no sistema híbrido OpenRouter + Groq"],
-            disclaimer="Sistema indisponível. Tente novamente mais tarde."
-        )
+        yield ("final", error_response_payload(query.id))
+    
+    finally:
+        # Stream interrompido (inclusive durante a decisão) ou erro: não deixar buscas
+        # especulativas nem validações antecipadas órfãs
+        for task in (vectordb_task, groq_task):
+            if task is not None and not task.done():
+                task.cancel()
+        if incremental_validation is not None:
+            incremental_validation.cancel()
+
+
+# Extração do texto dos documentos CRAG: despacho pelo tipo exato em vez de uma cadeia de
+# isinstance/hasattr por documento. Retorna (texto recortado, método usado no log)
+CRAG_DOC_MAX_CHARS = 500
+
+
+def _prefix(value: Any, n: int = CRAG_DOC_MAX_CHARS) -> str:
+    """Primeiros n caracteres de um valor (None vira ""); str curta é devolvida sem cópia."""
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = str(value)
+    return value[:n]
+
+
+def _write_bounded(value: Any, buf: io.StringIO, limit: int) -> bool:
+    """
+    Escreve em buf uma representação no estilo repr de value, percorrendo dicts, listas,
+    modelos pydantic e dataclasses campo a campo; strings são recortadas antes do repr.
+    Retorna True assim que limit caracteres foram escritos (o chamador interrompe a varredura).
+    """
+    remaining = limit - buf.tell()
+    if remaining <= 0:
+        return True
+    
+    if isinstance(value, str):
+        buf.write(repr(value[:remaining]))
+    elif isinstance(value, dict):
+        buf.write("{")
+        for i, (key, item) in enumerate(value.items()):
+            if i:
+                buf.write(", ")
+            buf.write(repr(key) + ": ")
+            if _write_bounded(item, buf, limit):
+                return True
+        buf.write("}")
+    elif isinstance(value, (list, tuple)):
+        opening, closing = ("[", "]") if isinstance(value, list) else ("(", ")")
+        buf.write(opening)
+        for i, item in enumerate(value):
+            if i:
+                buf.write(", ")
+            if _write_bounded(item, buf, limit):
+                return True
+        if len(value) == 1 and closing == ")":
+            buf.write(",")  # Tupla de um elemento: "(x,)", como no repr
+        buf.write(closing)
+    elif isinstance(value, BaseModel):
+        # Campo a campo, sem model_dump do objeto inteiro
+        return _write_bounded({name: getattr(value, name) for name in type(value).model_fields}, buf, limit)
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _write_bounded({f.name: getattr(value, f.name) for f in dataclasses.fields(value)}, buf, limit)
+    else:
+        buf.write(_prefix(repr(value), remaining))
+    
+    return buf.tell() >= limit
+
+
+def _summarize_results(obj: Any, max_chars: int = CRAG_DOC_MAX_CHARS) -> str:
+    """
+    Resumo de até max_chars caracteres dos resultados CRAG no formato de str(obj), sem
+    materializar o repr completo: a serialização para assim que o orçamento é atingido.
+    """
+    if isinstance(obj, str):
+        return obj[:max_chars]
+    
+    buf = io.StringIO()
+    _write_bounded(obj, buf, max_chars)
+    return buf.getvalue()[:max_chars]
+
+
+_CRAG_DICT_KEYS = (("content", "dict_content"), ("page_content", "dict_page_content"), ("text", "dict_text"))
+
+
+def _crag_text_from_dict(doc: Dict[str, Any]) -> Tuple[str, str]:
+    for key, method in _CRAG_DICT_KEYS:
+        if key in doc:
+            return _prefix(doc[key]), method
+    return "", "none"
+
+
+def _crag_text_from_str(doc: str) -> Tuple[str, str]:
+    return _prefix(doc), "string"
+
+
+_CRAG_DOC_EXTRACTORS = {dict: _crag_text_from_dict, str: _crag_text_from_str}
+
+
+def extract_crag_doc_text(doc: Any) -> Tuple[str, str]:
+    """Texto de um documento CRAG (dict do app.py, Document do LangChain ou string)."""
+    extractor = _CRAG_DOC_EXTRACTORS.get(type(doc))
+    if extractor is not None:
+        return extractor(doc)
+    
+    # Fallback para documentos não processados (e subclasses de dict/str)
+    page_content = getattr(doc, 'page_content', None)
+    if page_content is not None:
+        return _prefix(page_content), "attr_page_content"
+    content = getattr(doc, 'content', None)
+    if content is not None:
+        return _prefix(content), "attr_content"
+    if isinstance(doc, dict):
+        return _crag_text_from_dict(doc)
+    if isinstance(doc, str):
+        return _crag_text_from_str(doc)
+    return "", "none"
+
+
+def _extract_crag_snippets(
+    docs: Optional[List],
+    tavily: Optional[List],
+    lexml: Optional[List],
+    log_each_doc: bool = False
+) -> Tuple[List[str], int, Dict[str, Any]]:
+    """
+    Trechos dos dados CRAG (top 5 documentos + top 2 Tavily + top 2 LexML), número de
+    documentos recebidos e log de processamento. Python puro sobre trechos já recortados,
+    executado inline no orquestrador CRAG.
+    """
+    crag_snippets: List[str] = []
+    docs_count = len(docs) if docs else 0
+    
+    # LOG DETALHADO: Processamento de documentos CRAG (entradas por documento só em DEBUG)
+    docs_processing_log: Dict[str, Any] = {
+        "processed_docs": [], "skipped_docs": [],
+        "processed_count": 0, "skipped_count": 0, "total_content_length": 0
+    }
+    
+    for i, doc in enumerate(docs[:5] if docs else ()):  # Top 5 documentos
+        # CORREÇÃO: Processar estrutura de documentos processados pelo app.py - RASTREADO
+        doc_text, processing_method = extract_crag_doc_text(doc)
+        stripped_text = doc_text.strip()
+        
+        if stripped_text:
+            crag_snippets.append(stripped_text)
+            docs_processing_log["processed_count"] += 1
+            docs_processing_log["total_content_length"] += len(doc_text)
+        else:
+            docs_processing_log["skipped_count"] += 1
         
-        yield ("final", error_response.model_dump())
+        if log_each_doc:
+            doc_log = {
+                "index": i,
+                "doc_type": type(doc).__name__,
+                "doc_source": doc.get('source', 'dict_unknown') if isinstance(doc, dict) else "unknown",
+                "processing_method": processing_method,
+                "text_length": len(doc_text),
+                "text_preview": doc_text[:50] + "..." if len(doc_text) > 50 else doc_text,
+                "successfully_extracted": bool(stripped_text)
+            }
+            docs_processing_log["processed_docs" if stripped_text else "skipped_docs"].append(doc_log)
+    
+    # CORREÇÃO: Adicionar conteúdo Tavily e LexML do CRAG aos snippets se disponível (top 2 de cada)
+    for items in (tavily, lexml):
+        for item in (items[:2] if items else ()):
+            if isinstance(item, dict) and 'content' in item:
+                crag_snippets.append(_prefix(item['content']))
+            elif isinstance(item, str):
+                crag_snippets.append(_prefix(item))
+    
+    return crag_snippets, docs_count, docs_processing_log
+
+
+def _crag_received_summary(docs: Optional[List], tavily: Optional[List], lexml: Optional[List]) -> Dict[str, Any]:
+    """Resumo do checkpoint de recebimento dos dados CRAG."""
+    return {
+        "crag_docs_received": len(docs) if docs else 0,
+        "crag_tavily_received": len(tavily) if tavily else 0,
+        "crag_lexml_received": len(lexml) if lexml else 0,
+        "crag_docs_type": type(docs).__name__ if docs else "None",
+        "crag_tavily_type": type(tavily).__name__ if tavily else "None",
+        "crag_lexml_type": type(lexml).__name__ if lexml else "None"
+    }
+
+
+def _crag_docs_sample(docs: List) -> List[Dict[str, Any]]:
+    """Amostra dos 2 primeiros documentos CRAG para o checkpoint."""
+    return [
+        {
+            "index": i,
+            "type": type(doc).__name__,
+            "has_content": 'content' in doc if isinstance(doc, dict) else hasattr(doc, 'page_content'),
+            "content_preview": (doc.get('content', '')[:100] if isinstance(doc, dict)
+                              else getattr(doc, 'page_content', '')[:100] if hasattr(doc, 'page_content')
+                              else _summarize_results(doc, 100))
+        }
+        for i, doc in enumerate(docs[:2])
+    ]
+
+
+def _crag_results_sample(results: List) -> List[Dict[str, Any]]:
+    """Amostra do primeiro resultado Tavily/LexML do CRAG para o checkpoint."""
+    return [
+        {
+            "index": i,
+            "type": type(result).__name__,
+            "keys": list(result.keys()) if isinstance(result, dict) else "not_dict",
+            "preview": _summarize_results(result, 100)
+        }
+        for i, result in enumerate(results[:1])
+    ]
+
+
+# Prompt de análise integrada (CRAG + Groq): layout fixo definido uma única vez; por consulta
+# só os campos variáveis são formatados, com os recortes limitados de _summarize_results
+CRAG_ANALYSIS_PROMPT_TEMPLATE = """
+        Analise esta consulta jurídica integrando dados de múltiplas fontes:
+        
+        CONSULTA ORIGINAL: {query}
+        
+        {crag_data_summary}
+        
+        DADOS COMPLEMENTARES GROQ:
+        - Total de fontes: {groq.total_sources}
+        - Resumo: {groq.summary}
+        - Resultados web: {groq.web_results}
+        - Resultados LexML: {groq.lexml_results}
+        
+        Forneça uma análise jurídica INTEGRADA que correlacione:
+        1. Documentos indexados (CRAG) com informações complementares (Groq)
+        2. Legislação aplicável de ambas as fontes
+        3. Jurisprudência combinada
+        4. Síntese unificada dos princípios jurídicos
+        
+        IMPORTANTE: Mesmo com dados limitados, forneça análise jurídica completa e fundamentada.
+        """
+CRAG_VECTORDB_SECTION_TEMPLATE = """
+        DADOS CRAG (DOCUMENTOS INDEXADOS):
+        - Documentos encontrados: {vectordb.documents_found}
+        - Resumo: {vectordb.summary}
+        - Trechos relevantes: {snippets}...
+        """
+CRAG_NO_DATA_SECTION = "DADOS CRAG: Nenhum documento específico fornecido, use conhecimento jurídico geral"
+
+
+def build_crag_analysis_prompt(
+    query: str,
+    vectordb_results: VectorSearchResult,
+    groq_results: GroqSearchResult,
+    crag_tavily_results: Optional[List] = None,
+    crag_lexml_results: Optional[List] = None
+) -> str:
+    """Monta o prompt da análise integrada a partir dos dados CRAG e das buscas Groq."""
+    
+    sections: List[str] = []
+    if vectordb_results.documents_found > 0:
+        sections.append(CRAG_VECTORDB_SECTION_TEMPLATE.format(
+            vectordb=vectordb_results,
+            snippets=', '.join(vectordb_results.relevant_snippets[:3])
+        ))
+    if crag_tavily_results:
+        sections.append(f"\n\nDADOS TAVILY CRAG:\n{_summarize_results(crag_tavily_results)}...")
+    if crag_lexml_results:
+        sections.append(f"\n\nDADOS LEXML CRAG:\n{_summarize_results(crag_lexml_results)}...")
+    
+    return CRAG_ANALYSIS_PROMPT_TEMPLATE.format(
+        query=query,
+        crag_data_summary="".join(sections) or CRAG_NO_DATA_SECTION,
+        groq=groq_results
+    )
 
 
 async def process_legal_query_hybrid_with_crag_data(
@@ -1693,57 +3399,30 @@ async def process_legal_query_hybrid_with_crag_data(
     # CHECKPOINT CRÍTICO: RECEBIMENTO DE DADOS CRAG
     # ===================================================================
     
-    # LOG DETALHADO: O que chegou ao sistema híbrido
-    received_data_summary = {
-        "crag_docs_received": len(crag_retrieved_docs) if crag_retrieved_docs else 0,
-        "crag_tavily_received": len(crag_tavily_results) if crag_tavily_results else 0,
-        "crag_lexml_received": len(crag_lexml_results) if crag_lexml_results else 0,
-        "crag_docs_type": type(crag_retrieved_docs).__name__ if crag_retrieved_docs else "None",
-        "crag_tavily_type": type(crag_tavily_results).__name__ if crag_tavily_results else "None",
-        "crag_lexml_type": type(crag_lexml_results).__name__ if crag_lexml_results else "None"
-    }
-    
-    log_data_flow_checkpoint("hybrid_received_crag_data", received_data_summary)
+    # LOG DETALHADO: O que chegou ao sistema híbrido (resumos montados fora do caminho crítico)
+    log_data_flow_checkpoint_background(
+        "hybrid_received_crag_data",
+        lambda: _crag_received_summary(crag_retrieved_docs, crag_tavily_results, crag_lexml_results)
+    )
     
     # LOG AMOSTRAS DOS DADOS RECEBIDOS
     if crag_retrieved_docs:
-        sample_docs = []
-        for i, doc in enumerate(crag_retrieved_docs[:2]):  # Primeiros 2 documentos
-            doc_sample = {
-                "index": i,
-                "type": type(doc).__name__,
-                "has_content": 'content' in doc if isinstance(doc, dict) else hasattr(doc, 'page_content'),
-                "content_preview": (doc.get('content', '')[:100] if isinstance(doc, dict) 
-                                  else getattr(doc, 'page_content', '')[:100] if hasattr(doc, 'page_content')
-                                  else str(doc)[:100])
-            }
-            sample_docs.append(doc_sample)
-        
-        log_data_flow_checkpoint("hybrid_crag_docs_sample", {"docs_sample": sample_docs})
+        log_data_flow_checkpoint_background(
+            "hybrid_crag_docs_sample",
+            lambda: {"docs_sample": _crag_docs_sample(crag_retrieved_docs)}
+        )
     
     if crag_tavily_results:
-        tavily_sample = []
-        for i, result in enumerate(crag_tavily_results[:1]):  # Primeiro resultado
-            tavily_sample.append({
-                "index": i,
-                "type": type(result).__name__,
-                "keys": list(result.keys()) if isinstance(result, dict) else "not_dict",
-                "preview": str(result)[:100]
-            })
-        
-        log_data_flow_checkpoint("hybrid_tavily_sample", {"tavily_sample": tavily_sample})
+        log_data_flow_checkpoint_background(
+            "hybrid_tavily_sample",
+            lambda: {"tavily_sample": _crag_results_sample(crag_tavily_results)}
+        )
     
     if crag_lexml_results:
-        lexml_sample = []
-        for i, result in enumerate(crag_lexml_results[:1]):  # Primeiro resultado  
-            lexml_sample.append({
-                "index": i,
-                "type": type(result).__name__,
-                "keys": list(result.keys()) if isinstance(result, dict) else "not_dict",
-                "preview": str(result)[:100]
-            })
-        
-        log_data_flow_checkpoint("hybrid_lexml_sample", {"lexml_sample": lexml_sample})
+        log_data_flow_checkpoint_background(
+            "hybrid_lexml_sample",
+            lambda: {"lexml_sample": _crag_results_sample(crag_lexml_results)}
+        )
     
     logger.info("Iniciando processamento híbrido CORRETO com dados CRAG",
                query_id=query.id,
@@ -1751,6 +3430,8 @@ async def process_legal_query_hybrid_with_crag_data(
                crag_tavily=len(crag_tavily_results) if crag_tavily_results else 0,
                crag_lexml=len(crag_lexml_results) if crag_lexml_results else 0)
     
+    groq_task: Optional[asyncio.Task] = None
+    incremental_validation: Optional[IncrementalValidation] = None
     try:
         # Configurar dependências
         if config is None:
@@ -1758,14 +3439,27 @@ async def process_legal_query_hybrid_with_crag_data(
         
         deps = AgentDependencies(
             config=config,
-            session_id=str(uuid.uuid4()),
+            session_id=new_session_id(),
             user_id=user_id,
+            http_client=get_shared_http_client(),
+            query_embedding=await embed_query(query.text),
             shared_state={}
         )
         
-        # === ETAPA 1: DECISÃO DE BUSCA (OPENROUTER) ===
-        yield ("progress", "🧠 Analisando consulta (OpenRouter)...")
-        logger.info("Etapa 1: Decisão de busca com OpenRouter (meta-llama/llama-4-maverick:free)")
+        cached_response = get_cached_final_response(deps, query, crag_final_response_cache)
+        if cached_response is not None:
+            logger.info("Resposta integrada recuperada do cache", query_id=query.id)
+            yield ("progress", "⚡ Resposta recuperada do cache...")
+            yield ("streaming", cached_response.overall_summary)
+            yield ("final", final_response_payload(cached_response))
+            return
+        
+        # Etapa 2.1 não depende dos dados CRAG: as buscas Groq começam já, em paralelo
+        # com a conversão dos documentos CRAG (latência = máx. das duas, não a soma)
+        groq_task = asyncio.create_task(execute_groq_searches(deps, query.text))
+        
+        # === ETAPA 1: DECISÃO DE BUSCA (fixa: os dados CRAG já foram coletados) ===
+        logger.info("Etapa 1: Decisão de busca fixa para dados CRAG (sem chamada ao OpenRouter)")
         
         # Usar decisão otimizada já que temos dados do CRAG
         decision = SearchDecision(
@@ -1783,94 +3477,50 @@ async def process_legal_query_hybrid_with_crag_data(
                    confidence=decision.confidence)
         
         # === ETAPA 2: USAR DADOS CRAG (ao invés de busca vectordb) ===
-        yield ("progress", "📚 Processando dados CRAG existentes...")
         logger.info("Etapa 2: Usando dados CRAG em vez de busca vectordb")
         
         # ===================================================================
         # CONVERSÃO CRÍTICA: Dados CRAG → VectorSearchResult (RASTREADO)
         # ===================================================================
         
-        # Converter dados CRAG para formato VectorSearchResult - CORRIGIDO E RASTREADO
-        crag_snippets = []
-        docs_count = 0
+        # Converter dados CRAG para formato VectorSearchResult - CORRIGIDO E RASTREADO.
+        # Extração inline: são poucos recortes de até CRAG_DOC_MAX_CHARS por documento (mais
+        # baratos que um salto para thread); a busca Groq segue em background enquanto isso
+        yield progress_event("📚 Processando dados CRAG existentes...", "🔍 Buscas complementares WEB + LexML (Groq)...")
+        logger.info("Etapa 2.1: Buscas WEB + LexML complementares com Groq (em paralelo com o CRAG)")
+        
+        # Uma perna com falha não derruba a outra: a análise segue com o contexto parcial
+        try:
+            extraction = _extract_crag_snippets(
+                crag_retrieved_docs,
+                crag_tavily_results,
+                crag_lexml_results,
+                logger.is_enabled_for(logging.DEBUG)
+            )
+            crag_extraction_ok = True
+        except Exception as e:
+            logger.error("Erro na conversão dos dados CRAG", error=str(e))
+            extraction = ([], 0, {"error": str(e)})
+            crag_extraction_ok = False
+        crag_snippets, docs_count, docs_processing_log = extraction
+        
+        # === ETAPA 2.1: BUSCAS WEB + LEXML (GROQ) - já em andamento ===
+        # gather com return_exceptions: a falha ou o cancelamento da busca vira valor
+        groq_results, = await asyncio.gather(groq_task, return_exceptions=True)
+        
+        if isinstance(groq_results, BaseException):
+            logger.error("Erro nas buscas Groq", error=str(groq_results))
+            groq_results = GroqSearchResult(
+                web_results={"summary": "Erro na busca web"},
+                lexml_results={"summary": "Erro na busca LexML"},
+                total_sources=0,
+                summary="Erro nas buscas Groq"
+            )
         
-        # LOG DETALHADO: Processamento de documentos CRAG
-        docs_processing_log = {"processed_docs": [], "skipped_docs": [], "total_content_length": 0}
+        log_data_flow_checkpoint_background("crag_docs_processing", lambda: docs_processing_log)
         
-        if crag_retrieved_docs:
-            docs_count = len(crag_retrieved_docs)
-            
-            for i, doc in enumerate(crag_retrieved_docs[:5]):  # Top 5 documentos
-                doc_text = ""
-                doc_source = "unknown"
-                processing_method = "none"
-                
-                # CORREÇÃO: Processar estrutura de documentos processados pelo app.py - RASTREADO
-                if isinstance(doc, dict):
-                    doc_source = doc.get('source', 'dict_unknown')
-                    if 'content' in doc:
-                        doc_text = doc['content'][:500]
-                        processing_method = "dict_content"
-                    elif 'page_content' in doc:
-                        doc_text = doc['page_content'][:500]
-                        processing_method = "dict_page_content"
-                    elif 'text' in doc:
-                        doc_text = doc['text'][:500]
-                        processing_method = "dict_text"
-                # Fallback para documentos não processados
-                elif hasattr(doc, 'page_content'):
-                    doc_text = doc.page_content[:500]
-                    processing_method = "attr_page_content"
-                elif hasattr(doc, 'content'):
-                    doc_text = doc.content[:500]
-                    processing_method = "attr_content"
-                elif isinstance(doc, str):
-                    doc_text = doc[:500]
-                    processing_method = "string"
-                
-                # LOG cada documento processado
-                doc_log = {
-                    "index": i,
-                    "doc_type": type(doc).__name__,
-                    "doc_source": doc_source,
-                    "processing_method": processing_method,
-                    "text_length": len(doc_text),
-                    "text_preview": doc_text[:50] + "..." if len(doc_text) > 50 else doc_text,
-                    "successfully_extracted": bool(doc_text.strip())
-                }
-                
-                if doc_text.strip():
-                    crag_snippets.append(doc_text.strip())
-                    docs_processing_log["processed_docs"].append(doc_log)
-                    docs_processing_log["total_content_length"] += len(doc_text)
-                else:
-                    docs_processing_log["skipped_docs"].append(doc_log)
-        
-        log_data_flow_checkpoint("crag_docs_processing", docs_processing_log)
-        
-        # LOG DETALHADO: Processamento de dados Tavily CRAG
-        tavily_processing_log = {"processed_items": [], "skipped_items": [], "total_content_length": 0}
-        tavily_summary = ""
-        
-        if crag_tavily_results and len(crag_tavily_results) > 0:
-            tavily_summary = f" + {len(crag_tavily_results)} resultados Tavily CRAG"
-            # Adicionar conteúdo Tavily aos snippets se disponível
-            for tavily_item in crag_tavily_results[:2]:  # Top 2 Tavily
-                if isinstance(tavily_item, dict) and 'content' in tavily_item:
-                    crag_snippets.append(str(tavily_item['content'])[:500])
-                elif isinstance(tavily_item, str):
-                    crag_snippets.append(tavily_item[:500])
-        
-        # CORREÇÃO: Processar dados do LexML CRAG se disponíveis
-        lexml_summary = ""
-        if crag_lexml_results and len(crag_lexml_results) > 0:
-            lexml_summary = f" + {len(crag_lexml_results)} resultados LexML CRAG"
-            # Adicionar conteúdo LexML aos snippets se disponível
-            for lexml_item in crag_lexml_results[:2]:  # Top 2 LexML
-                if isinstance(lexml_item, dict) and 'content' in lexml_item:
-                    crag_snippets.append(str(lexml_item['content'])[:500])
-                elif isinstance(lexml_item, str):
-                    crag_snippets.append(lexml_item[:500])
+        tavily_summary = f" + {len(crag_tavily_results)} resultados Tavily CRAG" if crag_tavily_results else ""
+        lexml_summary = f" + {len(crag_lexml_results)} resultados LexML CRAG" if crag_lexml_results else ""
         
         vectordb_results = VectorSearchResult(
             documents_found=docs_count,
@@ -1883,120 +3533,90 @@ async def process_legal_query_hybrid_with_crag_data(
                    documents_found=vectordb_results.documents_found,
                    snippets_count=len(crag_snippets))
         
-        # === ETAPA 2.1: BUSCAS WEB + LEXML (GROQ) ===
-        yield ("progress", "🔍 Buscas complementares WEB + LexML (Groq)...")
-        logger.info("Etapa 2.1: Buscas WEB + LexML complementares com Groq")
-        
-        groq_results = await execute_groq_searches(deps, query.text)
-        
         logger.info("Buscas Groq complementares concluídas", 
                    total_sources=groq_results.total_sources)
         
-        # === ETAPA 3: ANÁLISE JURÍDICA RAG INTEGRADA (OPENROUTER) ===
-        yield ("progress", "🧠 Análise integrada CRAG + Groq (OpenRouter)...")
-        logger.info("Etapa 3: Análise jurídica integrada com OpenRouter")
-        
         # Análise integrada que considera tanto dados CRAG quanto buscas Groq - MELHORADA
-        crag_data_summary = ""
-        if vectordb_results.documents_found > 0:
-            crag_data_summary = f"""
-        DADOS CRAG (DOCUMENTOS INDEXADOS):
-        - Documentos encontrados: {vectordb_results.documents_found}
-        - Resumo: {vectordb_results.summary}
-        - Trechos relevantes: {', '.join(vectordb_results.relevant_snippets[:3])}...
-        """
-        
-        if crag_tavily_results:
-            crag_data_summary += f"\n\nDADOS TAVILY CRAG:\n{str(crag_tavily_results)[:500]}..."
-        
-        if crag_lexml_results:
-            crag_data_summary += f"\n\nDADOS LEXML CRAG:\n{str(crag_lexml_results)[:500]}..."
-        
-        integrated_analysis_prompt = f"""
-        Analise esta consulta jurídica integrando dados de múltiplas fontes:
-        
-        CONSULTA ORIGINAL: {query.text}
-        
-        {crag_data_summary if crag_data_summary else "DADOS CRAG: Nenhum documento específico fornecido, use conhecimento jurídico geral"}
-        
-        DADOS COMPLEMENTARES GROQ:
-        - Total de fontes: {groq_results.total_sources}
-        - Resumo: {groq_results.summary}
-        - Resultados web: {groq_results.web_results}
-        - Resultados LexML: {groq_results.lexml_results}
-        
-        Forneça uma análise jurídica INTEGRADA que correlacione:
-        1. Documentos indexados (CRAG) com informações complementares (Groq)
-        2. Legislação aplicável de ambas as fontes
-        3. Jurisprudência combinada
-        4. Síntese unificada dos princípios jurídicos
-        
-        IMPORTANTE: Mesmo com dados limitados, forneça análise jurídica completa e fundamentada.
-        """
-        
-        analysis_result = await legal_analyzer_agent.run(
-            integrated_analysis_prompt,
-            deps=deps
+        integrated_analysis_prompt = build_crag_analysis_prompt(
+            query.text, vectordb_results, groq_results, crag_tavily_results, crag_lexml_results
         )
         
-        analysis_text: str = analysis_result.output
+        # Etapas 5/6 antecipadas: o stream da síntese também alimenta validação e guardrails
+        if config.enable_incremental_validation and not config.enable_fused_validation:
+            incremental_validation = IncrementalValidation(deps)
         
-        logger.info("Análise OpenRouter integrada concluída",
-                   text_length=len(analysis_text))
-        
-        # === ETAPA 4: SÍNTESE FINAL COM STREAMING (OPENROUTER) ===
-        yield ("progress", "✍️ Síntese final integrada (OpenRouter)...")
-        logger.info("Etapa 4: Síntese final integrada com streaming")
+        if config.enable_fused_analysis_synthesis:
+            # === ETAPAS 3+4: ANÁLISE + SÍNTESE INTEGRADAS FUNDIDAS (OPENROUTER) ===
+            yield ("progress", "🧠 Análise e síntese integradas CRAG + Groq (OpenRouter)...")
+            logger.info("Etapas 3+4: Análise + síntese integradas fundidas com OpenRouter")
+            
+            analysis_text, fused_response_text = await analyze_and_synthesize_with_openrouter(
+                deps, query.text, vectordb_results, groq_results,
+                analysis_prompt=integrated_analysis_prompt
+            )
+            synthesis_chunks = _single_chunk_stream(fused_response_text)
+        else:
+            # === ETAPA 3: ANÁLISE JURÍDICA RAG INTEGRADA (OPENROUTER) ===
+            yield ("progress", "🧠 Análise integrada CRAG + Groq (OpenRouter)...")
+            logger.info("Etapa 3: Análise jurídica integrada com OpenRouter")
+            
+            # Dados CRAG já coletados: basta que a conversão e as buscas Groq tenham concluído
+            analysis_text = no_source_analysis(
+                query.text, vectordb_results, groq_results, crag_tavily_results, crag_lexml_results,
+                searches_ran=crag_extraction_ok and groq_results.summary not in _GROQ_FALLBACK_SUMMARIES
+            )
+            if analysis_text is None:
+                analysis_text = await run_legal_analysis(deps, integrated_analysis_prompt)
+            
+            logger.info("Análise OpenRouter integrada concluída",
+                       text_length=len(analysis_text))
+            
+            # === ETAPA 4: SÍNTESE FINAL COM STREAMING (OPENROUTER) ===
+            yield progress_event("✍️ Síntese final integrada (OpenRouter)...", "🔄 Gerando introdução...")
+            logger.info("Etapa 4: Síntese final integrada com streaming")
+            
+            synthesis_chunks = synthesize_with_openrouter_streaming(deps, query.text, analysis_text)
         
         # Streaming da síntese - agora CORRIGIDO sem marcadores misturados
-        full_response_text = ""
-        
-        # Yield de progresso separado
-        yield ("progress", "🔄 Gerando introdução...")
-        
-        async for chunk in synthesize_with_openrouter_streaming(deps, query.text, analysis_text):
-            # Acumular todo o conteúdo E fazer yield do streaming
-            full_response_text += chunk
-            yield ("streaming", chunk)
+        response_parts: List[str] = []
+        async with contextlib.aclosing(buffered_stream(
+            synthesis_chunks,
+            on_chunk=incremental_validation.feed if incremental_validation is not None else None
+        )) as synthesis_stream:
+            async for chunk in synthesis_stream:
+                # Acumular todo o conteúdo (unido uma única vez no fim) E fazer yield do streaming
+                response_parts.append(chunk)
+                yield ("streaming", chunk)
+        full_response_text = "".join(response_parts)
         
         logger.info("Síntese OpenRouter integrada concluída",
-                   word_count=len(full_response_text.split()))
-        
-        # === ETAPA 5: VALIDAÇÃO DE QUALIDADE (OPENROUTER) ===
-        yield ("progress", "✅ Validação final (OpenRouter)...")
-        logger.info("Etapa 5: Validação de qualidade final")
-        
-        quality_assessment = await validate_with_openrouter(deps, full_response_text)
-        
-        logger.info("Validação OpenRouter final concluída",
-                   quality_score=quality_assessment.overall_score)
-        
-        # === ETAPA 6: VERIFICAÇÃO DE GUARDRAILS (OPENROUTER) ===
-        yield ("progress", "🛡️ Guardrails finais (OpenRouter)...")
-        logger.info("Etapa 6: Verificação de guardrails final")
+                   word_count=_word_count(full_response_text))
         
-        guardrail_check = await check_guardrails_with_openrouter(deps, full_response_text)
+        if config.enable_fused_validation:
+            # === ETAPAS 5+6: VALIDAÇÃO + GUARDRAILS FUNDIDOS (OPENROUTER) ===
+            yield ("progress", "✅ Validação e guardrails finais (OpenRouter)...")
+            logger.info("Etapas 5+6: Validação + guardrails fundidos finais")
+            
+            quality_assessment, guardrail_check = await validate_and_check_guardrails_with_openrouter(
+                deps, full_response_text
+            )
+        else:
+            # === ETAPAS 5 e 6: VALIDAÇÃO + GUARDRAILS EM PARALELO (OPENROUTER) ===
+            yield progress_event("✅ Validação final (OpenRouter)...", "🛡️ Guardrails finais (OpenRouter)...")
+            logger.info("Etapas 5 e 6: Validação de qualidade e guardrails finais em paralelo")
+            
+            if incremental_validation is not None:
+                quality_assessment, guardrail_check = await incremental_validation.finish(full_response_text)
+            else:
+                quality_assessment, guardrail_check = await execute_validation_concurrently(
+                    deps, full_response_text
+                )
         
         logger.info("Guardrails OpenRouter finais concluídos",
                    passed=guardrail_check.passed)
         
         # === CRIAR RESPOSTA FINAL INTEGRADA ===
-        final_response = FinalResponse(
-            query_id=query.id,
-            overall_summary=full_response_text,
-            status=Status.COMPLETED,
-            overall_confidence=quality_assessment.overall_score,
-            completeness_score=quality_assessment.completeness,
-            search_results=[],  # Simplificado para esta versão
-            detailed_analyses=[],  # Simplificado para esta versão
-            warnings=quality_assessment.improvement_suggestions if quality_assessment.needs_improvement else [],
-            disclaimer="Esta resposta foi gerada por sistema de IA integrado e está suscetível a erro. Para qualquer conclusão e tomada de descisão procure um advogado credenciado e qualificado."
-        )
-        
-        # Adicionar avisos de guardrails se necessário
-        if not guardrail_check.passed:
-            for violation in guardrail_check.violations:
-                final_response.warnings.append(f"Atenção: {violation}")
+        final_response = build_final_response(query.id, full_response_text, quality_assessment, guardrail_check)
         
         logger.info("Processamento híbrido integrado com CRAG concluído",
                    query_id=final_response.query_id,
@@ -2004,7 +3624,9 @@ async def process_legal_query_hybrid_with_crag_data(
                    confidence=final_response.overall_confidence,
                    integration="CRAG + OpenRouter + Groq")
         
-        yield ("final", final_response.model_dump())
+        cache_final_response(deps, query, final_response, guardrail_check, crag_final_response_cache)
+        
+        yield ("final", final_response_payload(final_response))
         
     except Exception as e:
         logger.error("Erro crítico no processamento híbrido integrado", 
@@ -2012,12 +3634,130 @@ async def process_legal_query_hybrid_with_crag_data(
                     query_id=query.id)
         
         # Retornar resposta de erro
-        error_response = FinalResponse(
-            query_id=query.id,
-            overall_summary=f"Erro no sistema híbrido integrado: {str(e)}. O sistema CRAG + OpenRouter + Groq encontrou dificuldades técnicas. Tente novamente.",
-            status=Status.FAILED,
-            warnings=["Falha no sistema híbrido integrado"],
-            disclaimer="Sistema integrado indisponível. Tente novamente mais tarde."
-        )
-        
-        yield ("final", error_response.model_dump())
\ No newline at end of file
+        yield ("final", final_response_payload(crag_error_response(query.id, e)))
+    
+    finally:
+        # Gerador encerrado cedo ou erro: não deixar a busca Groq nem as validações antecipadas órfãs
+        if groq_task is not None and not groq_task.done():
+            groq_task.cancel()
+        if incremental_validation is not None:
+            incremental_validation.cancel()
+
+async def process_legal_query_hybrid_batch(
+    queries: List[LegalQuery],
+    config: Optional[ProcessingConfig] = None,
+    user_id: Optional[str] = None
+) -> List[FinalResponse]:
+    """
+    Processa várias consultas jurídicas em lote (cargas offline, avaliações).
+    - Etapas 1 e 5 (decisão e validação) usam micro-batching via BatchAgent
+    - Etapas 2-4 e 6 rodam por consulta, limitadas por config.max_concurrent_tasks
+    Para fluxos interativos/streaming mantenha process_legal_query_hybrid_corrected_streaming.
+    """
+    
+    if config is None:
+        config = ProcessingConfig()
+    
+    if not queries:
+        return []
+    
+    logger.info("Iniciando processamento híbrido em lote",
+               total_queries=len(queries),
+               max_concurrent_tasks=config.max_concurrent_tasks)
+    
+    semaphore = asyncio.Semaphore(config.max_concurrent_tasks)
+    batch_deps = AgentDependencies(
+        config=config,
+        session_id=new_session_id(),
+        user_id=user_id,
+        http_client=get_shared_http_client(),
+        shared_state={}
+    )
+    
+    # === ETAPA 1: DECISÃO DE BUSCA EM LOTE ===
+    decision_outputs = await decision_batch_agent.run(
+        [query.text for query in queries],
+        batch_deps
+    )
+    decisions = [parse_decision_response(text or "") for text in decision_outputs]
+    
+    # === ETAPAS 2-4 e 6: POR CONSULTA, COM CONCORRÊNCIA LIMITADA ===
+    async def process_single(query: LegalQuery, decision: SearchDecision):
+        async with semaphore:
+            deps = AgentDependencies(
+                config=config,
+                session_id=new_session_id(),
+                user_id=user_id,
+                http_client=get_shared_http_client(),
+                query_embedding=await embed_query(query.text),
+                shared_state={"search_decision": decision.model_dump()}
+            )
+            
+            # Etapas 2 e 2.1 seguem a decisão do lote, como no fluxo principal
+            vectordb_results, groq_results = await execute_searches_for_decision(deps, query.text, decision)
+            if config.enable_fused_analysis_synthesis:
+                _, response_text = await analyze_and_synthesize_with_openrouter(
+                    deps, query.text, vectordb_results, groq_results
+                )
+            else:
+                analysis_text = await analyze_with_openrouter(
+                    deps, query.text, vectordb_results, groq_results,
+                    decision_searches_ran(decision, vectordb_results, groq_results)
+                )
+                response_text = await synthesize_with_openrouter(deps, query.text, analysis_text)
+            guardrail_check = await check_guardrails_with_openrouter(deps, response_text)
+            
+            return deps, response_text, guardrail_check
+    
+    processed = await asyncio.gather(
+        *(process_single(query, decision) for query, decision in zip(queries, decisions, strict=True)),
+        return_exceptions=True
+    )
+    
+    # === ETAPA 5: VALIDAÇÃO DE QUALIDADE EM LOTE ===
+    completed_indexes = [i for i, item in enumerate(processed) if not isinstance(item, BaseException)]
+    validation_inputs = [
+        f"Avalie esta resposta jurídica nos critérios de qualidade:\n\n{trim_tokens(processed[i][1], VALIDATION_INPUT_TOKENS)}..."
+        for i in completed_indexes
+    ]
+    validation_outputs = await quality_batch_agent.run(validation_inputs, batch_deps)
+    
+    assessments: Dict[int, QualityAssessment] = {}
+    for i, output in zip(completed_indexes, validation_outputs, strict=True):
+        if output is not None:
+            assessments[i] = parse_quality_response(output)
+        else:
+            # Item não separado do lote: validar individualmente
+            deps, response_text, _ = processed[i]
+            assessments[i] = await validate_with_openrouter(deps, response_text)
+    
+    # === CRIAR RESPOSTAS FINAIS ===
+    responses: List[FinalResponse] = []
+    failed = len(queries) - len(completed_indexes)
+    for i, (query, item) in enumerate(zip(queries, processed, strict=True)):
+        if isinstance(item, BaseException):
+            logger.error("Erro crítico no processamento híbrido em lote",
+                        error=str(item),
+                        query_id=query.id)
+            responses.append(build_error_response(query.id))
+            continue
+        
+        _, response_text, guardrail_check = item
+        quality_assessment = assessments[i]
+        
+        try:
+            final_response = build_final_response(query.id, response_text, quality_assessment, guardrail_check)
+        except ValidationError as e:
+            # overall_summary fora dos limites/validador: só este item vira resposta de erro
+            logger.error("Resposta final inválida no lote", error=str(e), query_id=query.id)
+            final_response = build_error_response(query.id)
+            failed += 1
+        
+        responses.append(final_response)
+    
+    logger.info("Processamento híbrido em lote concluído",
+               total_queries=len(queries),
+               completed=len(queries) - failed,
+               failed=failed)
+    
+    return responses
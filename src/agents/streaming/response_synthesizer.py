@@ -6,9 +6,9 @@ import json
 import time
 import traceback
 import os
-import httpx
 
 from src.core.workflow_state import AgentState
+from src.core.http_client import get_shared_http_client
 from src.core.llm_factory import get_pydantic_ai_llm, MODEL_SYNTHESIZER, LLM_GROQ_LANGCHAIN, GROQ_API_KEY, MODEL_GROQ_WEB, OPENROUTER_API_KEY
 from src.core.legal_models import DocumentSnippet, FinalResponse, LegalQuery, ProcessingConfig
 from src.interfaces.external_search_client import LexMLDocumento, TavilySearchResult
@@ -79,25 +79,25 @@ async def openrouter_direct_call(prompt: str) -> str:
         "temperature": 0.0
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=30.0
-        )
+    # Cliente compartilhado: reaproveita conexões keep-alive em vez de um handshake TLS por chamada
+    response = await get_shared_http_client().post(
+        "https://openrouter.ai/api/v1/chat/completions",
+        headers=headers,
+        json=data,
+        timeout=30.0
+    )
+    
+    if response.status_code == 200:
+        result = response.json()
+        content = result['choices'][0]['message']['content']
         
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content']
-            
-            # Limpeza básica
-            content = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', content)
-            content = re.sub(r'\s+', ' ', content).strip()
-            
-            return content
-        else:
-            raise Exception(f"OpenRouter HTTP {response.status_code}: {response.text}")
+        # Limpeza básica
+        content = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', content)
+        content = re.sub(r'\s+', ' ', content).strip()
+        
+        return content
+    else:
+        raise Exception(f"OpenRouter HTTP {response.status_code}: {response.text}")
 
 def create_robust_openrouter_agent():
     """Cria agent PydanticAI usando OpenRouter com configuração correta"""
@@ -115,7 +115,8 @@ def create_robust_openrouter_agent():
         # ✅ CONFIGURAÇÃO SIMPLES QUE FUNCIONA (baseada nos testes)
         openrouter_provider = OpenAIProvider(
             api_key=OPENROUTER_API_KEY,
-            base_url="https://openrouter.ai/api/v1"
+            base_url="https://openrouter.ai/api/v1",
+            http_client=get_shared_http_client()
         )
         
         openrouter_model = OpenAIModel(
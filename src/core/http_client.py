@@ -0,0 +1,219 @@
+"""
+Cliente HTTP assíncrono compartilhado.
+Um único httpx.AsyncClient (pool de conexões keep-alive e, se o pacote h2 estiver
+instalado, HTTP/2) é reutilizado por OpenRouter, Groq e LexML, evitando um novo
+handshake TLS a cada chamada.
+
+Conexões pertencem ao event loop que as abriu e o app Streamlit roda cada consulta em um
+asyncio.run próprio: o transporte mantém um pool por loop, de modo que o mesmo cliente
+(capturado pelos providers na importação) continua válido de uma consulta para a outra.
+
+O transporte limita as requisições simultâneas por provedor LLM e repete com backoff
+exponencial as respostas 429, para que os fan-outs com asyncio.gather degradem em vez
+de falhar a consulta inteira.
+"""
+
+import asyncio
+import atexit
+import os
+import random
+import weakref
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import httpx
+import structlog
+
+# HTTP/2 no httpx depende do pacote opcional h2 (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+# Leitura longa: respostas não-streaming de seções da síntese podem levar mais de um minuto
+HTTP_TIMEOUT = httpx.Timeout(connect=5.0, read=120.0, write=10.0, pool=5.0)
+
+# Requisições simultâneas por provedor (configuráveis por ambiente)
+PROVIDER_CONCURRENCY: Dict[str, int] = {
+    "openrouter.ai": int(os.getenv("OPENROUTER_MAX_CONCURRENCY", "32")),
+    "api.groq.com": int(os.getenv("GROQ_MAX_CONCURRENCY", "16")),
+}
+
+# Repetição de respostas 429 (rate limit): backoff exponencial com jitter, respeitando Retry-After
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BASE_DELAY = 0.5
+RATE_LIMIT_MAX_DELAY = 10.0
+
+# Semáforos por event loop: o app Streamlit cria um loop por consulta e um asyncio.Semaphore
+# fica preso ao loop em que esperou pela primeira vez
+_provider_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _provider_semaphore(host: str) -> Optional[asyncio.Semaphore]:
+    """Semáforo do provedor no loop corrente (None para hosts sem limite)."""
+    limit = PROVIDER_CONCURRENCY.get(host)
+    if limit is None:
+        return None
+
+    loop_semaphores = _provider_semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = loop_semaphores.get(host)
+    if semaphore is None:
+        semaphore = loop_semaphores[host] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+def _rate_limit_delay(response: httpx.Response, attempt: int) -> float:
+    """Espera antes de repetir um 429: Retry-After (em segundos) ou backoff exponencial."""
+    retry_after = response.headers.get("retry-after")
+    if retry_after:
+        try:
+            return min(float(retry_after), RATE_LIMIT_MAX_DELAY)
+        except ValueError:
+            pass
+    delay = RATE_LIMIT_BASE_DELAY * (2 ** attempt)
+    return min(delay + random.uniform(0, delay / 2), RATE_LIMIT_MAX_DELAY)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Corpo da resposta que devolve a vaga do provedor ao ser fechado (inclui streaming)."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class ProviderLimitedTransport(httpx.AsyncHTTPTransport):
+    """Transporte com limite de concorrência por provedor e repetição de 429."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = _provider_semaphore(request.url.host)
+        if semaphore is None:
+            return await super().handle_async_request(request)
+
+        await semaphore.acquire()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                semaphore.release()
+
+        try:
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                response = await super().handle_async_request(request)
+                if response.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                    break
+
+                delay = _rate_limit_delay(response, attempt)
+                await response.aclose()
+                logger.warning("Rate limit do provedor - repetindo",
+                               host=request.url.host, attempt=attempt + 1, delay_s=round(delay, 2))
+                await asyncio.sleep(delay)
+        except BaseException:
+            release()
+            raise
+
+        # A vaga só é liberada quando o corpo for consumido/fechado (respostas em streaming)
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    Um ProviderLimitedTransport (pool de conexões) por event loop, como os semáforos por
+    provedor: conexões keep-alive abertas em um loop já encerrado nunca são reutilizadas
+    ("Event loop is closed" na segunda consulta).
+    """
+
+    def __init__(self, **transport_kwargs):
+        self._transport_kwargs = transport_kwargs
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ProviderLimitedTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _loop_transport(self) -> ProviderLimitedTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = ProviderLimitedTransport(**self._transport_kwargs)
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._loop_transport().handle_async_request(request)
+
+    async def close_loop_pool(self) -> None:
+        """Fecha apenas o pool do loop corrente (o único cujas conexões podem ser fechadas nele)."""
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+    async def aclose(self) -> None:
+        await self.close_loop_pool()
+        # Pools de outros loops (já encerrados) não podem ser fechados daqui: são descartados
+        self._transports.clear()
+
+
+_shared_transport: Optional[LoopLocalTransport] = None
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """
+    Retorna o cliente compartilhado do processo, criando-o sob demanda. O cliente não é
+    fechado entre consultas (os providers o guardam): use close_loop_http_pool para liberar
+    as conexões do loop corrente.
+    """
+    global _shared_transport, _shared_http_client
+
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_transport = LoopLocalTransport(http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS)
+        _shared_http_client = httpx.AsyncClient(
+            transport=_shared_transport,
+            timeout=HTTP_TIMEOUT
+        )
+        logger.info("Cliente HTTP compartilhado criado", http2=HTTP2_AVAILABLE)
+
+    return _shared_http_client
+
+
+async def close_loop_http_pool() -> None:
+    """Fecha as conexões do event loop corrente; o cliente compartilhado continua utilizável."""
+    if _shared_transport is not None:
+        await _shared_transport.close_loop_pool()
+
+
+async def close_shared_http_client() -> None:
+    """Fecha o cliente compartilhado (apenas no encerramento do processo)."""
+    global _shared_transport, _shared_http_client
+
+    if _shared_http_client is not None and not _shared_http_client.is_closed:
+        await _shared_http_client.aclose()
+    _shared_transport = None
+    _shared_http_client = None
+
+
+@atexit.register
+def _close_shared_http_client_at_exit() -> None:
+    """Fecha o cliente ao encerrar o processo (sem lifespan no Streamlit)."""
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        return
+    try:
+        asyncio.run(close_shared_http_client())
+    except Exception:
+        pass
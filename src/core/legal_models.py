@@ -359,6 +359,7 @@ class ProcessingConfig(BaseModel):
     max_documents_per_source: int = Field(10, ge=1, le=50)
     search_timeout_seconds: int = Field(30, ge=5, le=300)
     enable_parallel_search: bool = Field(True)
+    max_concurrent_tasks: int = Field(4, ge=1, le=32)
     
     # Configurações de retry
     max_retries: int = Field(3, ge=1, le=10)
@@ -377,6 +378,24 @@ class ProcessingConfig(BaseModel):
     enable_web_search: bool = Field(True)
     enable_jurisprudence_search: bool = Field(True)
     enable_guardrails: bool = Field(True)
+    
+    # Busca web especulativa: dispara Tavily junto com a avaliação quando P(sim) histórica > limiar
+    speculative_web_threshold: float = Field(0.6, ge=0, le=1)
+    
+    # Fusão de etapas LLM (uma chamada no lugar de duas)
+    enable_fused_analysis_synthesis: bool = Field(False)
+    enable_fused_validation: bool = Field(False)
+    
+    # Síntese: as 4 seções em uma única requisição (BatchAgent) em vez de 4 chamadas concorrentes
+    enable_batch_synthesis: bool = Field(False)
+    
+    # Cache de respostas finais: a mesma consulta (texto normalizado + configuração) pula o pipeline inteiro
+    enable_response_cache: bool = Field(True)
+    
+    # Streaming: validação e guardrails antecipados sobre o trecho já fixo da síntese.
+    # Opcional: a síntese costuma passar nas heurísticas de qualidade no fim do stream, e a
+    # chamada antecipada ao validador é então descartada (tokens gastos sem uso)
+    enable_incremental_validation: bool = Field(False)
 
 
 # Unions para diferentes tipos de saída
@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 # Adicionado: Importações para PydanticAI e LangChain OpenAI (para OpenRouter)
 from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic_ai.models.openai import OpenAIModel # Usaremos a interface OpenAI para OpenRouter/Groq
+from src.core.http_client import get_shared_http_client
 # Removido import ChatOpenAI pois PydanticAI usa seu próprio provider
 
 load_dotenv() # Carrega variáveis do .env
@@ -24,6 +25,10 @@ MODEL_GRADER = "meta-llama/llama-4-maverick:free"       # ✅ FUNCIONANDO - Úni
 MODEL_SYNTHESIZER = "meta-llama/llama-4-maverick:free"  # ✅ FUNCIONANDO - Único modelo gratuito testado
 MODEL_DECISION = "meta-llama/llama-4-maverick:free"     # ✅ FUNCIONANDO - Único modelo gratuito testado
 
+# OpenRouter Models menores para chamadas de classificação (decisão SIM/NAO, scores 0.0-1.0)
+MODEL_DECISION_SMALL = "meta-llama/llama-3.2-3b-instruct:free"
+MODEL_VALIDATOR_SMALL = "meta-llama/llama-3.1-8b-instruct:free"
+
 # Groq Model (reservado para web) - FUNCIONANDO PERFEITAMENTE
 MODEL_GROQ_WEB = "llama-3.3-70b-versatile"
 # Google Gemini Embeddings (consistente com pdf_processor.py)
@@ -52,7 +57,8 @@ def get_pydantic_ai_llm(model_name: str) -> OpenAIModel:
 
     provider = OpenAIProvider(
         api_key=OPENROUTER_API_KEY,
-        base_url=OPENROUTER_API_BASE
+        base_url=OPENROUTER_API_BASE,
+        http_client=get_shared_http_client()
         # headers podem ser necessários para OpenRouter se não usar api_key direta
         # Ex: headers={"HTTP-Referer": "YOUR_SITE_URL", "X-Title": "YOUR_PROJECT_TITLE"}
     )
@@ -74,7 +80,8 @@ def get_pydantic_ai_llm_groq(model_name: str) -> OpenAIModel:
 
     provider = OpenAIProvider(
         api_key=GROQ_API_KEY,
-        base_url=GROQ_API_BASE
+        base_url=GROQ_API_BASE,
+        http_client=get_shared_http_client()
     )
 
     llm_pydantic = OpenAIModel(
@@ -4,9 +4,15 @@ Implementa tracking de todas as operações, dados CRAG, análises e sínteses.
 """
 
 import os
+import sys
 import json
+import atexit
+import asyncio
+import logging
+import logging.handlers
+import queue
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Union
 from contextlib import contextmanager
 import structlog
 
@@ -20,6 +26,13 @@ try:
 except ImportError:
     LANGFUSE_AVAILABLE = False
 
+# orjson é opcional: serialização JSON em Rust para logs e Langfuse
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Decorador simples sem dependência dos decoradores do Langfuse
 def observe(func=None, *, name: str = None, **kwargs):
     """Decorador simples para observabilidade."""
@@ -102,8 +115,9 @@ def serialize_for_langfuse(obj: Any) -> Any:
     elif isinstance(obj, list):
         return [serialize_for_langfuse(item) for item in obj]
     elif hasattr(obj, 'model_dump'):
-        # Objetos Pydantic
-        return obj.model_dump()
+        # Objetos Pydantic: modo json do pydantic-core já entrega tipos serializáveis
+        # (datetime em ISO, enums como valor) em uma única passada, sem o teste de serialização abaixo
+        return obj.model_dump(mode="json")
     elif hasattr(obj, '__dict__'):
         # Objetos com atributos
         return {k: serialize_for_langfuse(v) for k, v in obj.__dict__.items() 
@@ -112,7 +126,11 @@ def serialize_for_langfuse(obj: Any) -> Any:
         return obj.isoformat()
     else:
         try:
-            json.dumps(obj)  # Teste de serialização
+            # Teste de serialização
+            if ORJSON_AVAILABLE:
+                orjson.dumps(obj)
+            else:
+                json.dumps(obj)
             return obj
         except (TypeError, ValueError):
             return str(obj)
@@ -584,6 +602,42 @@ def log_data_flow_checkpoint(checkpoint_name: str, data_summary: Dict[str, Any])
                checkpoint_name=checkpoint_name,
                data_summary=data_summary)
 
+# Checkpoints em background: no máximo 8 em voo; acima disso (ou fora de um event loop)
+# o checkpoint é registrado de forma síncrona, sem descartar nada
+BACKGROUND_CHECKPOINT_LIMIT = 8
+_background_checkpoints: Set["asyncio.Task"] = set()
+
+
+def _run_checkpoint(checkpoint_name: str, build_summary: Callable[[], Dict[str, Any]]) -> None:
+    """Monta o resumo e registra o checkpoint; falhas nunca propagam ao pipeline."""
+    try:
+        log_data_flow_checkpoint(checkpoint_name, build_summary())
+    except Exception as e:
+        logger.warning("Falha ao registrar checkpoint", checkpoint_name=checkpoint_name, error=str(e))
+
+
+def log_data_flow_checkpoint_background(
+    checkpoint_name: str,
+    build_summary: Callable[[], Dict[str, Any]]
+) -> None:
+    """
+    Registra o checkpoint fora do caminho crítico (fire-and-forget): o resumo é montado pelo
+    callable em uma thread, junto com a serialização e o envio ao Langfuse.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    
+    if loop is None or len(_background_checkpoints) >= BACKGROUND_CHECKPOINT_LIMIT:
+        _run_checkpoint(checkpoint_name, build_summary)
+        return
+    
+    task = loop.create_task(asyncio.to_thread(_run_checkpoint, checkpoint_name, build_summary))
+    _background_checkpoints.add(task)
+    task.add_done_callback(_background_checkpoints.discard)
+
+
 # ===============================
 # UTILITÁRIOS DE DEBUG
 # ===============================
@@ -625,6 +679,52 @@ def log_detailed_state(state: Dict[str, Any], step_name: str):
 # INICIALIZAÇÃO
 # ===============================
 
+# Logger stdlib que recebe os eventos do structlog (sem propagar para o root de outras bibliotecas)
+STRUCTLOG_LOGGER_NAME = "agentic_legal"
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _EnqueueOnlyHandler(logging.handlers.QueueHandler):
+    """QueueHandler que não formata o registro no chamador: toda a formatação fica no listener."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _orjson_dumps_str(obj: Any, **kwargs) -> str:
+    """orjson para o ProcessorFormatter, que espera str."""
+    return orjson.dumps(obj, default=kwargs.get("default", str)).decode()
+
+
+def start_log_listener() -> None:
+    """Liga o logger do structlog a uma fila consumida por uma thread com o handler real."""
+    global _log_listener
+    
+    if _log_listener is not None:
+        return
+    
+    renderer = (
+        structlog.processors.JSONRenderer(serializer=_orjson_dumps_str)
+        if ORJSON_AVAILABLE else structlog.processors.JSONRenderer()
+    )
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(structlog.stdlib.ProcessorFormatter(
+        processors=[structlog.stdlib.ProcessorFormatter.remove_processors_meta, renderer]
+    ))
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stdlib_logger = logging.getLogger(STRUCTLOG_LOGGER_NAME)
+    stdlib_logger.handlers = [_EnqueueOnlyHandler(log_queue)]
+    stdlib_logger.setLevel(logging.INFO)
+    stdlib_logger.propagate = False
+    
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    # Esvazia a fila ao encerrar o processo
+    atexit.register(_log_listener.stop)
+
+
 def setup_observability():
     """Configura observabilidade completa do sistema."""
     
@@ -633,17 +733,19 @@ def setup_observability():
     else:
         logger.warning("⚠️ Observabilidade limitada - Langfuse não disponível")
     
-    # Configurar logging estruturado adicional
+    # Configurar logging estruturado adicional: no event loop só rodam timestamp e nível;
+    # a renderização JSON e a escrita no stdout ficam na thread do QueueListener
     structlog.configure(
         processors=[
             structlog.processors.TimeStamper(fmt="ISO"),
             structlog.processors.add_log_level,
-            structlog.processors.JSONRenderer()
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter
         ],
-        wrapper_class=structlog.make_filtering_bound_logger(20),  # INFO level
-        logger_factory=structlog.PrintLoggerFactory(),
+        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        logger_factory=lambda *args: logging.getLogger(STRUCTLOG_LOGGER_NAME),
         cache_logger_on_first_use=True,
     )
+    start_log_listener()
     
     logger.info("Sistema de observabilidade inicializado")
 
@@ -0,0 +1,536 @@
+"""
+Cache semântico para respostas dos agentes.
+Consultas com embedding próximo (similaridade de cosseno >= limiar) reutilizam o valor
+armazenado. Usa FAISS (índice HNSW) quando disponível; caso contrário, busca vetorizada
+com NumPy sobre a matriz de embeddings.
+
+Os embeddings das consultas vêm do all-MiniLM-L6-v2 exportado para ONNX (384 dimensões),
+executado com ONNX Runtime e agrupado em micro-lotes entre coroutines concorrentes.
+
+ExactLRUCache é o nível exato em memória (LRU + TTL) por hash das entradas.
+RedisStorage oferece um nível de correspondência exata (sha256 da consulta normalizada)
+compartilhado entre workers/réplicas quando REDIS_URL está configurado.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+
+import numpy as np
+import structlog
+from pydantic import BaseModel, ConfigDict, Field
+
+# FAISS é opcional (pacote faiss-cpu)
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+# ONNX Runtime + tokenizers são opcionais (já instalados como dependências do chromadb)
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Redis é opcional (pacote redis, cliente asyncio)
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+# Diretório com model.onnx (ou model_quantized.onnx) e tokenizer.json do all-MiniLM-L6-v2.
+# Padrão: cópia baixada pelo embedding function default do chromadb.
+ONNX_MODEL_DIR = os.getenv(
+    "SEMANTIC_CACHE_ONNX_MODEL_DIR",
+    os.path.expanduser("~/.cache/chroma/onnx_models/all-MiniLM-L6-v2/onnx")
+)
+
+
+class CachedValue(BaseModel):
+    """Entrada do cache semântico."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    value: Any = Field(description="Valor armazenado")
+    created_at: float = Field(default_factory=time.time, description="Timestamp de criação")
+
+
+def normalize_embedding(embedding: Sequence[float]) -> np.ndarray:
+    """Converte para float32 e normaliza (L2) para que produto interno == cosseno."""
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class SemanticCache:
+    """
+    Cache semântico com busca aproximada de vizinhos.
+
+    Com FAISS usa IndexHNSWFlat com métrica de produto interno (embeddings normalizados),
+    mantendo uma lista paralela de CachedValue indexada pela posição no índice.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        dimension: int = 384,
+        similarity_threshold: float = 0.92,
+        top_k: int = 5,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 10_000,
+        hnsw_m: int = 32,
+        ef_search: int = 64
+    ):
+        self.name = name
+        self.dimension = dimension
+        self.similarity_threshold = similarity_threshold
+        self.top_k = top_k
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+
+        self._entries: List[CachedValue] = []
+        self._vectors: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None  # Cache do vstack para o fallback NumPy
+        self._index = self._new_index() if FAISS_AVAILABLE else None
+
+        self.hits = 0
+        self.misses = 0
+        self._similarity_sum = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _new_index(self):
+        """Cria índice HNSW vazio com métrica de produto interno."""
+        index = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = self.ef_search
+        return index
+
+    def _rebuild(self) -> None:
+        """Reconstrói o índice a partir dos vetores mantidos (HNSW não suporta remoção)."""
+        self._matrix = None
+        if FAISS_AVAILABLE:
+            self._index = self._new_index()
+            if self._vectors:
+                self._index.add(np.vstack(self._vectors))
+
+    def _search(self, query: np.ndarray) -> List[Tuple[float, int]]:
+        """Retorna até top_k pares (similaridade, posição)."""
+        if not self._entries:
+            return []
+
+        k = min(self.top_k, len(self._entries))
+
+        if self._index is not None:
+            scores, ids = self._index.search(query.reshape(1, -1), k)
+            return [(float(score), int(i)) for score, i in zip(scores[0], ids[0], strict=True) if i >= 0]
+
+        if self._matrix is None:
+            self._matrix = np.vstack(self._vectors)
+        scores = self._matrix @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [(float(scores[i]), int(i)) for i in top]
+
+    def _evict(self) -> None:
+        """Remove entradas expiradas; se ainda cheio, descarta a metade mais antiga."""
+        now = time.time()
+        keep = [
+            i for i, entry in enumerate(self._entries)
+            if now - entry.created_at <= self.ttl_seconds
+        ]
+        if len(keep) >= self.max_entries:
+            keep = keep[len(keep) // 2:]
+
+        self._entries = [self._entries[i] for i in keep]
+        self._vectors = [self._vectors[i] for i in keep]
+        self._rebuild()
+
+        logger.info("Cache semântico compactado", cache=self.name, entries=len(self._entries))
+
+    def get(self, embedding: Sequence[float]) -> Optional[Any]:
+        """Retorna o valor da entrada mais similar acima do limiar, se não expirada."""
+        query = normalize_embedding(embedding)
+        now = time.time()
+
+        for score, position in sorted(self._search(query), reverse=True):
+            if score < self.similarity_threshold:
+                break
+            entry = self._entries[position]
+            if now - entry.created_at <= self.ttl_seconds:
+                self.hits += 1
+                self._similarity_sum += score
+                logger.info("Cache semântico: hit", cache=self.name, similarity=round(score, 4))
+                return entry.value
+
+        self.misses += 1
+        return None
+
+    def put(self, embedding: Sequence[float], value: Any) -> None:
+        """Armazena um valor associado ao embedding."""
+        if len(self._entries) >= self.max_entries:
+            self._evict()
+
+        vector = normalize_embedding(embedding)
+        self._entries.append(CachedValue(value=value))
+        self._vectors.append(vector)
+
+        if self._index is not None:
+            self._index.add(vector.reshape(1, -1))
+        else:
+            self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do cache para observabilidade (ver log_performance_metrics)."""
+        lookups = self.hits + self.misses
+        return {
+            "cache": self.name,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "avg_similarity": round(self._similarity_sum / self.hits, 4) if self.hits else 0.0
+        }
+
+    def save(self, path: str) -> None:
+        """Persiste índice e valores para reaproveitamento em reinícios (warm restart)."""
+        with open(f"{path}.pkl", "wb") as f:
+            pickle.dump({"entries": self._entries, "vectors": self._vectors}, f)
+        if self._index is not None:
+            faiss.write_index(self._index, f"{path}.faiss")
+
+        logger.info("Cache semântico salvo", cache=self.name, entries=len(self._entries), path=path)
+
+    def load(self, path: str) -> bool:
+        """Carrega índice e valores salvos por save(). Retorna False se não existirem."""
+        if not os.path.exists(f"{path}.pkl"):
+            return False
+
+        with open(f"{path}.pkl", "rb") as f:
+            data = pickle.load(f)
+        self._entries = data["entries"]
+        self._vectors = data["vectors"]
+
+        if FAISS_AVAILABLE and os.path.exists(f"{path}.faiss"):
+            self._matrix = None
+            self._index = faiss.read_index(f"{path}.faiss")
+            self._index.hnsw.efSearch = self.ef_search
+        else:
+            self._rebuild()
+
+        logger.info("Cache semântico carregado", cache=self.name, entries=len(self._entries), path=path)
+        return True
+
+
+# ===============================
+# NÍVEL EXATO EM MEMÓRIA (LRU + TTL)
+# ===============================
+
+def exact_key(*parts: str) -> str:
+    """Chave estável (blake2b de 128 bits) para as partes da entrada."""
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ExactLRUCache:
+    """Cache exato em memória com política LRU e expiração por TTL."""
+
+    def __init__(self, name: str, maxsize: int = 512, ttl_seconds: float = 3600.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna o valor se presente e não expirado (movendo-o para o fim da fila LRU)."""
+        item = self._data.get(key)
+        if item is not None:
+            value, inserted_at = item
+            if time.time() - inserted_at <= self.ttl_seconds:
+                self._data.move_to_end(key)
+                self.hits += 1
+                logger.info("Cache exato: hit", cache=self.name)
+                return value
+            del self._data[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Armazena o valor, descartando o menos usado quando cheio."""
+        self._data[key] = (value, time.time())
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do cache para observabilidade."""
+        lookups = self.hits + self.misses
+        return {
+            "cache": self.name,
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# ===============================
+# NÍVEL EXATO COMPARTILHADO (REDIS)
+# ===============================
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def normalize_query(query: str) -> str:
+    """Normaliza a consulta para a chave exata (minúsculas, espaços colapsados)."""
+    return " ".join(query.lower().split())
+
+
+class RedisStorage:
+    """
+    Cache exato em Redis, compartilhado entre workers do uvicorn e réplicas.
+
+    Chave: {namespace}:{sha256(consulta normalizada)}; valor: JSON do modelo pydantic.
+    Falhas de conexão nunca propagam: são registradas e tratadas como miss.
+    """
+
+    def __init__(self, url: str, namespace: str, ttl_seconds: int = 3600):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._client = aioredis.from_url(url)
+
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, query: str) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    async def get_model(self, query: str, model_cls: Type[ModelT]) -> Optional[ModelT]:
+        """Retorna o modelo armazenado para a consulta, ou None."""
+        try:
+            raw = await self._client.get(self.key_for(query))
+        except Exception as e:
+            logger.warning("Erro ao consultar Redis", namespace=self.namespace, error=str(e))
+            raw = None
+
+        if raw is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        logger.info("Cache Redis: hit", namespace=self.namespace)
+        return model_cls.model_validate_json(raw)
+
+    async def set_model(self, query: str, value: BaseModel) -> None:
+        """Armazena o modelo serializado em JSON com TTL."""
+        try:
+            await self._client.set(self.key_for(query), value.model_dump_json(), ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning("Erro ao gravar no Redis", namespace=self.namespace, error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do nível exato para observabilidade."""
+        lookups = self.hits + self.misses
+        return {
+            "cache": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+_redis_storages: Dict[str, RedisStorage] = {}
+
+
+def get_redis_storage(namespace: str, ttl_seconds: int = 3600) -> Optional[RedisStorage]:
+    """Retorna o RedisStorage do namespace, ou None se REDIS_URL/redis indisponíveis."""
+    url = os.getenv("REDIS_URL")
+    if not url or not REDIS_AVAILABLE:
+        return None
+
+    if namespace not in _redis_storages:
+        _redis_storages[namespace] = RedisStorage(url, namespace, ttl_seconds)
+    return _redis_storages[namespace]
+
+
+# ===============================
+# EMBEDDER ONNX (MiniLM)
+# ===============================
+
+def quantize_onnx_model(model_dir: str = ONNX_MODEL_DIR) -> str:
+    """
+    Gera model_quantized.onnx (pesos int8) a partir do model.onnx exportado com
+    `optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 --task feature-extraction`.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = os.path.join(model_dir, "model.onnx")
+    target = os.path.join(model_dir, "model_quantized.onnx")
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+
+    logger.info("Modelo ONNX quantizado", source=source, target=target)
+    return target
+
+
+class OnnxMiniLMEmbedder:
+    """
+    Embedder all-MiniLM-L6-v2 via ONNX Runtime (sem PyTorch).
+
+    embed() é chamado com uma única consulta, mas coroutines concorrentes são agrupadas
+    por um worker que espera até max_wait_ms por vizinhos e executa um único session.run.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = ONNX_MODEL_DIR,
+        max_length: int = 256,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        quantized_path = os.path.join(model_dir, "model_quantized.onnx")
+        model_path = quantized_path if os.path.exists(quantized_path) else os.path.join(model_dir, "model.onnx")
+
+        self._session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        logger.info("Embedder ONNX carregado", model_path=model_path)
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Gera embeddings normalizados (mean pooling) para um lote de textos."""
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        last_hidden_state = self._session.run(None, feeds)[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return (pooled / norms).astype(np.float32)
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Enfileira a consulta no micro-batcher e aguarda seu embedding."""
+        loop = asyncio.get_running_loop()
+
+        # Fila e worker pertencem ao event loop corrente (o Streamlit pode criar vários)
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._batch_worker())
+
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _batch_worker(self) -> None:
+        """Agrupa pedidos que chegam dentro da janela max_wait_ms em um único lote."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                vectors = await asyncio.to_thread(self.embed_batch, [text for text, _ in batch])
+                for (_, future), vector in zip(batch, vectors, strict=True):
+                    if not future.done():
+                        future.set_result(vector)
+            except Exception as e:
+                logger.error("Erro no embedding ONNX em lote", error=str(e), batch_size=len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+_query_embedder: Optional[OnnxMiniLMEmbedder] = None
+_query_embedder_failed = False
+
+
+def get_query_embedder() -> Optional[OnnxMiniLMEmbedder]:
+    """Retorna o embedder ONNX compartilhado, ou None se indisponível."""
+    global _query_embedder, _query_embedder_failed
+
+    if _query_embedder is None and not _query_embedder_failed:
+        if not ONNX_AVAILABLE:
+            logger.warning("ONNX Runtime não disponível - cache semântico desabilitado")
+            _query_embedder_failed = True
+            return None
+        try:
+            _query_embedder = OnnxMiniLMEmbedder()
+        except Exception as e:
+            logger.warning("Embedder ONNX indisponível - cache semântico desabilitado", error=str(e))
+            _query_embedder_failed = True
+
+    return _query_embedder
+
+
+# Embeddings já calculados, por hash da consulta (evita reexecutar o modelo para repetições)
+EMBEDDING_CACHE_SIZE = 2048
+_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+
+async def embed_query(query: str) -> Optional[np.ndarray]:
+    """Embedding normalizado da consulta (com cache LRU), ou None se o embedder estiver indisponível."""
+    embedder = get_query_embedder()
+    if embedder is None:
+        return None
+
+    key = hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+    cached = _embedding_cache.get(key)
+    if cached is not None:
+        _embedding_cache.move_to_end(key)
+        return cached
+
+    try:
+        embedding = await embedder.embed(query)
+    except Exception as e:
+        logger.warning("Falha ao gerar embedding da consulta", error=str(e))
+        return None
+
+    _embedding_cache[key] = embedding
+    if len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+        _embedding_cache.popitem(last=False)
+    return embedding
@@ -0,0 +1,60 @@
+"""
+Recorte de textos por orçamento de tokens.
+Usa o tokenizer tiktoken (o200k_base, o mesmo do gpt-4o) quando disponível; caso contrário
+aproxima por caracteres (~4 caracteres por token em português).
+"""
+
+from typing import Optional
+
+import structlog
+
+# tiktoken é opcional (já instalado como dependência do langchain)
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = structlog.get_logger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_failed = False
+
+
+def get_encoding() -> Optional["tiktoken.Encoding"]:
+    """Tokenizer compartilhado (carregado uma vez), ou None se indisponível."""
+    global _encoding, _encoding_failed
+
+    if _encoding is None and not _encoding_failed:
+        if not TIKTOKEN_AVAILABLE:
+            _encoding_failed = True
+            return None
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # O arquivo BPE é baixado no primeiro uso; sem rede, usa a aproximação
+            logger.warning("Tokenizer tiktoken indisponível - recorte por caracteres", error=str(e))
+            _encoding_failed = True
+
+    return _encoding
+
+
+def trim_tokens(text: str, max_tokens: int) -> str:
+    """Recorta o texto para no máximo max_tokens tokens."""
+    if not text:
+        return text
+
+    # Textos curtos cabem no orçamento mesmo no pior caso (1 token por caractere)
+    if len(text) <= max_tokens:
+        return text
+
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -10,9 +10,8 @@ from src.agents.document_grader import grade_documents
 from src.agents.query_transformer import transform_query
 # Usando agentes unificados do novo sistema
 from src.agents.search_coordinator import (
-    evaluate_search_necessity, 
-    search_jurisprudencia,
-    search_web_conditional
+    evaluate_and_search_web,
+    search_jurisprudencia
 )
 from src.agents.streaming.response_synthesizer import synthesize_response
 from src.core.legal_models import FinalResponse, LegalQuery # Para o Error Handler e Necessário para o estado inicial
@@ -22,8 +21,7 @@ NODE_RETRIEVE = "retrieve_documents"
 NODE_GRADE = "grade_documents"
 NODE_TRANSFORM = "transform_query"
 NODE_LEXML = "lexml_search"  # Sempre executado após CRAG relevante
-NODE_EVALUATE = "evaluate_search_necessity"  # Novo: avalia se precisa busca web
-NODE_WEB_SEARCH = "conditional_web_search"  # Novo: busca web condicional
+NODE_EVALUATE = "evaluate_search_necessity"  # Avalia necessidade de web + busca web (especulativa)
 NODE_SYNTHESIZE = "synthesize_response"
 NODE_ERROR = "error_handler"
 
@@ -68,17 +66,6 @@ def route_after_transform(state: AgentState) -> str:
     print("  Roteando para Busca LexML.")
     return NODE_LEXML
 
-# Funções de roteamento para o novo fluxo
-def route_after_evaluation(state: AgentState) -> str:
-    """Roteamento após avaliação de necessidade de busca web."""
-    needs_web = state.get("needs_web_search", False)
-    if needs_web:
-        print("  Busca web necessária. Roteando para busca web condicional.")
-        return NODE_WEB_SEARCH
-    else:
-        print("  Busca web não necessária. Roteando para síntese.")
-        return NODE_SYNTHESIZE
-
 # --- Construção do Grafo ---
 def build_graph():
     """Constrói o StateGraph para o fluxo CRAG unificado."""
@@ -89,8 +76,7 @@ def build_graph():
     workflow.add_node(NODE_GRADE, grade_documents)
     workflow.add_node(NODE_TRANSFORM, transform_query)
     workflow.add_node(NODE_LEXML, search_jurisprudencia)  # Sempre executado
-    workflow.add_node(NODE_EVALUATE, evaluate_search_necessity)  # Avalia necessidade de web
-    workflow.add_node(NODE_WEB_SEARCH, search_web_conditional)  # Busca web condicional
+    workflow.add_node(NODE_EVALUATE, evaluate_and_search_web)  # Avalia necessidade de web e busca
     workflow.add_node(NODE_SYNTHESIZE, synthesize_response)
     workflow.add_node(NODE_ERROR, handle_error)
 
@@ -120,18 +106,8 @@ def build_graph():
     # Após LexML, sempre avaliar necessidade de busca web
     workflow.add_edge(NODE_LEXML, NODE_EVALUATE)
 
-    # Roteamento após avaliação
-    workflow.add_conditional_edges(
-        NODE_EVALUATE,
-        route_after_evaluation,
-        {
-            NODE_WEB_SEARCH: NODE_WEB_SEARCH,
-            NODE_SYNTHESIZE: NODE_SYNTHESIZE
-        }
-    )
-
-    # Após busca web, sempre ir para síntese
-    workflow.add_edge(NODE_WEB_SEARCH, NODE_SYNTHESIZE)
+    # Após avaliação (e busca web, se necessária), sempre ir para síntese
+    workflow.add_edge(NODE_EVALUATE, NODE_SYNTHESIZE)
 
     # Finais
     workflow.add_edge(NODE_SYNTHESIZE, END)
@@ -235,6 +235,7 @@ class AgentState(TypedDict):
     web_search_reasoning: NotRequired[str]
     web_search_query: NotRequired[str]
     evaluation_complete: NotRequired[bool]
+    web_search_evaluation_failed: NotRequired[bool]
     web_search_performed: NotRequired[bool]
     web_search_skipped: NotRequired[bool]
     web_search_error: NotRequired[str]
@@ -6,6 +6,7 @@ import asyncio
 import os
 from tavily import TavilyClient
 from dotenv import load_dotenv
+from src.core.http_client import get_shared_http_client, close_loop_http_pool
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -63,7 +64,7 @@ class UnifiedMCP:
     def __init__(self, tavily_api_key: Optional[str] = None):
         # Configuração LexML
         self.lexml_base_url = "https://www.lexml.gov.br/busca/SRU"
-        self.lexml_client = httpx.AsyncClient(timeout=60.0)
+        self.lexml_timeout = httpx.Timeout(60.0)
         self.namespaces = {
             'srw': 'http://www.loc.gov/zing/srw/',
             'dc': 'http://purl.org/dc/elements/1.1/',
@@ -71,7 +72,9 @@ class UnifiedMCP:
             'srw_dc': 'info:srw/schema/1/dc-schema'
         }
         
-        # Configuração Tavily
+        # Configuração Tavily (a busca usa a API REST pelo cliente httpx compartilhado)
+        self.tavily_search_url = "https://api.tavily.com/search"
+        self.tavily_timeout = httpx.Timeout(60.0)
         self.tavily_api_key = tavily_api_key or os.getenv("TAVILY_API_KEY")
         self.tavily_client = None
         if self.tavily_api_key:
@@ -202,7 +205,10 @@ class UnifiedMCP:
         print(f"  Parâmetros SRU: {params}")
 
         try:
-            response = await self.lexml_client.get(self.lexml_base_url, params=params)
+            # Cliente compartilhado (pool keep-alive / HTTP/2) obtido a cada chamada
+            response = await get_shared_http_client().get(
+                self.lexml_base_url, params=params, timeout=self.lexml_timeout
+            )
             response.raise_for_status()
             xml_content = response.text
             
@@ -306,13 +312,20 @@ class UnifiedMCP:
         try:
             print(f"--- MCP Tavily: Buscando na web por '{request.query}' ---")
             
-            # O cliente Tavily é síncrono, então usamos asyncio.to_thread
-            results_raw = await asyncio.to_thread(
-                self.tavily_client.search,
-                query=request.query,
-                max_results=request.max_results,
-                search_depth=request.search_depth
+            # Mesmo endpoint do TavilyClient.search, mas assíncrono e sobre o pool de conexões
+            # compartilhado (o SDK síncrono abria uma conexão nova por busca, em uma thread)
+            response = await get_shared_http_client().post(
+                self.tavily_search_url,
+                json={
+                    "query": request.query,
+                    "max_results": request.max_results,
+                    "search_depth": request.search_depth
+                },
+                headers={"Authorization": f"Bearer {self.tavily_api_key}"},
+                timeout=self.tavily_timeout
             )
+            response.raise_for_status()
+            results_raw = response.json()
 
             formatted_results = [
                 TavilySearchResult(
@@ -335,9 +348,8 @@ class UnifiedMCP:
             raise ValueError(f"Erro na busca Tavily: {e}")
     
     async def close(self):
-        """Fecha as conexões"""
-        if self.lexml_client:
-            await self.lexml_client.aclose()
+        """Fecha as conexões do event loop corrente (o cliente compartilhado segue em uso pelos providers)"""
+        await close_loop_http_pool()
 
 # Instância global
 unified_mcp = UnifiedMCP()
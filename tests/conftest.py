@@ -0,0 +1,15 @@
+"""
+Configuração comum dos testes unitários.
+Coloca a raiz do repositório no sys.path (imports `src.…`, como no app.py) e define chaves
+de API fictícias: os agentes do processador híbrido criam seus modelos na importação.
+"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+os.environ.setdefault("OPENROUTER_API_KEY", "test-openrouter-key")
+os.environ.setdefault("GROQ_API_KEY", "test-groq-key")
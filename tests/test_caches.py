@@ -0,0 +1,194 @@
+"""Testes dos caches em memória (src/core/semantic_cache.py): ExactLRUCache e SemanticCache."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pydantic")
+pytest.importorskip("structlog")
+
+from src.core import semantic_cache
+from src.core.semantic_cache import ExactLRUCache, SemanticCache, exact_key, normalize_query
+
+
+class FakeClock:
+    """Relógio controlado pelo teste para o TTL do ExactLRUCache."""
+
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", SimpleNamespace(time=fake))
+    return fake
+
+
+def age(cache: SemanticCache, position: int, seconds: float) -> None:
+    """Envelhece uma entrada (created_at vem do default_factory de CachedValue, ligado a time.time)."""
+    cache._entries[position].created_at -= seconds
+
+
+def unit(position: int, dimension: int = 8):
+    """Vetor da base canônica: similaridade 1 consigo mesmo e 0 com os demais."""
+    vector = [0.0] * dimension
+    vector[position] = 1.0
+    return vector
+
+
+# ===============================
+# ExactLRUCache
+# ===============================
+
+def test_exact_key_and_normalize_query():
+    assert normalize_query("  Sociedade   LIMITADA\n") == "sociedade limitada"
+    assert exact_key("a", "b") == exact_key("a", "b")
+    assert exact_key("a", "b") != exact_key("ab")
+    assert len(exact_key("x")) == 32
+
+
+def test_exact_cache_get_put_and_stats(clock):
+    cache = ExactLRUCache("test", maxsize=4, ttl_seconds=60)
+    assert cache.get("k") is None
+    cache.put("k", "valor")
+    assert cache.get("k") == "valor"
+    assert cache.stats() == {"cache": "test", "entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_exact_cache_evicts_least_recently_used(clock):
+    cache = ExactLRUCache("test", maxsize=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_exact_cache_put_refreshes_existing_key(clock):
+    cache = ExactLRUCache("test", maxsize=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+
+
+def test_exact_cache_ttl_expiry_removes_entry(clock):
+    cache = ExactLRUCache("test", maxsize=4, ttl_seconds=60)
+    cache.put("k", "valor")
+
+    clock.now += 60
+    assert cache.get("k") == "valor"  # Limite inclusivo
+
+    clock.now += 1
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+# ===============================
+# SemanticCache (fallback NumPy)
+# ===============================
+
+@pytest.fixture
+def numpy_only(monkeypatch):
+    """Força o caminho NumPy, com ou sem FAISS instalado."""
+    monkeypatch.setattr(semantic_cache, "FAISS_AVAILABLE", False)
+
+
+def new_semantic_cache(**kwargs) -> SemanticCache:
+    options = {"dimension": 8, "similarity_threshold": 0.9, "ttl_seconds": 60, "max_entries": 100}
+    options.update(kwargs)
+    return SemanticCache("test", **options)
+
+
+def test_semantic_cache_threshold(numpy_only):
+    cache = new_semantic_cache()
+    cache.put(unit(0), "a")
+
+    assert cache.get([2.0] + [0.0] * 7) == "a"  # Embeddings são normalizados
+    assert cache.get([1.0, 1.0] + [0.0] * 6) is None  # Cosseno ~0.707 < 0.9
+    assert cache.get(unit(1)) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_semantic_cache_ttl(numpy_only):
+    cache = new_semantic_cache()
+    cache.put(unit(0), "a")
+
+    age(cache, 0, 61)
+    assert cache.get(unit(0)) is None
+
+
+def test_semantic_cache_evicts_expired_entries_first(numpy_only):
+    cache = new_semantic_cache(max_entries=3)
+    cache.put(unit(0), "a")
+    age(cache, 0, 61)
+    cache.put(unit(1), "b")
+    cache.put(unit(2), "c")
+
+    cache.put(unit(3), "d")  # Cheio: só a entrada expirada sai
+
+    assert len(cache) == 3
+    assert cache.get(unit(0)) is None
+    assert [cache.get(unit(i)) for i in (1, 2, 3)] == ["b", "c", "d"]
+
+
+def test_semantic_cache_evicts_oldest_half_and_rebuilds(numpy_only):
+    cache = new_semantic_cache(max_entries=4)
+    for i, value in enumerate("abcd"):
+        cache.put(unit(i), value)
+    assert cache.get(unit(0)) == "a"  # Materializa a matriz antes da compactação
+
+    cache.put(unit(4), "e")
+
+    assert len(cache) == 3
+    assert cache.get(unit(0)) is None
+    assert cache.get(unit(1)) is None
+    # Posições remapeadas após a reconstrução: cada vetor devolve o próprio valor
+    assert [cache.get(unit(i)) for i in (2, 3, 4)] == ["c", "d", "e"]
+
+
+def test_semantic_cache_save_and_load(numpy_only, tmp_path):
+    path = str(tmp_path / "cache")
+    cache = new_semantic_cache()
+    cache.put(unit(0), "a")
+    cache.put(unit(1), {"resposta": "b"})
+    cache.save(path)
+
+    restored = new_semantic_cache()
+    assert restored.load(path) is True
+    assert len(restored) == 2
+    assert restored.get(unit(0)) == "a"
+    assert restored.get(unit(1)) == {"resposta": "b"}
+
+
+def test_semantic_cache_load_missing_file(numpy_only, tmp_path):
+    cache = new_semantic_cache()
+    assert cache.load(str(tmp_path / "inexistente")) is False
+    assert len(cache) == 0
+
+
+def test_semantic_cache_save_and_load_with_faiss(tmp_path):
+    pytest.importorskip("faiss")
+    path = str(tmp_path / "cache")
+    cache = new_semantic_cache()
+    for i, value in enumerate("abc"):
+        cache.put(unit(i), value)
+    cache.save(path)
+
+    assert (tmp_path / "cache.faiss").exists()
+    restored = new_semantic_cache()
+    assert restored.load(path) is True
+    assert [restored.get(unit(i)) for i in range(3)] == ["a", "b", "c"]
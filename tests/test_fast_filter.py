@@ -0,0 +1,41 @@
+"""Testes do filtro rápido de guardrails (src/agents/guardrails/fast_filter.py)."""
+
+import pytest
+
+pytest.importorskip("structlog")
+
+from src.agents.guardrails.fast_filter import count_red_flags, find_fast_guardrail_violation, find_pii
+
+
+@pytest.mark.parametrize("text", [
+    "Você não precisa de advogado para isso.",
+    "Garanto que o recurso será aceito.",
+    "Eu garanto que você vai ganhar a causa.",
+    "Com certeza você vai vencer.",
+    "Veja como sonegar impostos sem ser pego.",
+])
+def test_fast_violation_detected(text):
+    assert find_fast_guardrail_violation(text)
+
+
+def test_fast_violation_returns_matched_excerpt():
+    match = find_fast_guardrail_violation("Resumo: GARANTO QUE dará certo.")
+    assert match.lower() == "garanto que"
+
+
+def test_safe_text_has_no_fast_violation():
+    text = "Recomenda-se consultar um advogado especializado em direito empresarial."
+    assert find_fast_guardrail_violation(text) is None
+
+
+def test_count_red_flags_counts_terms_and_documents():
+    assert count_red_flags("Consulte um advogado sobre a alteração contratual.") == 0
+    assert count_red_flags("Não há garantia; evite caixa dois e propina.") == 3
+    text = "CPF 123.456.789-00 e CNPJ 12.345.678/0001-90"
+    assert count_red_flags(text) == 2
+
+
+def test_find_pii():
+    text = "Sócio: 123.456.789-00. Empresa: 12.345.678/0001-90. Processo 0001234-56.2024."
+    assert find_pii(text) == ["123.456.789-00", "12.345.678/0001-90"]
+    assert find_pii("sem dados pessoais") == []
@@ -0,0 +1,98 @@
+"""
+Testes do parser em texto do verificador de guardrails.
+guardrail_parse não depende do restante do sistema: o módulo é carregado pelo caminho do
+arquivo, sem executar o __init__ do pacote guardrails (que importa structlog).
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+from conftest import ROOT_DIR
+
+_spec = importlib.util.spec_from_file_location(
+    "guardrail_parse",
+    os.path.join(ROOT_DIR, "src", "agents", "guardrails", "guardrail_parse.py")
+)
+guardrail_parse = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(guardrail_parse)
+
+parse_guardrail_text = guardrail_parse.parse_guardrail_text
+
+
+def test_defaults_when_no_fields():
+    assert parse_guardrail_text("") == (True, "baixo", [])
+    assert parse_guardrail_text("resposta sem o formato esperado") == (True, "baixo", [])
+
+
+def test_failed_check_collects_violations():
+    text = (
+        "PASSOU_VERIFICACAO: NÃO\n"
+        "NIVEL_RISCO: ALTO\n"
+        "VIOLACOES:\n"
+        "- Promete resultado do processo\n"
+        "- Dispensa o advogado\n"
+    )
+    assert parse_guardrail_text(text) == (
+        False, "alto", ["Promete resultado do processo", "Dispensa o advogado"]
+    )
+
+
+def test_violations_are_dropped_when_passed():
+    text = "PASSOU_VERIFICACAO: SIM\nNIVEL_RISCO: BAIXO\n- item irrelevante\n"
+    assert parse_guardrail_text(text) == (True, "baixo", [])
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("SIM", True),
+    ("Sim", True),
+    ("[SIM]", True),
+    ("**sim**", True),
+    ("'sim'", True),
+    ("NÃO", False),
+    ("NAO", False),
+    ("[NÃO]", False),
+])
+def test_passed_field(value, expected):
+    passed, _, _ = parse_guardrail_text(f"PASSOU_VERIFICACAO: {value}\nNIVEL_RISCO: medio")
+    assert passed is expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("BAIXO", "baixo"),
+    ("LOW", "baixo"),
+    ("Médio", "medio"),
+    ("**Médio**", "medio"),
+    ("Média", "medio"),
+    ("medium", "medio"),
+    ("medio-alto", "medio"),
+    ("[ALTO]", "alto"),
+    ("alto.", "alto"),
+    ("ALTO - conteúdo sensível", "alto"),
+    ("desconhecido", "medio"),
+    ("", "medio"),
+])
+def test_risk_level_normalization(value, expected):
+    _, risk, _ = parse_guardrail_text(f"PASSOU_VERIFICACAO: NÃO\nNIVEL_RISCO: {value}")
+    assert risk == expected
+
+
+def test_bold_field_names():
+    text = "**PASSOU_VERIFICACAO:** NÃO\n**NIVEL_RISCO:** Alto\n- violação\n"
+    assert parse_guardrail_text(text) == (False, "alto", ["violação"])
+
+
+def test_violations_are_capped():
+    items = "".join(f"- violação {i}\n" for i in range(40))
+    text = f"PASSOU_VERIFICACAO: NÃO\nNIVEL_RISCO: ALTO\n{items}"
+    _, _, violations = parse_guardrail_text(text)
+    assert violations == [f"violação {i}" for i in range(guardrail_parse._MAX_VIOLATIONS)]
+
+
+def test_risk_after_violations_is_still_read():
+    items = "".join(f"- violação {i}\n" for i in range(40))
+    text = f"PASSOU_VERIFICACAO: NÃO\n{items}NIVEL_RISCO: ALTO\n"
+    _, risk, violations = parse_guardrail_text(text)
+    assert risk == "alto"
+    assert len(violations) == guardrail_parse._MAX_VIOLATIONS
@@ -0,0 +1,262 @@
+"""
+Testes dos parsers em texto e dos utilitários CRAG do processador híbrido
+(src/agents/streaming/hybrid_legal_processor.py).
+"""
+
+import dataclasses
+
+import pytest
+
+pytest.importorskip("pydantic_ai")
+
+from pydantic import BaseModel
+
+from src.agents.streaming.hybrid_legal_processor import (
+    BatchAgent,
+    _extract_crag_snippets,
+    _summarize_results,
+    parse_decision_response,
+    parse_quality_response,
+)
+
+
+# ===============================
+# parse_decision_response
+# ===============================
+
+def test_decision_defaults_when_no_fields():
+    decision = parse_decision_response("")
+    assert decision.needs_vectordb is True
+    assert decision.needs_lexml is True
+    assert decision.needs_web is True
+    assert decision.needs_jurisprudence is True
+    assert decision.reasoning == "Análise jurídica completa necessária"
+    assert decision.confidence == 0.8
+    assert decision.priority_order == ["vectordb", "lexml", "web"]
+
+
+def test_decision_full_response():
+    text = (
+        "VECTORDB: SIM\n"
+        "LEXML: NAO\n"
+        "WEB: NÃO\n"
+        "JURISPRUDENCIA: Sim\n"
+        "JUSTIFICATIVA: Pergunta conceitual sobre sociedade limitada.\n"
+        "CONFIANCA: 0.65\n"
+        "PRIORIDADE: vectordb, jurisprudencia\n"
+    )
+    decision = parse_decision_response(text)
+    assert (decision.needs_vectordb, decision.needs_lexml, decision.needs_web, decision.needs_jurisprudence) == (
+        True, False, False, True
+    )
+    assert decision.reasoning == "Pergunta conceitual sobre sociedade limitada."
+    assert decision.confidence == 0.65
+
+
+def test_decision_bold_and_accented_keys():
+    text = "**LEXML:** NAO\n**JURISPRUDÊNCIA:** NÃO\n**CONFIANÇA:** 0.9\n"
+    decision = parse_decision_response(text)
+    assert decision.needs_lexml is False
+    assert decision.needs_jurisprudence is False
+    assert decision.confidence == 0.9
+
+
+def test_decision_unknown_flag_value_keeps_default():
+    decision = parse_decision_response("WEB: talvez\nLEXML:\n")
+    assert decision.needs_web is True
+    assert decision.needs_lexml is True
+
+
+def test_decision_reasoning_spans_lines_until_next_key():
+    text = (
+        "JUSTIFICATIVA: Primeira linha\n"
+        "segunda linha\n"
+        "\n"
+        "CONFIANCA: 0.7\n"
+        "linha fora da justificativa\n"
+    )
+    decision = parse_decision_response(text)
+    assert decision.reasoning == "Primeira linha\nsegunda linha"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("0.9 (alta)", 0.9),
+    ("1.5", 1.0),
+    ("-0.2", 0.0),
+    ("alta", 0.8),
+    ("0.8.", 0.8),
+])
+def test_decision_confidence(value, expected):
+    assert parse_decision_response(f"CONFIANCA: {value}").confidence == expected
+
+
+# ===============================
+# parse_quality_response
+# ===============================
+
+def test_quality_defaults_when_no_fields():
+    assessment = parse_quality_response("")
+    assert (assessment.overall_score, assessment.completeness, assessment.accuracy, assessment.clarity) == (
+        0.8, 0.8, 0.8, 0.8
+    )
+    assert assessment.needs_improvement is False
+    assert assessment.needs_human_review is False
+    assert assessment.review_reason == "Avaliação automática concluída"
+    assert assessment.improvement_suggestions == []
+
+
+def test_quality_full_response():
+    text = (
+        "SCORE_GERAL: 0.7\n"
+        "COMPLETUDE: 0.6\n"
+        "PRECISAO: 0.9\n"
+        "CLAREZA: 0.5\n"
+        "PRECISA_MELHORIA: SIM\n"
+        "PRECISA_REVISAO_HUMANA: NAO\n"
+        "MOTIVO_REVISAO: Faltam referências legais\n"
+        "SUGESTOES:\n"
+        "- Citar o art. 1.052 do Código Civil\n"
+        "- Incluir exemplo prático\n"
+    )
+    assessment = parse_quality_response(text)
+    assert (assessment.overall_score, assessment.completeness, assessment.accuracy, assessment.clarity) == (
+        0.7, 0.6, 0.9, 0.5
+    )
+    assert assessment.needs_improvement is True
+    assert assessment.needs_human_review is False
+    assert assessment.review_reason == "Faltam referências legais"
+    assert assessment.improvement_suggestions == ["Citar o art. 1.052 do Código Civil", "Incluir exemplo prático"]
+
+
+def test_quality_bold_fields_and_invalid_score():
+    text = "**SCORE_GERAL:** 0.9\n**COMPLETUDE:** alta\n**PRECISA_REVISAO_HUMANA:** **Sim**\n"
+    assessment = parse_quality_response(text)
+    assert assessment.overall_score == 0.9
+    assert assessment.completeness == 0.8
+    assert assessment.needs_human_review is True
+
+
+# ===============================
+# BatchAgent._split_output
+# ===============================
+
+def split_output(text, expected):
+    # _split_output não usa o agente: basta uma instância sem agente
+    return BatchAgent(agent=None, response_format="")._split_output(text, expected)
+
+
+def test_split_output_in_order():
+    text = "preâmbulo\n--- QUERY 1 ---\n VECTORDB: SIM \n--- QUERY 2 ---\nVECTORDB: NAO\n"
+    assert split_output(text, 2) == ["VECTORDB: SIM", "VECTORDB: NAO"]
+
+
+def test_split_output_is_case_insensitive_and_reorders():
+    text = "---query 2---\nsegunda\n--- Query 1 ---\nprimeira"
+    assert split_output(text, 2) == ["primeira", "segunda"]
+
+
+def test_split_output_ignores_out_of_range_and_duplicates():
+    text = (
+        "--- QUERY 1 ---\nprimeira\n"
+        "--- QUERY 1 ---\nrepetida\n"
+        "--- QUERY 0 ---\nzero\n"
+        "--- QUERY 4 ---\nquarta\n"
+    )
+    assert split_output(text, 3) == ["primeira", None, None]
+
+
+def test_split_output_without_markers():
+    assert split_output("resposta sem marcadores", 2) == [None, None]
+
+
+# ===============================
+# _summarize_results
+# ===============================
+
+PLAIN_RESULTS = [
+    {"title": "Lei 10.406", "content": "Art. 1.052.\nNa sociedade limitada...", "score": 0.93, "url": None},
+    [{"content": "a" * 300}, {"content": "b" * 300}, {"content": "c" * 300}],
+    {"results": [{"rank": 1, "tags": ("empresarial", "societário")}], "total": 1, "ok": True},
+    [(1,), (), [], {}, "tab\tbarra\\"],
+    {"nested": {"deeper": {"deepest": ["x" * 50, -1, 2.5]}}},
+]
+
+
+@pytest.mark.parametrize("obj", PLAIN_RESULTS)
+@pytest.mark.parametrize("max_chars", [0, 1, 7, 50, 100, 500, 5000])
+def test_summarize_results_matches_str_prefix(obj, max_chars):
+    assert _summarize_results(obj, max_chars) == str(obj)[:max_chars]
+
+
+def test_summarize_results_default_budget():
+    obj = [{"content": "x" * 1000}]
+    assert _summarize_results(obj) == str(obj)[:500]
+
+
+def test_summarize_results_string_is_sliced():
+    assert _summarize_results("abcdef", 3) == "abc"
+
+
+def test_summarize_results_models_and_dataclasses_field_by_field():
+    class Doc(BaseModel):
+        title: str
+        score: float
+
+    @dataclasses.dataclass
+    class Hit:
+        url: str
+        rank: int
+
+    assert _summarize_results([Doc(title="Lei", score=0.5)], 100) == "[{'title': 'Lei', 'score': 0.5}]"
+    assert _summarize_results(Hit(url="u", rank=2), 100) == "{'url': 'u', 'rank': 2}"
+
+
+# ===============================
+# _extract_crag_snippets
+# ===============================
+
+class LangChainLikeDoc:
+    def __init__(self, page_content):
+        self.page_content = page_content
+
+
+def test_extract_crag_snippets_top_documents_and_sources():
+    docs = [
+        {"content": " primeiro "},
+        "segundo",
+        {"page_content": "terceiro"},
+        {"content": "   "},
+        LangChainLikeDoc("quinto"),
+        {"content": "sexto (fora do top 5)"},
+    ]
+    tavily = [{"content": "web 1"}, "web 2", {"content": "web 3"}]
+    lexml = [{"title": "sem conteúdo"}, "lexml 2", "lexml 3"]
+
+    snippets, docs_count, log = _extract_crag_snippets(docs, tavily, lexml)
+
+    assert snippets == ["primeiro", "segundo", "terceiro", "quinto", "web 1", "web 2", "lexml 2"]
+    assert docs_count == 6
+    assert log["processed_count"] == 4
+    assert log["skipped_count"] == 1
+    assert log["total_content_length"] == len(" primeiro ") + len("segundo") + len("terceiro") + len("quinto")
+    assert log["processed_docs"] == [] and log["skipped_docs"] == []
+
+
+def test_extract_crag_snippets_truncates_documents():
+    snippets, _, _ = _extract_crag_snippets([{"content": "x" * 2000}], [{"content": "y" * 2000}], None)
+    assert [len(snippet) for snippet in snippets] == [500, 500]
+
+
+def test_extract_crag_snippets_logs_each_document():
+    _, _, log = _extract_crag_snippets([{"content": "texto", "source": "app"}, {"content": ""}], None, None, True)
+
+    assert [entry["index"] for entry in log["processed_docs"]] == [0]
+    assert log["processed_docs"][0]["doc_source"] == "app"
+    assert log["processed_docs"][0]["processing_method"] == "dict_content"
+    assert [entry["index"] for entry in log["skipped_docs"]] == [1]
+
+
+def test_extract_crag_snippets_empty_inputs():
+    assert _extract_crag_snippets(None, None, None) == (
+        [], 0, {"processed_docs": [], "skipped_docs": [], "processed_count": 0, "skipped_count": 0, "total_content_length": 0}
+    )
@@ -0,0 +1,39 @@
+"""Testes do recorte por orçamento de tokens (src/core/token_budget.py)."""
+
+import pytest
+
+pytest.importorskip("structlog")
+
+from src.core import token_budget
+from src.core.token_budget import CHARS_PER_TOKEN, trim_tokens
+
+
+def test_empty_text_is_returned_unchanged():
+    assert trim_tokens("", 10) == ""
+
+
+def test_short_text_skips_the_tokenizer(monkeypatch):
+    def fail():
+        raise AssertionError("textos curtos não devem carregar o tokenizer")
+
+    monkeypatch.setattr(token_budget, "get_encoding", fail)
+    text = "Sociedade limitada"
+    assert trim_tokens(text, len(text)) is text
+
+
+def test_character_fallback_without_tokenizer(monkeypatch):
+    monkeypatch.setattr(token_budget, "get_encoding", lambda: None)
+    text = "a" * 1000
+    assert trim_tokens(text, 50) == text[:50 * CHARS_PER_TOKEN]
+
+
+def test_tokenizer_budget_is_respected():
+    encoding = token_budget.get_encoding()
+    if encoding is None:
+        pytest.skip("tokenizer tiktoken indisponível")
+
+    text = "O contrato social da sociedade limitada define a administração. " * 50
+    trimmed = trim_tokens(text, 40)
+    assert text.startswith(trimmed)
+    assert len(encoding.encode(trimmed)) <= 40
+    assert trim_tokens("Texto curto de exemplo.", 40) == "Texto curto de exemplo."